@@ -9,6 +9,10 @@ const functions = require('firebase-functions');
 const admin = require('firebase-admin');
 const vision = require('@google-cloud/vision');
 const openai = require('openai');
+const { MAX_BATCH_IMAGES, PRICE_SELECTION_RULES, analyzeImageBatch } = require('./ocr_batch');
+const { RateLimiter, RateLimitExceededError } = require('./rate_limiter');
+const { MAX_SIMILARITY_PAIRS, checkSimilarityBatch } = require('./ingredient_similarity');
+const { matchesOcrHint } = require('./ocr_hint');
 
 admin.initializeApp();
 
@@ -38,52 +42,28 @@ function getOpenAIClient() {
 // 画像サイズ上限（10MB）
 const MAX_IMAGE_SIZE = 10 * 1024 * 1024;
 
-// レート制限設定
-const RATE_LIMIT_PER_MINUTE = 50;
-const RATE_LIMIT_PER_DAY = 500;
+// レート制限（機能ごとの固定ウィンドウカウンタ）
+const rateLimiter = new RateLimiter({
+  getDb: () => admin.firestore(),
+  fieldValue: admin.firestore.FieldValue,
+});
 
 /**
  * レート制限チェック
  * @param {string} userId - ユーザーID
+ * @param {string} scope - 機能名（'ocr' | 'recipe' | 'summarize' | 'similarity'）
  * @returns {Promise<void>} レート制限超過時はHttpsErrorをスロー
  */
-async function checkRateLimit(userId) {
-  const db = admin.firestore();
-  const now = Date.now();
-  const oneMinuteAgo = now - 60 * 1000;
-  const oneDayAgo = now - 24 * 60 * 60 * 1000;
-
-  const rateLimitRef = db.collection('rateLimits').doc(userId);
-
-  return db.runTransaction(async (transaction) => {
-    const doc = await transaction.get(rateLimitRef);
-    const data = doc.exists ? doc.data() : { calls: [] };
-
-    // 古いエントリーを削除し、直近のものだけ保持
-    const recentCalls = (data.calls || []).filter(ts => ts > oneDayAgo);
-    const callsLastMinute = recentCalls.filter(ts => ts > oneMinuteAgo);
-
-    if (callsLastMinute.length >= RATE_LIMIT_PER_MINUTE) {
-      throw new HttpsError(
-        'resource-exhausted',
-        `1分あたりの呼び出し回数制限（${RATE_LIMIT_PER_MINUTE}回）を超えました。しばらくしてから再試行してください。`
-      );
-    }
-
-    if (recentCalls.length >= RATE_LIMIT_PER_DAY) {
-      throw new HttpsError(
-        'resource-exhausted',
-        `1日あたりの呼び出し回数制限（${RATE_LIMIT_PER_DAY}回）を超えました。明日再試行してください。`
-      );
+async function checkRateLimit(userId, scope) {
+  try {
+    await rateLimiter.consume(userId, scope);
+  } catch (error) {
+    if (error instanceof RateLimitExceededError) {
+      logger.warn('レート制限超過:', { userId, scope, window: error.window });
+      throw new HttpsError('resource-exhausted', error.message);
     }
-
-    // 新しい呼び出しを記録
-    recentCalls.push(now);
-    transaction.set(rateLimitRef, {
-      calls: recentCalls,
-      updatedAt: admin.firestore.FieldValue.serverTimestamp(),
-    });
-  });
+    throw error;
+  }
 }
 
 // Cloud Function to analyze image using OCR and ChatGPT (シンプル版)
@@ -96,9 +76,9 @@ exports.analyzeImage = onCall(
     }
 
     // レート制限チェック
-    await checkRateLimit(request.auth.uid);
+    await checkRateLimit(request.auth.uid, 'ocr');
 
-    const { imageUrl, timestamp } = request.data;
+    const { imageUrl, timestamp, hint } = request.data;
     if (!imageUrl) {
       throw new HttpsError('invalid-argument', '画像データが必要です');
     }
@@ -157,6 +137,19 @@ exports.analyzeImage = onCall(
 
       logger.info('OCRテキスト取得完了:', ocrText.slice(0, 100) + '...');
 
+      // 端末のキャッシュから渡された似た値札の結果は、OCRテキストで裏付けが取れた場合のみ使う
+      if (matchesOcrHint(hint, ocrText)) {
+        logger.info('キャッシュのヒントを採用:', { name: hint.name, price: hint.price });
+        return {
+          success: true,
+          name: hint.name,
+          price: hint.price,
+          ocrText: ocrText,
+          timestamp: timestamp || new Date().toISOString(),
+          userId: request.auth.uid
+        };
+      }
+
       // 2. ChatGPTで商品情報を抽出
       logger.info('ChatGPTで商品情報を抽出中...');
       // OpenAIクライアントをリクエストごとに再生成（Secretの値が変わる可能性があるため）
@@ -175,15 +168,7 @@ exports.analyzeImage = onCall(
   "price": 税込価格（整数）
 }
 
-【価格の選択ルール（最重要 - 必ず全ルールに従うこと）】:
-1. 「税込」「税込価格」「(税込)」「[税込」「税込み」などのラベルが付いた価格を最優先で選択する。本体価格がどれほど大きく目立っていても、税込ラベル付きの価格を必ず選ぶこと
-2. 「本体価格」「本体」とラベルされた価格は税抜き価格なので絶対に選ばない
-3. 小数を含む価格（例:「149.04円」「85.32円」「429,84円」）は税込価格である可能性が極めて高い。カンマやピリオドが小数点として使われている場合がある。小数点以下を切り捨てて整数で返す（例: 85.32→85, 321.84→321, 429,84→429）
-4. OCRで小数点が欠落して「税込31104円」のように不自然に大きい数値になっている場合、元は「311.04円」である可能性が高い。末尾2桁を小数部分とみなし整数部分を返す（31104→311）
-5. 価格が1種類のみで「本体」「本体価格」のラベルがない場合は、そのまま税込価格として返す（税率計算をしてはならない）
-6. 「本体」ラベル付きの価格しかなく税込価格が見つからない場合のみ税率計算する:
-   - 食品・飲料: 本体価格 × 1.08 の整数部分
-   - それ以外: 本体価格 × 1.10 の整数部分
+${PRICE_SELECTION_RULES}
 
 【その他】:
 - 商品名は簡潔に（例：「やわらかパイ」「カップ麺」）
@@ -262,6 +247,95 @@ exports.analyzeImage = onCall(
   }
 );
 
+// Cloud Function to analyze multiple price tag images in one request
+// レート制限は1リクエストにつき1回、OCRは batchAnnotateImages、商品情報の抽出は1回のChatGPT呼び出し
+// ストリーミング対応のクライアントには画像ごとの結果を確定した順に送信する
+// （先に届くのはOCRに失敗した画像のみで、成功した画像はChatGPTの応答後にまとめて届く）
+exports.analyzeImages = onCall(
+  { memory: '1GiB', timeoutSeconds: 120, secrets: [openaiApiKey] },
+  async (request, response) => {
+    // 認証チェック
+    if (!request.auth) {
+      throw new HttpsError('unauthenticated', '認証が必要です');
+    }
+
+    // レート制限チェック（バッチ全体で1回）
+    await checkRateLimit(request.auth.uid, 'ocr');
+
+    const { images, timestamp } = request.data;
+    if (!Array.isArray(images) || images.length === 0) {
+      throw new HttpsError('invalid-argument', '画像データが必要です');
+    }
+    if (images.length > MAX_BATCH_IMAGES) {
+      throw new HttpsError(
+        'invalid-argument',
+        `一度に解析できる画像は${MAX_BATCH_IMAGES}枚までです。`
+      );
+    }
+    if (images.some((image) => typeof image !== 'string' || !image)) {
+      throw new HttpsError('invalid-argument', '画像データが不正です');
+    }
+
+    // base64エンコードされた画像データを処理
+    const imageBuffers = images.map((image) => Buffer.from(image, 'base64'));
+    const totalSize = imageBuffers.reduce((sum, buffer) => sum + buffer.length, 0);
+
+    // 入力サイズ制限チェック（合計10MB上限）
+    if (totalSize > MAX_IMAGE_SIZE) {
+      throw new HttpsError(
+        'invalid-argument',
+        '画像サイズの合計が上限（10MB）を超えています。枚数を減らして再試行してください。'
+      );
+    }
+
+    try {
+      logger.info('一括画像解析開始:', {
+        userId: request.auth.uid,
+        imageCount: imageBuffers.length,
+        totalSize,
+        streaming: request.acceptsStreaming,
+        timestamp,
+      });
+
+      // OpenAIクライアントをリクエストごとに再生成（Secretの値が変わる可能性があるため）
+      _openaiClient = null;
+      const results = await analyzeImageBatch({
+        images: imageBuffers,
+        visionClient: getVisionClient(),
+        openaiClient: getOpenAIClient(),
+        onResult: (result) => {
+          if (request.acceptsStreaming) {
+            response.sendChunk(result);
+          }
+        },
+      });
+
+      logger.info('一括画像解析完了:', {
+        imageCount: results.length,
+        successCount: results.filter((r) => r.success).length,
+      });
+
+      return {
+        success: true,
+        results,
+        timestamp: timestamp || new Date().toISOString(),
+      };
+    } catch (error) {
+      logger.error('一括画像解析エラー:', error);
+
+      if (error instanceof HttpsError) {
+        throw error;
+      }
+
+      if (error.message && error.message.includes('タイムアウト')) {
+        throw new HttpsError('deadline-exceeded', '解析がタイムアウトしました。枚数を減らして再試行してください。');
+      }
+
+      throw new HttpsError('internal', '画像解析に失敗しました。しばらくしてから再試行してください。');
+    }
+  }
+);
+
 // Cloud Function to set family plan for invitee and owner when owner creates family
 exports.applyFamilyPlanToGroup = onDocumentCreated(
   'families/{familyId}',
@@ -634,6 +708,9 @@ exports.parseRecipe = onCall(
     );
   }
 
+  // レート制限チェック
+  await checkRateLimit(request.auth.uid, 'recipe');
+
   try {
     logger.info('レシピ解析開始:', { userId: request.auth.uid });
 
@@ -718,6 +795,9 @@ exports.summarizeProductName = onCall(
       throw new HttpsError('invalid-argument', '商品名が必要です');
     }
 
+    // レート制限チェック
+    await checkRateLimit(request.auth.uid, 'summarize');
+
     try {
       _openaiClient = null;
       const chatResponse = await Promise.race([
@@ -781,6 +861,9 @@ exports.checkIngredientSimilarity = onCall(
       return { success: true, isSame: true };
     }
 
+    // レート制限チェック（ChatGPTを呼び出す場合のみ）
+    await checkRateLimit(request.auth.uid, 'similarity');
+
     try {
       _openaiClient = null;
       const chatResponse = await Promise.race([
@@ -817,3 +900,51 @@ exports.checkIngredientSimilarity = onCall(
     }
   }
 );
+
+// Cloud Function to check multiple ingredient pairs in one request
+// 端末内の正規化で判定できなかった組み合わせのみが送られる。レート制限は1リクエストにつき1回
+exports.checkIngredientSimilarities = onCall(
+  { secrets: [openaiApiKey] },
+  async (request) => {
+    if (!request.auth) {
+      throw new HttpsError('unauthenticated', '認証が必要です');
+    }
+
+    const { pairs } = request.data;
+    if (!Array.isArray(pairs) || pairs.length === 0) {
+      throw new HttpsError('invalid-argument', '材料名の組み合わせが必要です');
+    }
+    if (pairs.length > MAX_SIMILARITY_PAIRS) {
+      throw new HttpsError(
+        'invalid-argument',
+        `一度に判定できる組み合わせは${MAX_SIMILARITY_PAIRS}件までです。`
+      );
+    }
+    if (pairs.some((pair) => !pair || typeof pair.name1 !== 'string' || typeof pair.name2 !== 'string' ||
+        !pair.name1 || !pair.name2)) {
+      throw new HttpsError('invalid-argument', '2つの材料名が必要です');
+    }
+
+    // レート制限チェック
+    await checkRateLimit(request.auth.uid, 'similarity');
+
+    try {
+      _openaiClient = null;
+      const results = await checkSimilarityBatch({
+        pairs,
+        openaiClient: getOpenAIClient(),
+      });
+
+      return { success: true, results };
+    } catch (error) {
+      logger.error('材料同一性一括判定エラー:', error);
+      if (error instanceof HttpsError) {
+        throw error;
+      }
+      if (error.message && error.message.includes('タイムアウト')) {
+        throw new HttpsError('deadline-exceeded', '材料同一性判定がタイムアウトしました。しばらくしてから再試行してください。');
+      }
+      throw new HttpsError('internal', '材料同一性判定に失敗しました。しばらくしてから再試行してください。');
+    }
+  }
+);
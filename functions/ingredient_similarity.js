@@ -0,0 +1,85 @@
+// 材料名の組み合わせをまとめて同一性判定する（ChatGPT 1回呼び出し）
+// OpenAI クライアントは引数で受け取るため、テストではスタブに差し替えられる
+
+const { withTimeout } = require('./ocr_batch');
+
+// 1回のリクエストで受け付ける組み合わせ数の上限
+const MAX_SIMILARITY_PAIRS = 50;
+
+const CHATGPT_TIMEOUT_MS = 15000;
+
+const SYSTEM_PROMPT = `あなたは買い物リストの整理ヘルパーです。番号付きの材料名の組み合わせが与えられます。組み合わせごとに、2つの材料が同じ食材を指しているかどうかを判定してください。
+表記ゆれ（ひらがな・カタカナ・漢字・略称）は同じ食材とみなし、部位や種類が異なるもの（例:「豚バラ肉」と「豚ひき肉」）は別の食材とみなします。
+
+出力形式（JSON）:
+{
+  "results": [
+    { "index": 組み合わせの番号（整数）, "isSame": true または false }
+  ]
+}`;
+
+/**
+ * 材料名の組み合わせを1回のChatGPT呼び出しで判定する
+ * 完全一致の組み合わせはChatGPTに送らずに true とする
+ * 応答に含まれなかった組み合わせは判定不能として null を返す（端末側で記録せず再判定する）
+ *
+ * @param {object} params
+ * @param {Array<{name1: string, name2: string}>} params.pairs - 判定する組み合わせ
+ * @param {object} params.openaiClient - chat.completions.create を持つクライアント
+ * @returns {Promise<Array<boolean|null>>} 組み合わせ順の判定結果（判定できなかったものは null）
+ */
+async function checkSimilarityBatch({ pairs, openaiClient, timeoutMs = CHATGPT_TIMEOUT_MS }) {
+  const results = pairs.map(({ name1, name2 }) => (name1.trim() === name2.trim() ? true : null));
+  const pending = pairs
+    .map((pair, index) => ({ ...pair, index }))
+    .filter(({ index }) => !results[index]);
+
+  if (pending.length === 0) {
+    return results;
+  }
+
+  const userContent = pending
+    .map(({ index, name1, name2 }) => `${index}. 「${name1}」と「${name2}」`)
+    .join('\n');
+
+  const chatResponse = await withTimeout(
+    openaiClient.chat.completions.create({
+      model: 'gpt-4o-mini',
+      response_format: { type: 'json_object' },
+      messages: [
+        { role: 'system', content: SYSTEM_PROMPT },
+        { role: 'user', content: `以下の組み合わせを判定してください:\n\n${userContent}` }
+      ],
+      temperature: 0,
+      max_tokens: 50 + 20 * pending.length,
+    }),
+    timeoutMs,
+    'ChatGPTタイムアウト'
+  );
+
+  const content = chatResponse.choices[0]?.message?.content;
+  if (!content) {
+    throw new Error('ChatGPTからの応答が空でした');
+  }
+
+  let parsed;
+  try {
+    parsed = JSON.parse(content);
+  } catch (parseError) {
+    throw new Error('ChatGPTの応答を解析できませんでした');
+  }
+
+  const pendingIndexes = new Set(pending.map(({ index }) => index));
+  for (const result of parsed.results || []) {
+    const index = parseInt(result?.index);
+    if (pendingIndexes.has(index) && typeof result.isSame === 'boolean') {
+      results[index] = result.isSame;
+    }
+  }
+  return results;
+}
+
+module.exports = {
+  MAX_SIMILARITY_PAIRS,
+  checkSimilarityBatch,
+};
@@ -0,0 +1,219 @@
+// 値札画像の一括解析（Vision API batchAnnotateImages + ChatGPT 1回呼び出し）
+// Vision / OpenAI クライアントは引数で受け取るため、テストではスタブに差し替えられる
+
+// 1回のリクエストで受け付ける画像数の上限
+// Vision API の batchAnnotateImages 1リクエストあたりの上限（16枚）以下とし、OCRは常に1回で行う
+const MAX_BATCH_IMAGES = 10;
+
+const VISION_TIMEOUT_MS = 15000;
+const CHATGPT_TIMEOUT_MS = 30000;
+
+// 税込価格の選択ルール（単体解析 analyzeImage と共通）
+const PRICE_SELECTION_RULES = `【価格の選択ルール（最重要 - 必ず全ルールに従うこと）】:
+1. 「税込」「税込価格」「(税込)」「[税込」「税込み」などのラベルが付いた価格を最優先で選択する。本体価格がどれほど大きく目立っていても、税込ラベル付きの価格を必ず選ぶこと
+2. 「本体価格」「本体」とラベルされた価格は税抜き価格なので絶対に選ばない
+3. 小数を含む価格（例:「149.04円」「85.32円」「429,84円」）は税込価格である可能性が極めて高い。カンマやピリオドが小数点として使われている場合がある。小数点以下を切り捨てて整数で返す（例: 85.32→85, 321.84→321, 429,84→429）
+4. OCRで小数点が欠落して「税込31104円」のように不自然に大きい数値になっている場合、元は「311.04円」である可能性が高い。末尾2桁を小数部分とみなし整数部分を返す（31104→311）
+5. 価格が1種類のみで「本体」「本体価格」のラベルがない場合は、そのまま税込価格として返す（税率計算をしてはならない）
+6. 「本体」ラベル付きの価格しかなく税込価格が見つからない場合のみ税率計算する:
+   - 食品・飲料: 本体価格 × 1.08 の整数部分
+   - それ以外: 本体価格 × 1.10 の整数部分`;
+
+const BATCH_SYSTEM_PROMPT = `あなたは商品の値札を解析する専門家です。複数の値札をOCRで読み取ったテキストが番号付きで与えられます。値札ごとに商品名と税込価格を抽出してください。
+
+出力形式（JSON）:
+{
+  "products": [
+    { "index": 値札の番号（整数）, "name": "商品名", "price": 税込価格（整数） }
+  ]
+}
+
+${PRICE_SELECTION_RULES}
+
+【その他】:
+- 値札ごとに必ず1件ずつ、与えられた番号を index に入れて返す
+- 値札同士の情報を混ぜない
+- 商品名は簡潔に（例：「やわらかパイ」「カップ麺」）
+- 商品名や価格が不明確な場合はnullを返す`;
+
+/**
+ * タイムアウト付きでPromiseを待つ
+ * @param {Promise} promise - 待機するPromise
+ * @param {number} ms - タイムアウト（ミリ秒）
+ * @param {string} message - タイムアウト時のエラーメッセージ
+ * @returns {Promise}
+ */
+function withTimeout(promise, ms, message) {
+  let timer;
+  const timeout = new Promise((_, reject) => {
+    timer = setTimeout(() => reject(new Error(message)), ms);
+  });
+  return Promise.race([promise, timeout]).finally(() => clearTimeout(timer));
+}
+
+/**
+ * Vision APIのレスポンスからOCRテキストを取り出す
+ * @param {object} response - AnnotateImageResponse
+ * @returns {string}
+ */
+function extractOcrText(response) {
+  const fullTextAnnotation = response.fullTextAnnotation;
+  const textAnnotations = response.textAnnotations;
+  return (fullTextAnnotation && fullTextAnnotation.text) ||
+    (textAnnotations && textAnnotations[0] && textAnnotations[0].description) || '';
+}
+
+/**
+ * 全画像のOCRを1回の batchAnnotateImages でまとめて実行する
+ * @returns {Promise<Array<{ocrText: string, error: string|null}>>} 画像順の結果
+ */
+async function runBatchOcr(visionClient, images, visionTimeoutMs) {
+  const [batchResult] = await withTimeout(
+    visionClient.batchAnnotateImages({
+      requests: images.map((image) => ({
+        image: { content: image },
+        features: [{ type: 'DOCUMENT_TEXT_DETECTION' }],
+        imageContext: { languageHints: ['ja', 'en'] },
+      })),
+    }),
+    visionTimeoutMs,
+    'Vision APIタイムアウト'
+  );
+  const responses = (batchResult && batchResult.responses) || [];
+
+  return images.map((_, i) => {
+    const response = responses[i];
+    if (!response) {
+      return { ocrText: '', error: 'テキストが検出されませんでした' };
+    }
+    if (response.error && response.error.message) {
+      return { ocrText: '', error: `画像を解析できませんでした: ${response.error.message}` };
+    }
+    const ocrText = extractOcrText(response);
+    if (!ocrText.trim()) {
+      return { ocrText: '', error: 'テキストが検出されませんでした' };
+    }
+    return { ocrText, error: null };
+  });
+}
+
+/**
+ * OCRテキストから全商品の商品名と価格を1回のChatGPT呼び出しで抽出する
+ * @param {object} openaiClient - OpenAIクライアント
+ * @param {Array<{index: number, ocrText: string}>} entries - 解析対象
+ * @returns {Promise<Map<number, {name: string, price: number}>>} index → 商品情報
+ */
+async function extractProducts(openaiClient, entries, llmTimeoutMs) {
+  const userContent = entries
+    .map(({ index, ocrText }) => `### 値札 ${index}\n${ocrText}`)
+    .join('\n\n');
+
+  const chatResponse = await withTimeout(
+    openaiClient.chat.completions.create({
+      model: 'gpt-4o-mini',
+      response_format: { type: 'json_object' },
+      messages: [
+        { role: 'system', content: BATCH_SYSTEM_PROMPT },
+        {
+          role: 'user',
+          content: `以下の${entries.length}件の値札のOCRテキストから商品名と税込価格を抽出してください:\n\n${userContent}`
+        }
+      ],
+      temperature: 0.1,
+      max_tokens: 100 + 80 * entries.length,
+    }),
+    llmTimeoutMs,
+    'ChatGPTタイムアウト'
+  );
+
+  const content = chatResponse.choices[0]?.message?.content;
+  if (!content) {
+    throw new Error('ChatGPTからの応答が空でした');
+  }
+
+  let parsed;
+  try {
+    parsed = JSON.parse(content);
+  } catch (parseError) {
+    throw new Error('ChatGPTの応答を解析できませんでした');
+  }
+
+  const products = new Map();
+  for (const product of parsed.products || []) {
+    const index = parseInt(product?.index);
+    if (Number.isInteger(index)) {
+      products.set(index, product);
+    }
+  }
+  return products;
+}
+
+/**
+ * 複数の値札画像を一括解析する
+ * - OCRは1回の batchAnnotateImages でまとめて実行
+ * - 商品情報の抽出は全画像分を1回のChatGPT呼び出しで行う
+ * - 画像ごとの結果は確定した時点で onResult に通知する。抽出を待たずに先に届くのは
+ *   OCRに失敗した画像のみで、成功した画像の結果はChatGPTの応答後にまとめて届く
+ *
+ * @param {object} params
+ * @param {Buffer[]} params.images - 画像データ
+ * @param {object} params.visionClient - batchAnnotateImages を持つクライアント
+ * @param {object} params.openaiClient - chat.completions.create を持つクライアント
+ * @param {Function} [params.onResult] - 画像ごとの結果を受け取るコールバック
+ * @returns {Promise<Array<object>>} 画像順の結果
+ *   { index, success, name?, price?, ocrText?, error? }
+ */
+async function analyzeImageBatch({
+  images,
+  visionClient,
+  openaiClient,
+  onResult = () => {},
+  visionTimeoutMs = VISION_TIMEOUT_MS,
+  llmTimeoutMs = CHATGPT_TIMEOUT_MS,
+}) {
+  if (images.length > MAX_BATCH_IMAGES) {
+    throw new Error(`一度に解析できる画像は${MAX_BATCH_IMAGES}枚までです`);
+  }
+
+  const results = new Array(images.length);
+  const emit = (result) => {
+    results[result.index] = result;
+    onResult(result);
+  };
+
+  // 1. OCR（画像ごとの失敗はその場で確定させる）
+  const ocrResults = await runBatchOcr(visionClient, images, visionTimeoutMs);
+  const entries = [];
+  ocrResults.forEach(({ ocrText, error }, index) => {
+    if (error) {
+      emit({ index, success: false, error });
+    } else {
+      entries.push({ index, ocrText });
+    }
+  });
+
+  if (entries.length === 0) {
+    return results;
+  }
+
+  // 2. 商品情報の抽出（1回の呼び出し）
+  const products = await extractProducts(openaiClient, entries, llmTimeoutMs);
+  for (const { index, ocrText } of entries) {
+    const product = products.get(index);
+    const price = product ? parseInt(product.price) : NaN;
+    if (!product || !product.name || !(price > 0)) {
+      emit({ index, success: false, error: '商品名または価格を抽出できませんでした', ocrText });
+    } else {
+      emit({ index, success: true, name: product.name, price, ocrText });
+    }
+  }
+
+  return results;
+}
+
+module.exports = {
+  MAX_BATCH_IMAGES,
+  PRICE_SELECTION_RULES,
+  analyzeImageBatch,
+  withTimeout,
+};
@@ -0,0 +1,29 @@
+// 端末のOCRキャッシュ（見た目が似た値札の過去の結果）をヒントとして検証する
+// ヒントの商品名と価格が今回のOCRテキストに含まれる場合のみ採用し、ChatGPTの呼び出しを省略する
+
+/** 全角英数字を半角に揃え、空白を除く */
+function normalizeText(text) {
+  return String(text).normalize('NFKC').replace(/\s+/g, '');
+}
+
+/**
+ * ヒント（{ name, price }）が OCR テキストと一致するか
+ * - 価格: 桁区切りのカンマを除いた上で、前後に数字のない数値として含まれる
+ *   （「213.84」の整数部分は一致とみなすが、「1213」「2130」は一致としない）
+ * - 商品名: 空白を除いてそのまま含まれる
+ * 見た目が似ていて価格だけが違う値札では価格が見つからないため不一致になる
+ */
+function matchesOcrHint(hint, ocrText) {
+  if (!hint || typeof hint !== 'object' || !ocrText) return false;
+
+  const price = hint.price;
+  const name = typeof hint.name === 'string' ? normalizeText(hint.name) : '';
+  if (!Number.isInteger(price) || price <= 0 || !name) return false;
+
+  const text = normalizeText(ocrText).replace(/(\d),(?=\d{3}(?!\d))/g, '$1');
+  if (!text.includes(name)) return false;
+
+  return new RegExp(`(?<![\\d.])${price}(?!\\d)`).test(text);
+}
+
+module.exports = { matchesOcrHint };
@@ -0,0 +1,150 @@
+// Cloud Functions 用のレート制限（固定ウィンドウのカウンタ）
+// - 呼び出しごとのトランザクションは使わず、ウィンドウごとのカウンタ文書を
+//   FieldValue.increment で加算する（読み取り1回 + 書き込み1回、競合による再試行なし）
+// - インスタンス内のキャッシュで、上限到達が分かっている呼び出しはFirestoreに触れずに拒否する
+// Firestore / FieldValue は引数で受け取るため、テストではフェイクに差し替えられる
+
+const MINUTE_MS = 60 * 1000;
+const DAY_MS = 24 * 60 * MINUTE_MS;
+
+// インスタンス内キャッシュに保持するユーザー数の目安（超えたら期限切れを掃除）
+const MAX_CACHED_USERS = 1000;
+
+// 機能ごとのレート制限（1分あたり・1日あたり）
+const RATE_LIMITS = {
+  ocr: { perMinute: 50, perDay: 500 },
+  recipe: { perMinute: 10, perDay: 100 },
+  summarize: { perMinute: 30, perDay: 300 },
+  similarity: { perMinute: 60, perDay: 1000 },
+};
+
+/** レート制限超過エラー */
+class RateLimitExceededError extends Error {
+  constructor(window, limit, retryAfterMs) {
+    super(
+      window === 'minute'
+        ? `1分あたりの呼び出し回数制限（${limit}回）を超えました。しばらくしてから再試行してください。`
+        : `1日あたりの呼び出し回数制限（${limit}回）を超えました。明日再試行してください。`
+    );
+    this.name = 'RateLimitExceededError';
+    this.window = window;
+    this.limit = limit;
+    this.retryAfterMs = retryAfterMs;
+  }
+}
+
+class RateLimiter {
+  /**
+   * @param {object} params
+   * @param {Function} params.getDb - Firestoreインスタンスを返す関数
+   * @param {object} params.fieldValue - increment を持つ FieldValue
+   * @param {object} [params.limits] - 機能ごとの上限（RATE_LIMITS と同じ形式）
+   * @param {Function} [params.now] - 現在時刻（ミリ秒）を返す関数
+   */
+  constructor({ getDb, fieldValue, limits = RATE_LIMITS, now = Date.now }) {
+    this._getDb = getDb;
+    this._fieldValue = fieldValue;
+    this._limits = limits;
+    this._now = now;
+    // `${userId}/${scope}` → { minute: {window, count}, day: {window, count} }
+    this._cache = new Map();
+  }
+
+  /**
+   * 呼び出し回数を消費する。上限を超える場合は RateLimitExceededError をスロー
+   * 同時呼び出しでは読み取りから加算までの間に他の呼び出しが入り得るため、
+   * 上限をわずかに超えることがある（トランザクションを使わない代わりの許容範囲）
+   * @param {string} userId - ユーザーID
+   * @param {string} scope - 機能名（RATE_LIMITS のキー）
+   * @param {number} [cost] - 消費する回数
+   */
+  async consume(userId, scope, cost = 1) {
+    const limits = this._limits[scope];
+    if (!limits) {
+      throw new Error(`未定義のレート制限: ${scope}`);
+    }
+
+    const now = this._now();
+    const windows = {
+      minute: { window: Math.floor(now / MINUTE_MS), size: MINUTE_MS, limit: limits.perMinute },
+      day: { window: Math.floor(now / DAY_MS), size: DAY_MS, limit: limits.perDay },
+    };
+
+    // 1. インスタンス内キャッシュで拒否できる場合はFirestoreを読まない
+    const cacheKey = `${userId}/${scope}`;
+    const cached = this._cache.get(cacheKey) || {};
+    this._throwIfExceeded(windows, (name) => {
+      const entry = cached[name];
+      return entry && entry.window === windows[name].window ? entry.count : 0;
+    }, cost, now);
+
+    // 2. 現在のカウンタを読み取り、上限内なら加算する
+    const db = this._getDb();
+    const refs = {};
+    for (const [name, { window }] of Object.entries(windows)) {
+      refs[name] = db
+        .collection('rateLimits').doc(userId)
+        .collection('windows').doc(`${scope}_${name}_${window}`);
+    }
+    const [minuteSnap, daySnap] = await db.getAll(refs.minute, refs.day);
+    const counts = {
+      minute: (minuteSnap.exists && minuteSnap.data().count) || 0,
+      day: (daySnap.exists && daySnap.data().count) || 0,
+    };
+
+    this._remember(cacheKey, windows, counts);
+    this._throwIfExceeded(windows, (name) => counts[name], cost, now);
+
+    const batch = db.batch();
+    for (const [name, { window, size }] of Object.entries(windows)) {
+      batch.set(refs[name], {
+        count: this._fieldValue.increment(cost),
+        // TTLポリシーで自動削除するための期限（ウィンドウ終了の1日後）
+        expireAt: new Date((window + 1) * size + DAY_MS),
+      }, { merge: true });
+    }
+    await batch.commit();
+
+    this._remember(cacheKey, windows, {
+      minute: counts.minute + cost,
+      day: counts.day + cost,
+    });
+  }
+
+  _throwIfExceeded(windows, countOf, cost, now) {
+    for (const [name, { window, size, limit }] of Object.entries(windows)) {
+      if (countOf(name) + cost > limit) {
+        throw new RateLimitExceededError(name, limit, (window + 1) * size - now);
+      }
+    }
+  }
+
+  _remember(cacheKey, windows, counts) {
+    if (this._cache.size >= MAX_CACHED_USERS && !this._cache.has(cacheKey)) {
+      this._pruneCache(windows.day.window);
+    }
+    this._cache.set(cacheKey, {
+      minute: { window: windows.minute.window, count: counts.minute },
+      day: { window: windows.day.window, count: counts.day },
+    });
+  }
+
+  _pruneCache(currentDayWindow) {
+    for (const [key, entry] of this._cache) {
+      if (entry.day.window !== currentDayWindow) {
+        this._cache.delete(key);
+      }
+    }
+    // それでも多い場合は古い順に削除
+    for (const key of this._cache.keys()) {
+      if (this._cache.size < MAX_CACHED_USERS) break;
+      this._cache.delete(key);
+    }
+  }
+}
+
+module.exports = {
+  RATE_LIMITS,
+  RateLimiter,
+  RateLimitExceededError,
+};
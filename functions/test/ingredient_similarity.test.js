@@ -0,0 +1,70 @@
+const { describe, it } = require('node:test');
+const assert = require('node:assert/strict');
+const { checkSimilarityBatch } = require('../ingredient_similarity');
+
+/** chat.completions.create のスタブ（「X」と「X系」のような前方一致を同一とみなす） */
+function createOpenAIStub() {
+  const calls = [];
+  return {
+    calls,
+    chat: {
+      completions: {
+        async create(params) {
+          calls.push(params);
+          const lines = [...params.messages[1].content.matchAll(/(\d+)\. 「(.+)」と「(.+)」/g)];
+          const results = lines.map(([, index, name1, name2]) => ({
+            index: Number(index),
+            isSame: name1.startsWith(name2) || name2.startsWith(name1),
+          }));
+          return { choices: [{ message: { content: JSON.stringify({ results }) } }] };
+        },
+      },
+    },
+  };
+}
+
+describe('checkSimilarityBatch', () => {
+  it('全ての組み合わせを1回のChatGPT呼び出しで判定する', async () => {
+    const openai = createOpenAIStub();
+
+    const results = await checkSimilarityBatch({
+      pairs: [
+        { name1: '豚バラ', name2: '豚バラ肉' },
+        { name1: 'トマト', name2: 'ミニトマト' },
+      ],
+      openaiClient: openai,
+    });
+
+    assert.equal(openai.calls.length, 1);
+    assert.deepEqual(results, [true, false]);
+  });
+
+  it('完全一致の組み合わせはChatGPTに送らない', async () => {
+    const openai = createOpenAIStub();
+
+    const results = await checkSimilarityBatch({
+      pairs: [{ name1: '塩 ', name2: '塩' }],
+      openaiClient: openai,
+    });
+
+    assert.equal(openai.calls.length, 0);
+    assert.deepEqual(results, [true]);
+  });
+
+  it('応答に含まれない組み合わせは null とする', async () => {
+    const openai = {
+      chat: {
+        completions: {
+          create: async () => ({ choices: [{ message: { content: '{"results":[]}' } }] }),
+        },
+      },
+    };
+
+    const results = await checkSimilarityBatch({
+      pairs: [{ name1: '鶏もも肉', name2: '鶏むね肉' }],
+      openaiClient: openai,
+    });
+
+    assert.deepEqual(results, [null]);
+  });
+});
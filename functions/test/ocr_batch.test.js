@@ -0,0 +1,156 @@
+const { describe, it } = require('node:test');
+const assert = require('node:assert/strict');
+const { MAX_BATCH_IMAGES, analyzeImageBatch } = require('../ocr_batch');
+
+/**
+ * batchAnnotateImages のスタブ（画像の中身をOCRテキストとして返す）
+ * 空の画像はテキストなし、'error' はエラーレスポンスにする
+ */
+function createVisionStub() {
+  const calls = [];
+  return {
+    calls,
+    async batchAnnotateImages({ requests }) {
+      calls.push(requests);
+      return [{
+        responses: requests.map(({ image }) => {
+          const text = image.content.toString();
+          if (text === 'error') return { error: { message: 'bad image' } };
+          return text ? { fullTextAnnotation: { text } } : {};
+        }),
+      }];
+    },
+  };
+}
+
+/** chat.completions.create のスタブ */
+function createOpenAIStub(respond) {
+  const calls = [];
+  return {
+    calls,
+    chat: {
+      completions: {
+        async create(params) {
+          calls.push(params);
+          return { choices: [{ message: { content: JSON.stringify(respond(params)) } }] };
+        },
+      },
+    },
+  };
+}
+
+/** OCRテキスト「商品名:価格」を解析して返すスタブ応答 */
+function parseTags(params) {
+  const user = params.messages[1].content;
+  const products = [...user.matchAll(/### 値札 (\d+)\n(.+):(\d+)/g)]
+    .map(([, index, name, price]) => ({ index: Number(index), name, price: Number(price) }));
+  return { products };
+}
+
+describe('analyzeImageBatch', () => {
+  it('OCRとChatGPTをそれぞれ1回ずつ呼び出して全画像を解析する', async () => {
+    const vision = createVisionStub();
+    const openai = createOpenAIStub(parseTags);
+
+    const results = await analyzeImageBatch({
+      images: ['パン:198', '牛乳:258', '卵:300'].map((t) => Buffer.from(t)),
+      visionClient: vision,
+      openaiClient: openai,
+    });
+
+    assert.equal(vision.calls.length, 1);
+    assert.equal(vision.calls[0].length, 3);
+    assert.equal(openai.calls.length, 1);
+    assert.deepEqual(
+      results.map(({ index, success, name, price }) => ({ index, success, name, price })),
+      [
+        { index: 0, success: true, name: 'パン', price: 198 },
+        { index: 1, success: true, name: '牛乳', price: 258 },
+        { index: 2, success: true, name: '卵', price: 300 },
+      ]
+    );
+  });
+
+  it('OCRに失敗した画像は抽出を待たずに通知し、ChatGPTには送らない', async () => {
+    const openai = createOpenAIStub(parseTags);
+    const emitted = [];
+
+    const results = await analyzeImageBatch({
+      images: ['', 'パン:198', 'error'].map((t) => Buffer.from(t)),
+      visionClient: createVisionStub(),
+      openaiClient: openai,
+      onResult: (result) => emitted.push(result.index),
+    });
+
+    assert.deepEqual(emitted, [0, 2, 1]);
+    assert.deepEqual(results.map((r) => r.success), [false, true, false]);
+    assert.doesNotMatch(openai.calls[0].messages[1].content, /値札 0|値札 2/);
+  });
+
+  it('商品情報が抽出できなかった画像は失敗として返す', async () => {
+    const results = await analyzeImageBatch({
+      images: ['パン:198', '牛乳:0'].map((t) => Buffer.from(t)),
+      visionClient: createVisionStub(),
+      openaiClient: createOpenAIStub(parseTags),
+    });
+
+    assert.equal(results[0].success, true);
+    assert.equal(results[1].success, false);
+    assert.equal(results[1].ocrText, '牛乳:0');
+  });
+
+  it('全画像のOCRに失敗した場合はChatGPTを呼び出さない', async () => {
+    const openai = createOpenAIStub(parseTags);
+
+    const results = await analyzeImageBatch({
+      images: [Buffer.from('')],
+      visionClient: createVisionStub(),
+      openaiClient: openai,
+    });
+
+    assert.equal(openai.calls.length, 0);
+    assert.equal(results[0].success, false);
+  });
+
+  it('上限枚数の画像も1回のOCRリクエストで解析する', async () => {
+    const vision = createVisionStub();
+
+    await analyzeImageBatch({
+      images: Array.from({ length: MAX_BATCH_IMAGES }, (_, i) => Buffer.from(`商品${i}:${100 + i}`)),
+      visionClient: vision,
+      openaiClient: createOpenAIStub(parseTags),
+    });
+
+    assert.deepEqual(vision.calls.map((requests) => requests.length), [MAX_BATCH_IMAGES]);
+  });
+
+  it('上限を超える枚数はエラーになる', async () => {
+    const vision = createVisionStub();
+
+    await assert.rejects(
+      analyzeImageBatch({
+        images: Array.from({ length: MAX_BATCH_IMAGES + 1 }, () => Buffer.from('パン:198')),
+        visionClient: vision,
+        openaiClient: createOpenAIStub(parseTags),
+      }),
+      /枚まで/
+    );
+    assert.equal(vision.calls.length, 0);
+  });
+
+  it('ChatGPTがタイムアウトした場合はエラーになる', async () => {
+    const openai = {
+      chat: { completions: { create: () => new Promise(() => {}) } },
+    };
+
+    await assert.rejects(
+      analyzeImageBatch({
+        images: [Buffer.from('パン:198')],
+        visionClient: createVisionStub(),
+        openaiClient: openai,
+        llmTimeoutMs: 10,
+      }),
+      /タイムアウト/
+    );
+  });
+});
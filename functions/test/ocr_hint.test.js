@@ -0,0 +1,35 @@
+const { describe, it } = require('node:test');
+const assert = require('node:assert/strict');
+const { matchesOcrHint } = require('../ocr_hint');
+
+describe('matchesOcrHint', () => {
+  const hint = { name: 'やわらかパイ', price: 198 };
+
+  it('商品名と価格がOCRテキストに含まれる場合は一致', () => {
+    assert.equal(matchesOcrHint(hint, 'やわらか パイ\n本体183円\n税込198円'), true);
+  });
+
+  it('見た目が似ていても価格が違う値札は一致しない', () => {
+    assert.equal(matchesOcrHint(hint, 'やわらかパイ\n本体276円\n税込298円'), false);
+    assert.equal(matchesOcrHint(hint, 'やわらかパイ\n税込1198円'), false);
+    assert.equal(matchesOcrHint(hint, 'やわらかパイ\n税込1980円'), false);
+  });
+
+  it('商品名が含まれない場合は一致しない', () => {
+    assert.equal(matchesOcrHint(hint, 'カップ麺\n税込198円'), false);
+  });
+
+  it('全角数字・桁区切り・小数を含む価格を扱う', () => {
+    assert.equal(matchesOcrHint(hint, 'やわらかパイ　税込１９８円'), true);
+    assert.equal(matchesOcrHint({ name: 'お米', price: 1980 }, 'お米 税込1,980円'), true);
+    assert.equal(matchesOcrHint({ name: 'お茶', price: 213 }, 'お茶 税込213.84円'), true);
+    assert.equal(matchesOcrHint({ name: 'お茶', price: 84 }, 'お茶 税込213.84円'), false);
+  });
+
+  it('不正なヒントは一致しない', () => {
+    assert.equal(matchesOcrHint(undefined, 'やわらかパイ 198円'), false);
+    assert.equal(matchesOcrHint({ name: '', price: 198 }, 'やわらかパイ 198円'), false);
+    assert.equal(matchesOcrHint({ name: 'やわらかパイ', price: '198' }, 'やわらかパイ 198円'), false);
+    assert.equal(matchesOcrHint({ name: 'やわらかパイ', price: 0 }, 'やわらかパイ 0円'), false);
+  });
+});
@@ -0,0 +1,157 @@
+const { describe, it, beforeEach } = require('node:test');
+const assert = require('node:assert/strict');
+const { RateLimiter, RateLimitExceededError } = require('../rate_limiter');
+
+/** FieldValue.increment のフェイク */
+const fakeFieldValue = {
+  increment: (n) => ({ __increment: n }),
+};
+
+/** レート制限で使う範囲のみを実装したFirestoreのフェイク */
+class FakeFirestore {
+  constructor() {
+    this.docs = new Map();
+    this.reads = 0;
+    this.commits = 0;
+  }
+
+  collection(name) {
+    return new FakeCollection(this, name);
+  }
+
+  async getAll(...refs) {
+    this.reads++;
+    return refs.map((ref) => {
+      const data = this.docs.get(ref.path);
+      return { exists: data !== undefined, data: () => data };
+    });
+  }
+
+  batch() {
+    const writes = [];
+    return {
+      set: (ref, data) => writes.push({ ref, data }),
+      commit: async () => {
+        this.commits++;
+        for (const { ref, data } of writes) {
+          const current = { ...(this.docs.get(ref.path) || {}) };
+          for (const [key, value] of Object.entries(data)) {
+            current[key] = value && value.__increment !== undefined
+              ? (current[key] || 0) + value.__increment
+              : value;
+          }
+          this.docs.set(ref.path, current);
+        }
+      },
+    };
+  }
+}
+
+class FakeCollection {
+  constructor(db, path) {
+    this.db = db;
+    this.path = path;
+  }
+
+  doc(id) {
+    const path = `${this.path}/${id}`;
+    return { path, collection: (name) => new FakeCollection(this.db, `${path}/${name}`) };
+  }
+}
+
+describe('RateLimiter', () => {
+  let db;
+  let now;
+  let limiter;
+
+  beforeEach(() => {
+    db = new FakeFirestore();
+    now = Date.UTC(2026, 0, 1, 12, 0, 30);
+    limiter = new RateLimiter({
+      getDb: () => db,
+      fieldValue: fakeFieldValue,
+      limits: { ocr: { perMinute: 3, perDay: 5 }, recipe: { perMinute: 1, perDay: 1 } },
+      now: () => now,
+    });
+  });
+
+  it('上限まではウィンドウごとのカウンタを加算する', async () => {
+    await limiter.consume('u1', 'ocr');
+    await limiter.consume('u1', 'ocr');
+
+    const counts = [...db.docs.entries()]
+      .filter(([path]) => path.startsWith('rateLimits/u1/windows/ocr_'))
+      .map(([, data]) => data.count);
+    assert.deepEqual(counts, [2, 2]);
+    assert.equal(db.commits, 2);
+  });
+
+  it('1分あたりの上限を超えると拒否し、次の分には再び許可する', async () => {
+    for (let i = 0; i < 3; i++) {
+      await limiter.consume('u1', 'ocr');
+    }
+
+    await assert.rejects(limiter.consume('u1', 'ocr'), (error) => {
+      assert.ok(error instanceof RateLimitExceededError);
+      assert.equal(error.window, 'minute');
+      assert.equal(error.retryAfterMs, 30 * 1000);
+      return true;
+    });
+
+    now += 60 * 1000;
+    await limiter.consume('u1', 'ocr');
+  });
+
+  it('1日あたりの上限は分をまたいでも適用される', async () => {
+    for (let i = 0; i < 5; i++) {
+      now += 60 * 1000;
+      await limiter.consume('u1', 'ocr');
+    }
+
+    now += 60 * 1000;
+    await assert.rejects(limiter.consume('u1', 'ocr'), { window: 'day' });
+  });
+
+  it('上限到達が分かっている場合はFirestoreを読まずに拒否する', async () => {
+    for (let i = 0; i < 3; i++) {
+      await limiter.consume('u1', 'ocr');
+    }
+    const reads = db.reads;
+
+    await assert.rejects(limiter.consume('u1', 'ocr'), RateLimitExceededError);
+    assert.equal(db.reads, reads);
+  });
+
+  it('他のインスタンスの呼び出しもカウンタから反映される', async () => {
+    const otherInstance = new RateLimiter({
+      getDb: () => db,
+      fieldValue: fakeFieldValue,
+      limits: { ocr: { perMinute: 3, perDay: 5 } },
+      now: () => now,
+    });
+    await otherInstance.consume('u1', 'ocr', 3);
+
+    await assert.rejects(limiter.consume('u1', 'ocr'), { window: 'minute' });
+  });
+
+  it('ユーザーと機能ごとに独立して制限する', async () => {
+    await limiter.consume('u1', 'recipe');
+
+    await assert.rejects(limiter.consume('u1', 'recipe'), RateLimitExceededError);
+    await limiter.consume('u2', 'recipe');
+    await limiter.consume('u1', 'ocr');
+  });
+
+  it('拒否された呼び出しはカウントしない', async () => {
+    await limiter.consume('u1', 'ocr', 3);
+    await assert.rejects(limiter.consume('u1', 'ocr'), RateLimitExceededError);
+
+    now += 60 * 1000;
+    await limiter.consume('u1', 'ocr', 2);
+    await assert.rejects(limiter.consume('u1', 'ocr'), { window: 'day' });
+  });
+
+  it('未定義の機能名はエラーになる', async () => {
+    await assert.rejects(limiter.consume('u1', 'unknown'), /未定義のレート制限/);
+  });
+});
@@ -133,23 +133,41 @@ class MyApp extends StatefulWidget {
   State<MyApp> createState() => _MyAppState();
 }
 
-class _MyAppState extends State<MyApp> {
+class _MyAppState extends State<MyApp> with WidgetsBindingObserver {
   late final AuthProvider _authProvider;
+  late final DataProvider _dataProvider;
   late final GoRouter _router;
 
   @override
   void initState() {
     super.initState();
+    WidgetsBinding.instance.addObserver(this);
     _authProvider = AuthProvider(
       purchaseService: widget.purchaseService,
       featureControl: widget.featureControl,
     );
+    _dataProvider = DataProvider();
     _router = createAppRouter(_authProvider);
   }
 
+  @override
+  void didChangeAppLifecycleState(AppLifecycleState state) {
+    super.didChangeAppLifecycleState(state);
+
+    // バックグラウンド移行後はOSに終了される可能性があるため、
+    // デバウンス中のゲストデータを直ちに書き込む
+    if (state == AppLifecycleState.hidden ||
+        state == AppLifecycleState.paused ||
+        state == AppLifecycleState.detached) {
+      unawaited(_dataProvider.flushLocalStorage());
+    }
+  }
+
   @override
   void dispose() {
+    WidgetsBinding.instance.removeObserver(this);
     _router.dispose();
+    _dataProvider.dispose();
     _authProvider.dispose();
     super.dispose();
   }
@@ -162,7 +180,7 @@ class _MyAppState extends State<MyApp> {
         ChangeNotifierProvider.value(value: widget.purchaseService),
         ChangeNotifierProvider.value(value: widget.featureControl),
         ChangeNotifierProvider.value(value: _authProvider),
-        ChangeNotifierProvider(create: (_) => DataProvider()),
+        ChangeNotifierProvider.value(value: _dataProvider),
       ],
       child: Consumer<ThemeProvider>(
         builder: (context, themeProvider, _) {
@@ -8,12 +8,12 @@ import 'package:maikago/providers/auth_provider.dart';
 import 'package:flutter/foundation.dart';
 import 'package:maikago/providers/data_provider_state.dart';
 import 'package:maikago/providers/managers/data_cache_manager.dart';
+import 'package:maikago/providers/managers/derived_totals.dart';
 import 'package:maikago/providers/managers/realtime_sync_manager.dart';
 import 'package:maikago/providers/managers/shared_tab_manager.dart';
 import 'package:maikago/providers/repositories/item_repository.dart';
 import 'package:maikago/providers/repositories/shop_repository.dart';
 import 'package:maikago/services/debug_service.dart';
-import 'package:maikago/services/settings_persistence.dart';
 
 /// データの状態管理と同期を担う Provider（ファサード）。
 /// 各責務を専用クラスに委譲し、外部インターフェースを維持する。
@@ -139,7 +139,6 @@ class DataProvider extends ChangeNotifier {
 
     _state.isSynced = true;
     await _shopRepository.ensureDefaultShop();
-    _cacheManager.associateItemsWithShops();
     notifyListeners();
   }
 
@@ -262,10 +261,6 @@ class DataProvider extends ChangeNotifier {
 
       await _shopRepository.ensureDefaultShop();
 
-      _cacheManager.removeDuplicateShops();
-      _cacheManager.associateItemsWithShops();
-      _cacheManager.removeDuplicateItems();
-
       if (!_cacheManager.isLocalMode) {
         if (!_syncManager.isSubscriptionActive) {
           _syncManager.startRealtimeSync();
@@ -320,7 +315,7 @@ class DataProvider extends ChangeNotifier {
 
   /// ショップのアイテムを更新してUIに通知する（楽観的更新のロールバック用）
   void updateShopAt(int shopIndex, Shop updatedShop) {
-    _cacheManager.shops[shopIndex] = updatedShop;
+    _cacheManager.replaceShopInCache(updatedShop);
     notifyListeners();
   }
 
@@ -382,7 +377,7 @@ class DataProvider extends ChangeNotifier {
       }
 
       // マイグレーション成功後、ローカルストレージのゲストデータをクリア
-      unawaited(SettingsPersistence.clearGuestData());
+      unawaited(_cacheManager.clearLocalStorage());
       DebugService().logInfo('ゲストデータのFirestoreマイグレーション完了');
     } catch (e) {
       DebugService().logError('マイグレーション中にエラー: $e');
@@ -416,6 +411,9 @@ class DataProvider extends ChangeNotifier {
     notifyListeners();
   }
 
+  /// ゲストデータの未保存の変更を直ちに書き込む（アプリのバックグラウンド移行時など）
+  Future<void> flushLocalStorage() => _cacheManager.flushLocalStorage();
+
   @override
   void dispose() {
     if (_authListener != null) {
@@ -423,6 +421,7 @@ class DataProvider extends ChangeNotifier {
       _authListener = null;
     }
     _syncManager.cancelRealtimeSync();
+    unawaited(_cacheManager.flushLocalStorage());
     super.dispose();
   }
 
@@ -440,6 +439,20 @@ class DataProvider extends ChangeNotifier {
     return _sharedTabManager.getSharedTabBudget(sharedTabGroupId);
   }
 
+  // --- 集計値の購読（通知ごとに変更のあった集計値のみ更新される） ---
+
+  ShopTotals getShopTotals(String shopId) {
+    return _cacheManager.totals.shopTotals(shopId);
+  }
+
+  ValueListenable<ShopTotals> watchShopTotals(String shopId) {
+    return _cacheManager.totals.watchShop(shopId);
+  }
+
+  ValueListenable<ShopTotals> watchSharedTabTotals(String sharedTabGroupId) {
+    return _cacheManager.totals.watchSharedTabGroup(sharedTabGroupId);
+  }
+
   // --- 共有タブ管理（SharedTabManagerに委譲） ---
 
   Future<void> updateSharedTab(String shopId, List<String> selectedTabIds,
@@ -462,6 +475,8 @@ class DataProvider extends ChangeNotifier {
   @override
   void notifyListeners() {
     if (_state.isBatchUpdating) return;
+    // 集計値の購読先を全体の通知と同じタイミングで更新する
+    _cacheManager.totals.publish();
     super.notifyListeners();
   }
 }
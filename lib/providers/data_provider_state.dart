@@ -19,8 +19,19 @@ class DataProviderState {
 
   /// バッチ更新中フラグ。trueの間はnotifyListenersの呼び出しを抑止し、
   /// 複数の連続的なデータ変更が完了した後に一度だけUI更新を行う。
-  /// ItemRepository.updateItem/RealtimeSyncManager._handleSnapshotでセット/クリアされる。
-  bool isBatchUpdating = false;
+  /// ItemRepository.deleteItems/RealtimeSyncManager.runBatchUpdateでセット/クリアされる。
+  /// クリア時は [onBatchUpdateEnd] が呼ばれる（通知はクリアした側が行う）。
+  bool get isBatchUpdating => _isBatchUpdating;
+  set isBatchUpdating(bool value) {
+    if (_isBatchUpdating == value) return;
+    _isBatchUpdating = value;
+    if (!value) onBatchUpdateEnd?.call();
+  }
+
+  bool _isBatchUpdating = false;
+
+  /// バッチ更新の終了時に呼ばれる（RealtimeSyncManagerが保留した差分の適用に使う）
+  VoidCallback? onBatchUpdateEnd;
 
   bool shouldUseAnonymousSession = false;
 
@@ -1,44 +1,73 @@
 // データの保持、キャッシュTTL管理、ローカルモード管理、データロード
 import 'dart:async';
-import 'dart:convert';
 import 'package:maikago/services/data_service.dart';
 import 'package:maikago/models/list.dart';
 import 'package:maikago/models/shop.dart';
 import 'package:maikago/providers/data_provider_state.dart';
+import 'package:maikago/providers/managers/derived_totals.dart';
+import 'package:maikago/providers/managers/guest_persistence_queue.dart';
+import 'package:maikago/providers/managers/indexed_data_store.dart';
 import 'package:maikago/services/debug_service.dart';
-import 'package:maikago/services/settings_persistence.dart';
 
 /// データのインメモリキャッシュとロードを管理するクラス。
-/// - items/shopsの保持
+/// - items/shopsの保持（[IndexedDataStore] によるID索引付き）
 /// - キャッシュTTL管理（5分）
 /// - データロード（Firebase/ローカル）
-/// - アイテム⇔ショップの関連付け
-/// - 重複除去
+/// - ローカルモードの永続化（[GuestPersistenceQueue] で書き込みを集約）
+/// - ショップ・共有タブグループ単位の合計（[DerivedTotalsEngine]）
+/// - アイテム⇔ショップの関連付け・ID単位の重複除去（ストアの索引で常に維持）
 class DataCacheManager {
   DataCacheManager({
     required DataService dataService,
     required DataProviderState state,
+    Duration persistDebounce = const Duration(milliseconds: 300),
   })  : _dataService = dataService,
-        _state = state;
+        _state = state {
+    _persistence = GuestPersistenceQueue(
+      readItems: () => _store.items,
+      readItem: _store.itemById,
+      readShops: () => _store.shops,
+      debounce: persistDebounce,
+    );
+  }
 
   final DataService _dataService;
   final DataProviderState _state;
 
-  List<ListItem> _items = [];
-  List<Shop> _shops = [];
+  final IndexedDataStore _store = IndexedDataStore();
+  late final GuestPersistenceQueue _persistence;
   bool _isDataLoaded = false;
   DateTime? _lastSyncTime;
   bool _isLocalMode = false;
 
   // --- Getter ---
-  List<ListItem> get items => _items;
-  List<Shop> get shops => _shops;
+  /// 全アイテム（変更不可）。更新は各キャッシュ操作メソッド経由で行う
+  List<ListItem> get items => _store.items;
+
+  /// 全ショップ（変更不可）。各ショップの items はアイテム索引から導出される
+  List<Shop> get shops => _store.shops;
   bool get isDataLoaded => _isDataLoaded;
   bool get isLocalMode => _isLocalMode;
   DateTime? get lastSyncTime => _lastSyncTime;
 
+  // --- ID参照（O(1)） ---
+  int get itemCount => _store.itemCount;
+  int get shopCount => _store.shopCount;
+  ListItem? itemById(String itemId) => _store.itemById(itemId);
+  bool containsItem(String itemId) => _store.containsItem(itemId);
+  Shop? shopById(String shopId) => _store.shopById(shopId);
+  bool containsShop(String shopId) => _store.containsShop(shopId);
+  int indexOfShop(String shopId) => _store.indexOfShop(shopId);
+
+  // --- 合計（キャッシュ操作に合わせて差分更新） ---
+  DerivedTotalsEngine get totals => _store.totals;
+
   // --- ローカルモード ---
   void setLocalMode(bool isLocal) {
+    // ローカルモードを抜ける前に未保存の変更を書き出す
+    if (_isLocalMode && !isLocal) {
+      unawaited(_persistence.flush());
+    }
     _isLocalMode = isLocal;
   }
 
@@ -48,7 +77,7 @@ class DataCacheManager {
   /// [forceReload] が true の場合はキャッシュを無視して再読み込み
   Future<void> loadData({bool forceReload = false}) async {
     // 既にデータが読み込まれている場合はスキップ（キャッシュ最適化）
-    if (!forceReload && _isDataLoaded && _items.isNotEmpty) {
+    if (!forceReload && _isDataLoaded && _store.itemCount > 0) {
       if (_lastSyncTime != null &&
           DateTime.now().difference(_lastSyncTime!).inMinutes < 5) {
         return;
@@ -56,8 +85,7 @@ class DataCacheManager {
     }
 
     // 既存データをクリアしてから読み込み
-    _items.clear();
-    _shops.clear();
+    _store.clear();
 
     if (_isLocalMode) {
       // ローカルモード: SharedPreferencesから復元
@@ -79,14 +107,14 @@ class DataCacheManager {
     _isDataLoaded = true;
     _lastSyncTime = DateTime.now();
     DebugService().logInfo(
-        'データ読み込み完了: アイテム${_items.length}件、ショップ${_shops.length}件');
+        'データ読み込み完了: アイテム${_store.itemCount}件、ショップ${_store.shopCount}件');
   }
 
   Future<void> _loadItems() async {
     try {
-      _items = await _dataService.getItemsOnce(
+      _store.replaceItems(await _dataService.getItemsOnce(
         isAnonymous: _state.shouldUseAnonymousSession,
-      );
+      ));
     } catch (e) {
       DebugService().logError('リスト読み込みエラー: $e');
       rethrow;
@@ -95,9 +123,9 @@ class DataCacheManager {
 
   Future<void> _loadShops() async {
     try {
-      _shops = await _dataService.getShopsOnce(
+      _store.replaceShops(await _dataService.getShopsOnce(
         isAnonymous: _state.shouldUseAnonymousSession,
-      );
+      ));
     } catch (e) {
       DebugService().logError('ショップ読み込みエラー: $e');
       rethrow;
@@ -106,170 +134,185 @@ class DataCacheManager {
 
   // --- ローカルストレージ（ゲストモード用） ---
 
-  /// SharedPreferencesからゲストデータを復元
+  /// SharedPreferencesからゲストデータを復元（デコードはバックグラウンドisolate）
   Future<void> _loadFromLocalStorage() async {
     try {
-      final itemsJson = await SettingsPersistence.loadGuestItems();
-      if (itemsJson != null) {
-        final List<dynamic> itemsList = json.decode(itemsJson);
-        _items = itemsList
-            .map((e) => ListItem.fromMap(Map<String, dynamic>.from(e)))
-            .toList();
-      }
-
-      final shopsJson = await SettingsPersistence.loadGuestShops();
-      if (shopsJson != null) {
-        final List<dynamic> shopsList = json.decode(shopsJson);
-        _shops = shopsList
-            .map((e) => Shop.fromMap(Map<String, dynamic>.from(e)))
-            .toList();
-      }
+      final (items, shops) = await _persistence.load();
+      _store.replaceItems(items);
+      _store.replaceShops(shops);
 
       DebugService().logInfo(
-          'ローカルストレージから復元: アイテム${_items.length}件、ショップ${_shops.length}件');
+          'ローカルストレージから復元: アイテム${_store.itemCount}件、ショップ${_store.shopCount}件');
     } catch (e) {
       DebugService().logError('ローカルストレージ読み込みエラー: $e');
     }
   }
 
-  /// 現在のキャッシュをSharedPreferencesに永続化（ローカルモード時のみ）
-  void _persistToLocalStorage() {
+  /// 変更のあったアイテムの永続化を予約（ローカルモード時のみ）
+  void _persistItems(Iterable<String> itemIds) {
     if (!_isLocalMode) return;
+    _persistence.markItemsChanged(itemIds);
+  }
 
-    try {
-      final itemsJson = json.encode(_items.map((e) => e.toMap()).toList());
-      unawaited(SettingsPersistence.saveGuestItems(itemsJson));
-
-      final shopsJson = json.encode(_shops.map((e) => e.toMap()).toList());
-      unawaited(SettingsPersistence.saveGuestShops(shopsJson));
-    } catch (e) {
-      DebugService().logError('ローカルストレージ保存エラー: $e');
-    }
+  /// ショップの永続化を予約（ローカルモード時のみ）
+  void _persistShops() {
+    if (!_isLocalMode) return;
+    _persistence.markShopsChanged();
   }
 
+  /// 予約済みの永続化を直ちに書き込む
+  Future<void> flushLocalStorage() => _persistence.flush();
+
+  /// 予約済みの永続化を破棄し、保存済みのゲストデータを削除する
+  Future<void> clearLocalStorage() => _persistence.clear();
+
   // --- キャッシュ操作（Item） ---
 
+  /// アイテムを先頭に追加
   void addItemToCache(ListItem item) {
-    _items.insert(0, item);
-    _persistToLocalStorage();
+    _store.prependItem(item);
+    _persistItems([item.id]);
   }
 
+  /// 既存アイテムを置換（存在しない場合は何もしない）
   void updateItemInCache(ListItem item) {
-    final index = _items.indexWhere((i) => i.id == item.id);
-    if (index != -1) {
-      _items[index] = item;
-      _persistToLocalStorage();
+    if (_store.putItem(item)) {
+      _persistItems([item.id]);
     }
   }
 
-  void removeItemFromCache(String itemId) {
-    _items.removeWhere((item) => item.id == itemId);
-    _persistToLocalStorage();
+  /// 複数の既存アイテムを置換（存在しないIDは無視）
+  void updateItemsInCache(Iterable<ListItem> items) {
+    final changedIds = [
+      for (final item in items)
+        if (_store.putItem(item)) item.id,
+    ];
+    if (changedIds.isNotEmpty) _persistItems(changedIds);
   }
 
-  /// リアルタイム同期用：アイテムリストを一括置換
-  void updateItems(List<ListItem> items) {
-    _items = items;
-  }
-
-  // --- キャッシュ操作（Shop） ---
-
-  void addShopToCache(Shop shop) {
-    _shops.add(shop);
-    _persistToLocalStorage();
+  void removeItemFromCache(String itemId) {
+    if (_store.removeItem(itemId) != null) {
+      _persistItems([itemId]);
+    }
   }
 
-  void updateShopInCache(Shop shop) {
-    final index = _shops.indexWhere((s) => s.id == shop.id);
-    if (index != -1) {
-      _shops[index] = shop;
-      _persistToLocalStorage();
+  /// 複数アイテムを削除し、実際に削除されたアイテムを返す
+  List<ListItem> removeItemsFromCache(Iterable<String> itemIds) {
+    final removed = <ListItem>[];
+    for (final itemId in itemIds) {
+      final item = _store.removeItem(itemId);
+      if (item != null) removed.add(item);
     }
+    if (removed.isNotEmpty) _persistItems(removed.map((item) => item.id));
+    return removed;
   }
 
-  void removeShopFromCache(String shopId) {
-    _shops.removeWhere((shop) => shop.id == shopId);
-    _persistToLocalStorage();
+  /// 削除を取り消したアイテムを末尾に復元（ロールバック用）
+  void restoreItemsToCache(Iterable<ListItem> items) {
+    for (final item in items) {
+      _store.appendItem(item);
+    }
+    _persistItems(items.map((item) => item.id));
   }
 
-  /// リアルタイム同期用：ショップリストを一括置換
-  void updateShops(List<Shop> shops) {
-    _shops = shops;
+  /// リアルタイム同期用：アイテムリストを一括置換
+  void updateItems(List<ListItem> items) {
+    _store.replaceItems(items);
   }
 
-  // --- 関連付け・重複除去 ---
-
-  /// アイテムをショップに関連付ける（重複除去とIDインデックス化）
-  /// [skipIfBatchUpdating] が true で呼び出し元がバッチ更新中の場合はスキップ
-  void associateItemsWithShops({bool skipIfBatchUpdating = false}) {
-    // ショップIDでインデックスを作成（高速化のため）
-    final shopMap = <String, int>{};
-    for (int i = 0; i < _shops.length; i++) {
-      shopMap[_shops[i].id] = i;
-    }
-
-    // ショップごとのアイテムリストを構築
-    final shopItems = <String, List<ListItem>>{};
-    for (final shop in _shops) {
-      shopItems[shop.id] = [];
-    }
+  /// リアルタイム同期用：差分（docChanges）をキャッシュへ適用する。
+  /// 全件の再構築は行わず、変更のあったアイテムと影響を受けたショップのみ更新する。
+  /// [shouldKeepLocal] が true を返すIDは既存のローカル版を優先（楽観的更新のバウンス抑止）。
+  /// キャッシュに変更があった場合は true を返す。
+  bool applyItemChanges(
+    List<DataChange<ListItem>> changes, {
+    bool Function(String itemId)? shouldKeepLocal,
+  }) {
+    var changed = false;
+    final addedItems = <String, ListItem>{};
+
+    for (final change in changes) {
+      if (change.type == DataChangeType.removed) {
+        addedItems.remove(change.id);
+        if (_store.removeItem(change.id) != null) changed = true;
+        continue;
+      }
 
-    // アイテムを対応するショップに振り分け（重複チェック付き）
-    final processedItemIds = <String>{};
-    final uniqueItems = <ListItem>[];
+      final remote = change.data;
+      if (remote == null) continue;
 
-    for (var item in _items) {
-      if (!processedItemIds.contains(item.id)) {
-        processedItemIds.add(item.id);
-        uniqueItems.add(item);
-        shopItems[item.shopId]?.add(item);
+      if (_store.containsItem(change.id)) {
+        if (shouldKeepLocal?.call(change.id) ?? false) continue;
+        _store.putItem(remote);
+        changed = true;
+      } else {
+        addedItems[change.id] = remote;
       }
     }
 
-    // ショップをitems付きで再構築
-    for (int i = 0; i < _shops.length; i++) {
-      _shops[i] = _shops[i].copyWith(items: shopItems[_shops[i].id] ?? []);
+    // 新着は先頭へ（addItemToCacheと同じ並び、差分内の順序は維持）
+    for (final item in addedItems.values.toList().reversed) {
+      _store.prependItem(item);
+      changed = true;
     }
 
-    _items = uniqueItems;
+    return changed;
   }
 
-  /// 重複ショップを除去（IDベース）
-  void removeDuplicateShops() {
-    final Map<String, Shop> uniqueShopsMap = {};
-    final List<Shop> uniqueShops = [];
+  // --- キャッシュ操作（Shop） ---
 
-    for (final shop in _shops) {
-      if (!uniqueShopsMap.containsKey(shop.id)) {
-        uniqueShopsMap[shop.id] = shop;
-        uniqueShops.add(shop);
-      }
+  /// ショップを末尾に追加。Shopが持つ items も未登録分はキャッシュに取り込む
+  void addShopToCache(Shop shop) {
+    if (!_store.addShop(shop)) return;
+
+    final adoptedIds = <String>[];
+    for (final item in shop.items) {
+      if (_store.containsItem(item.id)) continue;
+      _store.appendItem(item);
+      adoptedIds.add(item.id);
     }
+    _persistShops();
+    if (adoptedIds.isNotEmpty) _persistItems(adoptedIds);
+  }
 
-    _shops = uniqueShops;
+  /// 既存ショップのメタ情報を置換（items はアイテム索引から導出されるため無視）
+  void updateShopInCache(Shop shop) {
+    if (_store.putShop(shop)) {
+      _persistShops();
+    }
   }
 
-  /// 重複アイテムを除去
-  void removeDuplicateItems() {
-    final Map<String, ListItem> uniqueItemsMap = {};
-    final List<ListItem> uniqueItems = [];
+  /// 既存ショップを置換し、所属アイテムも [shop] の items で置き換える
+  void replaceShopInCache(Shop shop) {
+    if (_store.putShop(shop)) {
+      final affectedIds = {
+        for (final item in _store.itemsOfShop(shop.id)) item.id,
+        for (final item in shop.items) item.id,
+      };
+      _store.replaceShopItems(shop.id, shop.items);
+      _persistShops();
+      _persistItems(affectedIds);
+    }
+  }
 
-    for (final item in _items) {
-      if (!uniqueItemsMap.containsKey(item.id)) {
-        uniqueItemsMap[item.id] = item;
-        uniqueItems.add(item);
-      }
+  void removeShopFromCache(String shopId) {
+    if (_store.removeShop(shopId) != null) {
+      _persistShops();
     }
+  }
 
-    _items = uniqueItems;
+  /// リアルタイム同期用：ショップリストを一括置換
+  void updateShops(List<Shop> shops) {
+    _store.replaceShops(shops);
   }
 
   // --- データクリア ---
 
   /// データとフラグをすべてクリア
   void clearData() {
-    _items.clear();
-    _shops.clear();
+    // 破棄前に未保存の変更を書き出す（保存内容はこの時点で確定する）
+    unawaited(_persistence.flush());
+    _store.clear();
     _isDataLoaded = false;
     _lastSyncTime = null;
   }
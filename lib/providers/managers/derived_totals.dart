@@ -0,0 +1,300 @@
+// ショップ・共有タブグループ単位の合計（チェック済み/未チェック/件数/残り予算）を差分で保持
+import 'package:flutter/foundation.dart';
+import 'package:maikago/models/list.dart';
+import 'package:maikago/models/shop.dart';
+
+/// アイテム1件の金額（価格×個数×割引率の端数は四捨五入）
+int itemLineTotal(ListItem item) =>
+    (item.price * item.quantity * (1 - item.discount)).round();
+
+/// アイテム1件のタブ表示用の金額（割引後の単価を四捨五入してから個数を掛ける）
+int itemUnitRoundedTotal(ListItem item) =>
+    (item.price * (1 - item.discount)).round() * item.quantity;
+
+/// ショップまたは共有タブグループの集計値
+class ShopTotals {
+  const ShopTotals({
+    this.checkedTotal = 0,
+    this.checkedUnitRoundedTotal = 0,
+    this.uncheckedTotal = 0,
+    this.checkedCount = 0,
+    this.itemCount = 0,
+    this.budget,
+  });
+
+  static const ShopTotals empty = ShopTotals();
+
+  /// チェック済みアイテムの合計金額（共有タブグループの「合計」）
+  final int checkedTotal;
+
+  /// チェック済みアイテムの合計金額（[itemUnitRoundedTotal] の合計）
+  /// 個別モードの「合計」と共有モードの現在のタブの金額に使う
+  final int checkedUnitRoundedTotal;
+
+  /// 未チェックアイテムの合計金額
+  final int uncheckedTotal;
+
+  final int checkedCount;
+  final int itemCount;
+
+  /// 予算（共有タブグループの場合はグループ内で最初に設定された予算）
+  final int? budget;
+
+  int get uncheckedCount => itemCount - checkedCount;
+
+  /// 残り予算（予算未設定の場合は null）
+  int? get remainingBudget => budget == null ? null : budget! - checkedTotal;
+
+  bool get isOverBudget => budget != null && checkedTotal > budget!;
+
+  @override
+  bool operator ==(Object other) =>
+      identical(this, other) ||
+      other is ShopTotals &&
+          checkedTotal == other.checkedTotal &&
+          checkedUnitRoundedTotal == other.checkedUnitRoundedTotal &&
+          uncheckedTotal == other.uncheckedTotal &&
+          checkedCount == other.checkedCount &&
+          itemCount == other.itemCount &&
+          budget == other.budget;
+
+  @override
+  int get hashCode => Object.hash(checkedTotal, checkedUnitRoundedTotal,
+      uncheckedTotal, checkedCount, itemCount, budget);
+}
+
+/// ショップごとの累計（アイテムの増減を差分で反映する）
+class _RunningTotals {
+  int checkedTotal = 0;
+  int checkedUnitRoundedTotal = 0;
+  int uncheckedTotal = 0;
+  int checkedCount = 0;
+  int itemCount = 0;
+
+  bool get isEmpty => itemCount == 0;
+
+  void apply(ListItem item, int sign) {
+    final lineTotal = itemLineTotal(item);
+    if (item.isChecked) {
+      checkedTotal += sign * lineTotal;
+      checkedUnitRoundedTotal += sign * itemUnitRoundedTotal(item);
+      checkedCount += sign;
+    } else {
+      uncheckedTotal += sign * lineTotal;
+    }
+    itemCount += sign;
+  }
+}
+
+/// 集計値の購読先。購読者がいなくなった時点で [DerivedTotalsEngine] から外し、
+/// 再び購読された場合は最新の値で登録し直す（参照カウント）
+class _TotalsNotifier extends ValueNotifier<ShopTotals> {
+  _TotalsNotifier(this._notifiers, this._key, this._current)
+      : super(_current());
+
+  final Map<String, _TotalsNotifier> _notifiers;
+  final String _key;
+  final ShopTotals Function() _current;
+
+  @override
+  void addListener(VoidCallback listener) {
+    if (!hasListeners && !_notifiers.containsKey(_key)) {
+      _notifiers[_key] = this;
+      value = _current();
+    }
+    super.addListener(listener);
+  }
+
+  @override
+  void removeListener(VoidCallback listener) {
+    super.removeListener(listener);
+    if (!hasListeners && identical(_notifiers[_key], this)) {
+      _notifiers.remove(_key);
+    }
+  }
+}
+
+/// [IndexedDataStore] の変更を受けて、ショップ・共有タブグループ単位の合計を保持するクラス。
+/// - ショップの累計はアイテムの追加・更新・削除ごとに差分（O(1)）で更新する
+/// - 集計値（[ShopTotals]）は参照時に生成してメモ化し、影響のあったキーのみ破棄する
+/// - 共有タブグループの合計は所属ショップの累計から導出する
+/// - [watchShop]/[watchSharedTabGroup] で集計値ごとに購読でき、[publish] 時に
+///   値が変わった購読先のみ通知される。購読先は購読者がいなくなると破棄する
+///
+/// ショップの並び順は [IndexedDataStore] と同じ（追加順、置換時は位置を保持）で、
+/// グループの予算は並び順で最初に予算が設定されたショップのものを使う。
+class DerivedTotalsEngine {
+  // shopId → 累計（ショップの有無に関わらず shopId で集計）
+  final Map<String, _RunningTotals> _runningByShop = {};
+  // ショップのメタ情報（予算・共有タブグループ）
+  final Map<String, Shop> _shops = {};
+
+  final Map<String, ShopTotals> _shopTotals = {};
+  final Map<String, ShopTotals> _groupTotals = {};
+
+  final Map<String, _TotalsNotifier> _shopNotifiers = {};
+  final Map<String, _TotalsNotifier> _groupNotifiers = {};
+  final Set<String> _dirtyShops = {};
+  final Set<String> _dirtyGroups = {};
+
+  // --- 参照 ---
+
+  /// ショップの集計値
+  ShopTotals shopTotals(String shopId) =>
+      _shopTotals[shopId] ??= _buildShopTotals(shopId);
+
+  /// 共有タブグループの集計値（所属ショップがない場合は [ShopTotals.empty]）
+  ShopTotals sharedTabGroupTotals(String sharedTabGroupId) =>
+      _groupTotals[sharedTabGroupId] ??= _buildGroupTotals(sharedTabGroupId);
+
+  /// ショップの集計値を購読する
+  ValueListenable<ShopTotals> watchShop(String shopId) =>
+      _shopNotifiers[shopId] ??=
+          _TotalsNotifier(_shopNotifiers, shopId, () => shopTotals(shopId));
+
+  /// 共有タブグループの集計値を購読する
+  ValueListenable<ShopTotals> watchSharedTabGroup(String sharedTabGroupId) =>
+      _groupNotifiers[sharedTabGroupId] ??= _TotalsNotifier(_groupNotifiers,
+          sharedTabGroupId, () => sharedTabGroupTotals(sharedTabGroupId));
+
+  /// 前回の通知以降に変更のあった集計値を購読先へ反映する
+  /// （値が変わらなかった購読先には通知しない）
+  void publish() {
+    for (final shopId in _dirtyShops) {
+      _shopNotifiers[shopId]?.value = shopTotals(shopId);
+    }
+    for (final groupId in _dirtyGroups) {
+      _groupNotifiers[groupId]?.value = sharedTabGroupTotals(groupId);
+    }
+    _dirtyShops.clear();
+    _dirtyGroups.clear();
+  }
+
+  // --- アイテムの変更 ---
+
+  void addItem(ListItem item) {
+    (_runningByShop[item.shopId] ??= _RunningTotals()).apply(item, 1);
+    _invalidateShop(item.shopId);
+  }
+
+  void removeItem(ListItem item) {
+    final running = _runningByShop[item.shopId];
+    if (running == null) return;
+    running.apply(item, -1);
+    if (running.isEmpty) _runningByShop.remove(item.shopId);
+    _invalidateShop(item.shopId);
+  }
+
+  void replaceItem(ListItem previous, ListItem item) {
+    removeItem(previous);
+    addItem(item);
+  }
+
+  /// 全アイテムから累計を作り直す（一括ロード・同期用）
+  void resetItems(Iterable<ListItem> items) {
+    _runningByShop.clear();
+    for (final item in items) {
+      (_runningByShop[item.shopId] ??= _RunningTotals()).apply(item, 1);
+    }
+    _invalidateAll();
+  }
+
+  // --- ショップの変更 ---
+
+  /// ショップのメタ情報を追加・置換（既存IDは位置を保持）
+  void putShop(Shop shop) {
+    final previous = _shops[shop.id];
+    _shops[shop.id] = shop;
+    if (previous != null &&
+        previous.budget == shop.budget &&
+        previous.sharedTabGroupId == shop.sharedTabGroupId) {
+      return;
+    }
+    if (previous?.sharedTabGroupId != null) {
+      _invalidateGroup(previous!.sharedTabGroupId!);
+    }
+    _invalidateShop(shop.id);
+  }
+
+  void removeShop(String shopId) {
+    final removed = _shops.remove(shopId);
+    if (removed == null) return;
+    if (removed.sharedTabGroupId != null) {
+      _invalidateGroup(removed.sharedTabGroupId!);
+    }
+    _invalidateShop(shopId);
+  }
+
+  /// 全ショップを置換（同一IDは最初に出現したものを保持）
+  void resetShops(Iterable<Shop> shops) {
+    _shops.clear();
+    for (final shop in shops) {
+      _shops.putIfAbsent(shop.id, () => shop);
+    }
+    _invalidateAll();
+  }
+
+  // --- 内部処理 ---
+
+  ShopTotals _buildShopTotals(String shopId) {
+    final running = _runningByShop[shopId] ?? _RunningTotals();
+    return ShopTotals(
+      checkedTotal: running.checkedTotal,
+      checkedUnitRoundedTotal: running.checkedUnitRoundedTotal,
+      uncheckedTotal: running.uncheckedTotal,
+      checkedCount: running.checkedCount,
+      itemCount: running.itemCount,
+      budget: _shops[shopId]?.budget,
+    );
+  }
+
+  ShopTotals _buildGroupTotals(String sharedTabGroupId) {
+    var checkedTotal = 0;
+    var checkedUnitRoundedTotal = 0;
+    var uncheckedTotal = 0;
+    var checkedCount = 0;
+    var itemCount = 0;
+    int? budget;
+
+    for (final shop in _shops.values) {
+      if (shop.sharedTabGroupId != sharedTabGroupId) continue;
+      final totals = shopTotals(shop.id);
+      checkedTotal += totals.checkedTotal;
+      checkedUnitRoundedTotal += totals.checkedUnitRoundedTotal;
+      uncheckedTotal += totals.uncheckedTotal;
+      checkedCount += totals.checkedCount;
+      itemCount += totals.itemCount;
+      budget ??= shop.budget;
+    }
+
+    return ShopTotals(
+      checkedTotal: checkedTotal,
+      checkedUnitRoundedTotal: checkedUnitRoundedTotal,
+      uncheckedTotal: uncheckedTotal,
+      checkedCount: checkedCount,
+      itemCount: itemCount,
+      budget: budget,
+    );
+  }
+
+  void _invalidateShop(String shopId) {
+    _shopTotals.remove(shopId);
+    if (_shopNotifiers.containsKey(shopId)) _dirtyShops.add(shopId);
+    final sharedTabGroupId = _shops[shopId]?.sharedTabGroupId;
+    if (sharedTabGroupId != null) _invalidateGroup(sharedTabGroupId);
+  }
+
+  void _invalidateGroup(String sharedTabGroupId) {
+    _groupTotals.remove(sharedTabGroupId);
+    if (_groupNotifiers.containsKey(sharedTabGroupId)) {
+      _dirtyGroups.add(sharedTabGroupId);
+    }
+  }
+
+  void _invalidateAll() {
+    _shopTotals.clear();
+    _groupTotals.clear();
+    _dirtyShops.addAll(_shopNotifiers.keys);
+    _dirtyGroups.addAll(_groupNotifiers.keys);
+  }
+}
@@ -0,0 +1,255 @@
+// ゲストモード（ローカルモード）データの書き込み集約と永続化
+import 'dart:async';
+import 'dart:convert';
+import 'package:flutter/foundation.dart';
+import 'package:maikago/models/list.dart';
+import 'package:maikago/models/shop.dart';
+import 'package:maikago/services/debug_service.dart';
+import 'package:maikago/services/settings_persistence.dart';
+
+/// アイテムを分割保存するシャード数
+const int guestItemShardCount = 16;
+
+/// アイテムIDから保存先シャードを決める（起動をまたいで安定したFNV-1aハッシュ）
+int guestItemShardOf(String itemId) {
+  var hash = 0x811c9dc5;
+  for (final unit in itemId.codeUnits) {
+    hash = ((hash ^ unit) * 0x01000193) & 0xffffffff;
+  }
+  return hash % guestItemShardCount;
+}
+
+/// ゲストモードのデータ保存を集約するキュー。
+/// - キャッシュ変更ごとには書き込まず、[debounce] の間の変更を1回の保存にまとめる
+/// - アイテムはIDごとにシャードへ分割し、変更のあったシャードのみ再保存する
+/// - JSONのエンコード/デコードはバックグラウンドisolate（[compute]）で行う
+///
+/// 保存対象のデータは書き込み時に [DataCacheManager] から読み出すため、
+/// キューが保持するのは変更のあったアイテムIDとシャードの所属のみ。
+/// 書き込みに失敗した場合は変更を未保存に戻し、[debounce] 後に再試行する。
+class GuestPersistenceQueue {
+  GuestPersistenceQueue({
+    required Iterable<ListItem> Function() readItems,
+    required ListItem? Function(String itemId) readItem,
+    required List<Shop> Function() readShops,
+    Future<void> Function(Map<int, String> shardsJson, int shardCount)?
+        saveItemShards,
+    Future<void> Function(String shopsJson)? saveShops,
+    this.debounce = const Duration(milliseconds: 300),
+  })  : _readItems = readItems,
+        _readItem = readItem,
+        _readShops = readShops,
+        _saveItemShards =
+            saveItemShards ?? SettingsPersistence.saveGuestItemShards,
+        _saveShops = saveShops ?? SettingsPersistence.saveGuestShops;
+
+  final Iterable<ListItem> Function() _readItems;
+  final ListItem? Function(String itemId) _readItem;
+  final List<Shop> Function() _readShops;
+  final Future<void> Function(Map<int, String> shardsJson, int shardCount)
+      _saveItemShards;
+  final Future<void> Function(String shopsJson) _saveShops;
+  final Duration debounce;
+
+  // 各シャードに保存済み（または保存予定）のアイテムID
+  final List<Set<String>> _shardMembers =
+      List.generate(guestItemShardCount, (_) => <String>{});
+  final Set<int> _dirtyShards = {};
+  bool _shopsDirty = false;
+  bool _rewriteAll = false;
+
+  Timer? _timer;
+  Future<void> _lastWrite = Future.value();
+
+  /// 未保存の変更があるかどうか
+  bool get hasPendingChanges =>
+      _rewriteAll || _shopsDirty || _dirtyShards.isNotEmpty;
+
+  // --- 変更の登録 ---
+
+  /// アイテムの追加・更新・削除を登録
+  void markItemsChanged(Iterable<String> itemIds) {
+    for (final itemId in itemIds) {
+      final shard = guestItemShardOf(itemId);
+      _shardMembers[shard].add(itemId);
+      _dirtyShards.add(shard);
+    }
+    _schedule();
+  }
+
+  /// ショップの追加・更新・削除を登録
+  void markShopsChanged() {
+    _shopsDirty = true;
+    _schedule();
+  }
+
+  /// 全データの再保存を登録（旧形式からの移行時など）
+  void markAllChanged() {
+    _rewriteAll = true;
+    _shopsDirty = true;
+    _schedule();
+  }
+
+  /// 未保存の変更を破棄（書き込み中の保存は中断しない）
+  void cancel() {
+    _timer?.cancel();
+    _timer = null;
+    _dirtyShards.clear();
+    _shopsDirty = false;
+    _rewriteAll = false;
+  }
+
+  // --- 保存 ---
+
+  /// 未保存の変更を直ちに書き込む（書き込み中の保存があれば完了後に続けて書き込む）
+  /// 保存内容は呼び出し時点のキャッシュから取り出すため、直後にキャッシュを
+  /// 破棄しても変更は失われない。
+  Future<void> flush() {
+    _timer?.cancel();
+    _timer = null;
+    if (!hasPendingChanges) return _lastWrite;
+
+    final (itemShards, shops) = _takeSnapshot();
+    return _lastWrite = _lastWrite.then((_) => _save(itemShards, shops));
+  }
+
+  /// 保存済みのゲストデータを削除（書き込み中の保存の完了を待ってから削除）
+  Future<void> clear() {
+    cancel();
+    for (final members in _shardMembers) {
+      members.clear();
+    }
+    return _lastWrite =
+        _lastWrite.then((_) => SettingsPersistence.clearGuestData());
+  }
+
+  void _schedule() {
+    _timer?.cancel();
+    _timer = Timer(debounce, () {
+      _timer = null;
+      unawaited(flush());
+    });
+  }
+
+  /// 変更のあったシャードとショップの内容を現在のキャッシュから取り出す
+  (Map<int, List<ListItem>>, List<Shop>?) _takeSnapshot() {
+    if (_rewriteAll) {
+      for (final members in _shardMembers) {
+        members.clear();
+      }
+      for (final item in _readItems()) {
+        _shardMembers[guestItemShardOf(item.id)].add(item.id);
+      }
+      _dirtyShards.addAll(List.generate(guestItemShardCount, (i) => i));
+    }
+
+    final itemShards = <int, List<ListItem>>{};
+    for (final shard in _dirtyShards) {
+      final shardItems = <ListItem>[];
+      _shardMembers[shard].removeWhere((itemId) {
+        final item = _readItem(itemId);
+        if (item == null) return true;
+        shardItems.add(item);
+        return false;
+      });
+      itemShards[shard] = shardItems;
+    }
+    final shops = _shopsDirty
+        ? [for (final shop in _readShops()) shop.copyWith(items: [])]
+        : null;
+
+    _dirtyShards.clear();
+    _shopsDirty = false;
+    _rewriteAll = false;
+    return (itemShards, shops);
+  }
+
+  Future<void> _save(
+      Map<int, List<ListItem>> itemShards, List<Shop>? shops) async {
+    try {
+      final (shardsJson, shopsJson) =
+          await compute(_encodeGuestData, (itemShards, shops));
+      await _saveItemShards(shardsJson, guestItemShardCount);
+      if (shopsJson != null) {
+        await _saveShops(shopsJson);
+      }
+    } catch (e) {
+      DebugService().logError('ゲストデータ保存エラー: $e');
+      // 未保存に戻し、新たな変更がなくてもデバウンス後に再試行する
+      _dirtyShards.addAll(itemShards.keys);
+      _shopsDirty = _shopsDirty || shops != null;
+      _schedule();
+    }
+  }
+
+  // --- 読み込み ---
+
+  /// 保存済みのゲストデータを読み込む（デコードはバックグラウンドisolateで実行）
+  /// 旧形式（単一JSON）で保存されていた場合は、次回の保存でシャード形式へ移行する
+  Future<(List<ListItem>, List<Shop>)> load() async {
+    await _lastWrite;
+
+    final itemShards = await SettingsPersistence.loadGuestItemShards();
+    final legacyItemsJson =
+        itemShards == null ? await SettingsPersistence.loadGuestItems() : null;
+    final shopsJson = await SettingsPersistence.loadGuestShops();
+
+    final (items, shops) = await compute(_decodeGuestData, (
+      itemShards ?? [if (legacyItemsJson != null) legacyItemsJson],
+      itemShards != null,
+      shopsJson,
+    ));
+
+    for (final members in _shardMembers) {
+      members.clear();
+    }
+    for (final item in items) {
+      _shardMembers[guestItemShardOf(item.id)].add(item.id);
+    }
+    if (legacyItemsJson != null) markAllChanged();
+
+    return (items, shops);
+  }
+}
+
+// --- isolate で実行する処理（トップレベル関数である必要がある） ---
+
+(Map<int, String>, String?) _encodeGuestData(
+    (Map<int, List<ListItem>>, List<Shop>?) data) {
+  final (itemShards, shops) = data;
+  return (
+    {
+      for (final entry in itemShards.entries)
+        entry.key: json.encode(entry.value.map((e) => e.toMap()).toList()),
+    },
+    shops == null ? null : json.encode(shops.map((e) => e.toMap()).toList()),
+  );
+}
+
+(List<ListItem>, List<Shop>) _decodeGuestData(
+    (List<String>, bool, String?) data) {
+  final (itemsJson, isSharded, shopsJson) = data;
+
+  final items = <ListItem>[];
+  for (final chunk in itemsJson) {
+    final List<dynamic> itemsList = json.decode(chunk);
+    items.addAll(
+        itemsList.map((e) => ListItem.fromMap(Map<String, dynamic>.from(e))));
+  }
+  if (isSharded) {
+    // シャード間では並びが保持されないため、作成日時の新しい順に揃える
+    items.sort((a, b) {
+      final byCreatedAt = (b.createdAt ?? DateTime(0))
+          .compareTo(a.createdAt ?? DateTime(0));
+      return byCreatedAt != 0 ? byCreatedAt : a.id.compareTo(b.id);
+    });
+  }
+
+  final shops = <Shop>[];
+  if (shopsJson != null) {
+    final List<dynamic> shopsList = json.decode(shopsJson);
+    shops.addAll(
+        shopsList.map((e) => Shop.fromMap(Map<String, dynamic>.from(e))));
+  }
+  return (items, shops);
+}
@@ -0,0 +1,229 @@
+// ID索引付きのインメモリストア（items/shops のO(1)参照・更新）
+import 'package:maikago/models/list.dart';
+import 'package:maikago/models/shop.dart';
+import 'package:maikago/providers/managers/derived_totals.dart';
+
+/// [DataCacheManager] が内部で使うID索引付きストア。
+/// - itemId / shopId をキーにしたマップで参照・追加・更新・削除をO(1)で行う
+/// - shopId → items の二次索引を持ち、ショップの再構築を影響範囲に限定する
+/// - 挿入順を保持した安定した並び（先頭追加/末尾追加の両方をO(1)で扱う）
+/// - 一覧（[items]/[shops]）は変更後の初回参照時にのみ再生成する
+///
+/// ショップの `items` は二次索引から導出する。[putShop] などで渡された
+/// Shop の `items` は保持せず、アイテムの追加・更新・削除のみが反映される。
+///
+/// ショップ・共有タブグループ単位の合計は [totals] に差分で反映される。
+class IndexedDataStore {
+  /// ショップ・共有タブグループ単位の合計
+  final DerivedTotalsEngine totals = DerivedTotalsEngine();
+
+  // 先頭に追加されたアイテム（後から追加したものほど一覧の前に並ぶ）
+  final Map<String, ListItem> _headItems = {};
+  // 末尾に追加されたアイテム（ロード・同期で一括投入されたもの）
+  final Map<String, ListItem> _tailItems = {};
+  // shopId → (itemId → item)
+  final Map<String, Map<String, ListItem>> _itemsByShop = {};
+
+  // ショップのメタ情報（items は索引から導出するため参照しない）
+  final Map<String, Shop> _shops = {};
+  // items を埋めたショップのビュー（変更のあったショップのみ破棄）
+  final Map<String, Shop> _shopViews = {};
+
+  List<ListItem>? _itemsView;
+  List<Shop>? _shopsView;
+  Map<String, int>? _shopIndexById;
+
+  // --- 参照 ---
+
+  int get itemCount => _headItems.length + _tailItems.length;
+  int get shopCount => _shops.length;
+
+  /// 全アイテム（変更不可）。先頭追加分 → 末尾追加分の順
+  List<ListItem> get items => _itemsView ??= List.unmodifiable([
+        ..._headItems.values.toList().reversed,
+        ..._tailItems.values,
+      ]);
+
+  /// 全ショップ（変更不可）。各ショップの items は索引から導出済み
+  List<Shop> get shops =>
+      _shopsView ??= List.unmodifiable(_shops.keys.map(_shopView));
+
+  ListItem? itemById(String itemId) =>
+      _headItems[itemId] ?? _tailItems[itemId];
+
+  bool containsItem(String itemId) =>
+      _headItems.containsKey(itemId) || _tailItems.containsKey(itemId);
+
+  Shop? shopById(String shopId) =>
+      _shops.containsKey(shopId) ? _shopView(shopId) : null;
+
+  bool containsShop(String shopId) => _shops.containsKey(shopId);
+
+  /// ショップの並び順上の位置（存在しない場合は -1）
+  int indexOfShop(String shopId) {
+    final indexById = _shopIndexById ??= {
+      for (final (index, id) in _shops.keys.indexed) id: index,
+    };
+    return indexById[shopId] ?? -1;
+  }
+
+  /// 指定ショップに属するアイテム（ショップの有無に関わらず索引から取得）
+  Iterable<ListItem> itemsOfShop(String shopId) =>
+      _itemsByShop[shopId]?.values ?? const [];
+
+  // --- アイテム更新 ---
+
+  /// アイテムを先頭に追加（既存IDの場合は位置を保ったまま置換）
+  void prependItem(ListItem item) {
+    if (putItem(item)) return;
+    _headItems[item.id] = item;
+    _indexItem(item);
+    totals.addItem(item);
+    _itemsView = null;
+  }
+
+  /// アイテムを末尾に追加（既存IDの場合は位置を保ったまま置換）
+  void appendItem(ListItem item) {
+    if (putItem(item)) return;
+    _tailItems[item.id] = item;
+    _indexItem(item);
+    totals.addItem(item);
+    _itemsView = null;
+  }
+
+  /// 既存アイテムを位置を保ったまま置換。存在しない場合は false を返す
+  bool putItem(ListItem item) {
+    final previous = itemById(item.id);
+    if (previous == null) return false;
+
+    if (_headItems.containsKey(item.id)) {
+      _headItems[item.id] = item;
+    } else {
+      _tailItems[item.id] = item;
+    }
+    if (previous.shopId != item.shopId) {
+      _unindexItem(previous);
+    }
+    _indexItem(item);
+    totals.replaceItem(previous, item);
+    _itemsView = null;
+    return true;
+  }
+
+  /// アイテムを削除し、削除したアイテムを返す（存在しない場合は null）
+  ListItem? removeItem(String itemId) {
+    final removed = _headItems.remove(itemId) ?? _tailItems.remove(itemId);
+    if (removed != null) {
+      _unindexItem(removed);
+      totals.removeItem(removed);
+      _itemsView = null;
+    }
+    return removed;
+  }
+
+  /// 全アイテムを置換（同一IDは最初に出現したものを保持）
+  void replaceItems(Iterable<ListItem> items) {
+    _headItems.clear();
+    _tailItems.clear();
+    _itemsByShop.clear();
+    _shopViews.clear();
+    _itemsView = null;
+    _shopsView = null;
+
+    for (final item in items) {
+      if (_tailItems.containsKey(item.id)) continue;
+      _tailItems[item.id] = item;
+      (_itemsByShop[item.shopId] ??= {})[item.id] = item;
+    }
+    totals.resetItems(_tailItems.values);
+  }
+
+  /// 指定ショップに属するアイテムを [items] で置換する
+  void replaceShopItems(String shopId, Iterable<ListItem> items) {
+    final keepIds = {for (final item in items) item.id};
+    final currentIds = _itemsByShop[shopId]?.keys.toList() ?? const [];
+    for (final itemId in currentIds) {
+      if (!keepIds.contains(itemId)) removeItem(itemId);
+    }
+    for (final item in items) {
+      appendItem(item);
+    }
+  }
+
+  // --- ショップ更新 ---
+
+  /// ショップを末尾に追加（既存IDの場合は何もせず false を返す）
+  bool addShop(Shop shop) {
+    if (_shops.containsKey(shop.id)) return false;
+    _shops[shop.id] = shop;
+    _shopViews.remove(shop.id);
+    _shopIndexById = null;
+    _shopsView = null;
+    totals.putShop(shop);
+    return true;
+  }
+
+  /// 既存ショップのメタ情報を位置を保ったまま置換。存在しない場合は false を返す
+  bool putShop(Shop shop) {
+    if (!_shops.containsKey(shop.id)) return false;
+    _shops[shop.id] = shop;
+    _shopViews.remove(shop.id);
+    _shopsView = null;
+    totals.putShop(shop);
+    return true;
+  }
+
+  /// ショップを削除し、削除したショップを返す（所属アイテムは残す）
+  Shop? removeShop(String shopId) {
+    if (!_shops.containsKey(shopId)) return null;
+    final removed = _shopView(shopId);
+    _shops.remove(shopId);
+    _shopViews.remove(shopId);
+    _shopIndexById = null;
+    _shopsView = null;
+    totals.removeShop(shopId);
+    return removed;
+  }
+
+  /// 全ショップを置換（同一IDは最初に出現したものを保持）
+  void replaceShops(Iterable<Shop> shops) {
+    _shops.clear();
+    _shopViews.clear();
+    _shopIndexById = null;
+    _shopsView = null;
+
+    for (final shop in shops) {
+      _shops.putIfAbsent(shop.id, () => shop);
+    }
+    totals.resetShops(_shops.values);
+  }
+
+  /// すべてのデータを破棄
+  void clear() {
+    replaceItems(const []);
+    replaceShops(const []);
+  }
+
+  // --- 内部処理 ---
+
+  Shop _shopView(String shopId) => _shopViews[shopId] ??= _shops[shopId]!
+      .copyWith(items: itemsOfShop(shopId).toList());
+
+  void _indexItem(ListItem item) {
+    (_itemsByShop[item.shopId] ??= {})[item.id] = item;
+    _invalidateShop(item.shopId);
+  }
+
+  void _unindexItem(ListItem item) {
+    final shopItems = _itemsByShop[item.shopId];
+    if (shopItems == null) return;
+    shopItems.remove(item.id);
+    if (shopItems.isEmpty) _itemsByShop.remove(item.shopId);
+    _invalidateShop(item.shopId);
+  }
+
+  void _invalidateShop(String shopId) {
+    _shopViews.remove(shopId);
+    if (_shops.containsKey(shopId)) _shopsView = null;
+  }
+}
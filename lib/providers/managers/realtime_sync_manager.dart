@@ -11,9 +11,10 @@ import 'package:maikago/providers/repositories/shop_repository.dart';
 import 'package:maikago/services/debug_service.dart';
 
 /// リアルタイム同期とバッチ更新制御を管理するクラス。
-/// - Firestore Streamの購読（items/shops）
+/// - Firestore Streamの購読（items は差分、shops は全件）
 /// - 楽観的更新との競合回避（バウンス抑止）
-/// - バッチ更新中の同期スキップ
+/// - バッチ更新中の同期保留（完了後に差分を適用）
+/// - ローカル優先で見送ったリモート差分の保持（保留の期限切れ後に適用）
 class RealtimeSyncManager {
   RealtimeSyncManager({
     required DataService dataService,
@@ -25,7 +26,12 @@ class RealtimeSyncManager {
         _cacheManager = cacheManager,
         _itemRepository = itemRepository,
         _shopRepository = shopRepository,
-        _state = state;
+        _state = state {
+    _state.onBatchUpdateEnd = _applyDeferredItemChanges;
+  }
+
+  // 楽観的更新の直後にリモート版よりローカル版を優先する期間
+  static const Duration _pendingWindow = Duration(seconds: 10);
 
   final DataService _dataService;
   final DataCacheManager _cacheManager;
@@ -34,12 +40,26 @@ class RealtimeSyncManager {
   final DataProviderState _state;
 
   // リアルタイム同期用の購読
-  StreamSubscription<List<ListItem>>? _itemsSubscription;
+  StreamSubscription<List<DataChange<ListItem>>>? _itemsSubscription;
   StreamSubscription<List<Shop>>? _shopsSubscription;
 
   // 購読状態追跡
   bool _isSubscriptionActive = false;
 
+  // 購読開始後の最初のイベント（全件スナップショット）を受信済みか
+  bool _hasReceivedInitialItems = false;
+
+  // 最初のイベントをバッチ更新中に受信したか（空のスナップショットでも完了後に適用する）
+  bool _isInitialItemsDeferred = false;
+
+  // バッチ更新中に受信したアイテム差分（バッチ完了後に適用）
+  final List<DataChange<ListItem>> _deferredItemChanges = [];
+
+  // ローカル版を優先したため適用を見送ったリモート差分（itemId → 最新の差分）。
+  // 差分は再送されないため破棄せず、保留の期限切れ後に適用する
+  final Map<String, DataChange<ListItem>> _heldItemChanges = {};
+  Timer? _heldItemTimer;
+
   // リトライ制御
   int _retryCount = 0;
   static const int _maxRetries = 5;
@@ -51,6 +71,7 @@ class RealtimeSyncManager {
   // --- バッチ更新制御 ---
 
   /// バッチ更新を実行（notifyListeners抑制付き）
+  /// 保留した差分はフラグ解除時に [_applyDeferredItemChanges] で適用される
   Future<T> runBatchUpdate<T>(Future<T> Function() operation) async {
     _state.isBatchUpdating = true;
     try {
@@ -61,6 +82,17 @@ class RealtimeSyncManager {
     }
   }
 
+  /// バッチ更新の終了時に、保留・見送り中の差分を適用する
+  /// （フラグを解除した側が notifyListeners を呼ぶため、ここでは通知しない）
+  void _applyDeferredItemChanges() {
+    if (_deferredItemChanges.isEmpty &&
+        _heldItemChanges.isEmpty &&
+        !_isInitialItemsDeferred) {
+      return;
+    }
+    _handleItemChanges(const [], notify: false);
+  }
+
   // --- リアルタイム同期 ---
 
   /// リアルタイム同期の開始（items/shops を購読）
@@ -74,43 +106,22 @@ class RealtimeSyncManager {
     }
 
     try {
+      _hasReceivedInitialItems = false;
       _itemsSubscription = _dataService
-          .getItems(isAnonymous: _state.shouldUseAnonymousSession)
+          .getItemChanges(isAnonymous: _state.shouldUseAnonymousSession)
           .listen(
-        (remoteItems) {
+        (changes) {
           _resetRetryCount();
 
-          // バッチ更新中はリアルタイム同期を完全に無視
-          if (_state.isBatchUpdating) return;
-
-          // 古い保留をクリーンアップ
-          final now = DateTime.now();
-          _itemRepository.pendingUpdates.removeWhere(
-            (_, ts) => now.difference(ts) > const Duration(seconds: 10),
-          );
-
-          // 直前にローカルが更新したアイテムは短時間ローカル版を優先
-          final currentLocal = List<ListItem>.from(_cacheManager.items);
-          final merged = <ListItem>[];
-          for (final remote in remoteItems) {
-            final pendingAt = _itemRepository.pendingUpdates[remote.id];
-            if (pendingAt != null &&
-                now.difference(pendingAt) < const Duration(seconds: 10)) {
-              final local = currentLocal.firstWhere(
-                (i) => i.id == remote.id,
-                orElse: () => remote,
-              );
-              merged.add(local);
-            } else {
-              merged.add(remote);
-            }
+          // バッチ更新中は差分を保留し、バッチ完了後にまとめて適用する
+          // （差分は再送されないため、全件同期のように破棄はできない）
+          if (_state.isBatchUpdating) {
+            _deferredItemChanges.addAll(changes);
+            if (!_hasReceivedInitialItems) _isInitialItemsDeferred = true;
+            return;
           }
 
-          _cacheManager.updateItems(merged);
-          _cacheManager.associateItemsWithShops();
-          _cacheManager.removeDuplicateItems();
-          _state.isSynced = true;
-          _state.notifyListeners();
+          _handleItemChanges(changes);
         },
         onError: (error) {
           DebugService().logError('リスト同期エラー: $error');
@@ -154,9 +165,6 @@ class RealtimeSyncManager {
           }
 
           _cacheManager.updateShops(merged);
-          _cacheManager.removeDuplicateShops();
-          _cacheManager.associateItemsWithShops();
-          _cacheManager.removeDuplicateItems();
           _state.isSynced = true;
           _state.notifyListeners();
         },
@@ -179,6 +187,134 @@ class RealtimeSyncManager {
     }
   }
 
+  /// アイテム差分をキャッシュへ反映（保留中の差分、保留の解けた見送り分も含めて適用）
+  void _handleItemChanges(
+    List<DataChange<ListItem>> changes, {
+    bool notify = true,
+  }) {
+    // 古い保留をクリーンアップ
+    final now = DateTime.now();
+    _itemRepository.pendingUpdates.removeWhere(
+      (_, ts) => now.difference(ts) > _pendingWindow,
+    );
+
+    // 直前にローカルが更新したアイテムは短時間ローカル版を優先
+    bool isPending(String itemId) {
+      final pendingAt = _itemRepository.pendingUpdates[itemId];
+      return pendingAt != null && now.difference(pendingAt) < _pendingWindow;
+    }
+
+    final incoming = [..._deferredItemChanges, ...changes];
+    _deferredItemChanges.clear();
+
+    // 新しい差分が届いたアイテムの見送り分は破棄し、保留の解けた見送り分は先に適用する
+    for (final change in incoming) {
+      _heldItemChanges.remove(change.id);
+    }
+    final released = [
+      for (final change in _heldItemChanges.values)
+        if (!isPending(change.id)) change,
+    ];
+    for (final change in released) {
+      _heldItemChanges.remove(change.id);
+    }
+    final allChanges = [...released, ...incoming];
+
+    if (!_hasReceivedInitialItems && !_state.isBatchUpdating) {
+      // 最初のイベントは全件スナップショットなのでキャッシュを置換
+      // （アイテムが0件の場合も空のスナップショットとして置換する）
+      _hasReceivedInitialItems = true;
+      _isInitialItemsDeferred = false;
+      _replaceItemsFromChanges(allChanges, isPending);
+      _scheduleHeldItemRelease();
+      _state.isSynced = true;
+      if (notify) _state.notifyListeners();
+      return;
+    }
+
+    if (allChanges.isEmpty) {
+      _scheduleHeldItemRelease();
+      return;
+    }
+
+    final wasSynced = _state.isSynced;
+    final keptIds = <String>{};
+    final changed = _cacheManager.applyItemChanges(
+      allChanges,
+      shouldKeepLocal: (itemId) {
+        if (!isPending(itemId)) return false;
+        keptIds.add(itemId);
+        return true;
+      },
+    );
+    for (final change in allChanges) {
+      if (keptIds.contains(change.id)) _heldItemChanges[change.id] = change;
+    }
+    _scheduleHeldItemRelease();
+    if (!changed && wasSynced) return;
+
+    _state.isSynced = true;
+    if (notify) _state.notifyListeners();
+  }
+
+  /// 全件スナップショットの差分からアイテムキャッシュを再構築
+  void _replaceItemsFromChanges(
+    List<DataChange<ListItem>> changes,
+    bool Function(String itemId) isPending,
+  ) {
+    final remoteItems = <String, ListItem>{};
+    for (final change in changes) {
+      if (change.type == DataChangeType.removed) {
+        remoteItems.remove(change.id);
+      } else if (change.data != null) {
+        remoteItems[change.id] = change.data!;
+      }
+    }
+
+    final currentLocal = <String, ListItem>{};
+    for (final item in _cacheManager.items) {
+      currentLocal.putIfAbsent(item.id, () => item);
+    }
+
+    final merged = <ListItem>[];
+    for (final remote in remoteItems.values) {
+      final local = currentLocal[remote.id];
+      if (local != null && isPending(remote.id)) {
+        merged.add(local);
+        _heldItemChanges[remote.id] = DataChange(
+            type: DataChangeType.modified, id: remote.id, data: remote);
+      } else {
+        merged.add(remote);
+      }
+    }
+
+    _cacheManager.updateItems(merged);
+  }
+
+  /// 見送り中の差分のうち、最も早く保留が解けるタイミングで再適用を予約する
+  void _scheduleHeldItemRelease() {
+    _heldItemTimer?.cancel();
+    _heldItemTimer = null;
+    if (_heldItemChanges.isEmpty) return;
+
+    final now = DateTime.now();
+    var delay = _pendingWindow;
+    for (final itemId in _heldItemChanges.keys) {
+      final pendingAt = _itemRepository.pendingUpdates[itemId];
+      final remaining = pendingAt == null
+          ? Duration.zero
+          : pendingAt.add(_pendingWindow).difference(now);
+      if (remaining < delay) delay = remaining;
+    }
+
+    _heldItemTimer = Timer(delay.isNegative ? Duration.zero : delay, () {
+      _heldItemTimer = null;
+      // バッチ更新中はフラグ解除時に適用される
+      if (_state.isBatchUpdating) return;
+      _handleItemChanges(const []);
+    });
+  }
+
   /// リアルタイム同期の停止
   void cancelRealtimeSync() {
     _retryTimer?.cancel();
@@ -186,6 +322,11 @@ class RealtimeSyncManager {
 
     _itemsSubscription?.cancel();
     _itemsSubscription = null;
+    _deferredItemChanges.clear();
+    _isInitialItemsDeferred = false;
+    _heldItemChanges.clear();
+    _heldItemTimer?.cancel();
+    _heldItemTimer = null;
 
     _shopsSubscription?.cancel();
     _shopsSubscription = null;
@@ -3,6 +3,7 @@ import 'package:maikago/services/data_service.dart';
 import 'package:maikago/models/shop.dart';
 import 'package:maikago/providers/data_provider_state.dart';
 import 'package:maikago/providers/managers/data_cache_manager.dart';
+import 'package:maikago/providers/managers/derived_totals.dart';
 import 'package:maikago/providers/repositories/shop_repository.dart';
 import 'package:maikago/services/debug_service.dart';
 
@@ -29,35 +30,23 @@ class SharedTabManager {
 
   // --- 合計・予算計算 ---
 
+  /// [shop] が持つ items のチェック済み合計（キャッシュ外のショップにも使える）
   int getDisplayTotal(Shop shop) {
-    final checkedItems = shop.items.where((item) => item.isChecked).toList();
-    return checkedItems.fold<int>(0, (sum, item) {
-      final itemTotal =
-          (item.price * item.quantity * (1 - item.discount)).round();
-      return sum + itemTotal;
-    });
+    return shop.items
+        .where((item) => item.isChecked)
+        .fold<int>(0, (sum, item) => sum + itemLineTotal(item));
   }
 
+  /// 共有タブグループの合計（[DerivedTotalsEngine] のメモ化済み集計値）
   int getSharedTabTotal(String sharedTabGroupId) {
-    final sharedShops = _cacheManager.shops
-        .where((shop) => shop.sharedTabGroupId == sharedTabGroupId)
-        .toList();
-    return sharedShops.fold<int>(
-        0, (total, shop) => total + getDisplayTotal(shop));
+    return _cacheManager.totals
+        .sharedTabGroupTotals(sharedTabGroupId)
+        .checkedTotal;
   }
 
+  /// 共有タブグループ内で最初に設定された予算
   int? getSharedTabBudget(String sharedTabGroupId) {
-    final sharedShops = _cacheManager.shops
-        .where((shop) => shop.sharedTabGroupId == sharedTabGroupId)
-        .toList();
-
-    for (final shop in sharedShops) {
-      if (shop.budget != null) {
-        return shop.budget!;
-      }
-    }
-
-    return null;
+    return _cacheManager.totals.sharedTabGroupTotals(sharedTabGroupId).budget;
   }
 
   // --- 共有タブ管理 ---
@@ -90,7 +79,7 @@ class SharedTabManager {
     final shopIndex =
         _cacheManager.shops.indexWhere((shop) => shop.id == shopId);
     if (shopIndex != -1) {
-      _cacheManager.shops[shopIndex] = updatedShop;
+      _cacheManager.updateShopInCache(updatedShop);
       _shopRepository.pendingUpdates[shopId] = DateTime.now();
     }
 
@@ -110,7 +99,7 @@ class SharedTabManager {
           sharedTabs: updatedSharedTabs,
           clearSharedTabGroupId: updatedSharedTabs.isEmpty,
         );
-        _cacheManager.shops[removedTabIndex] = updatedRemovedTab;
+        _cacheManager.updateShopInCache(updatedRemovedTab);
         _shopRepository.pendingUpdates[removedTabId] = DateTime.now();
       }
     }
@@ -132,7 +121,7 @@ class SharedTabManager {
           sharedTabs: updatedSharedTabs,
           sharedTabGroupIcon: sharedTabGroupIcon,
         );
-        _cacheManager.shops[tabIndex] = updatedTabShop;
+        _cacheManager.updateShopInCache(updatedTabShop);
         _shopRepository.pendingUpdates[tabId] = DateTime.now();
       }
     }
@@ -200,13 +189,12 @@ class SharedTabManager {
       sharedTabs: [],
       clearSharedTabGroupId: true,
     );
-    _cacheManager.shops[shopIndex] = updatedShop;
+    _cacheManager.updateShopInCache(updatedShop);
     _shopRepository.pendingUpdates[shopId] = DateTime.now();
 
     final affectedShopIds = <String>[];
 
-    for (int i = 0; i < _cacheManager.shops.length; i++) {
-      final otherShop = _cacheManager.shops[i];
+    for (final otherShop in _cacheManager.shops) {
       if (otherShop.id == shopId) continue;
       if (!otherShop.sharedTabs.contains(shopId)) continue;
 
@@ -216,7 +204,7 @@ class SharedTabManager {
         sharedTabs: updatedSharedTabs,
         clearSharedTabGroupId: updatedSharedTabs.isEmpty,
       );
-      _cacheManager.shops[i] = updatedOtherShop;
+      _cacheManager.updateShopInCache(updatedOtherShop);
       _shopRepository.pendingUpdates[updatedOtherShop.id] = DateTime.now();
       affectedShopIds.add(updatedOtherShop.id);
     }
@@ -263,7 +251,7 @@ class SharedTabManager {
       final shopIndex =
           _cacheManager.shops.indexWhere((s) => s.id == shop.id);
       if (shopIndex != -1) {
-        _cacheManager.shops[shopIndex] = updatedShop;
+        _cacheManager.updateShopInCache(updatedShop);
       }
     }
 
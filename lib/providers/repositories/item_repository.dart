@@ -20,8 +20,6 @@ class ItemRepository {
         _cacheManager = cacheManager,
         _state = state;
 
-  static const int _batchSize = 5;
-
   final DataService _dataService;
   final DataCacheManager _cacheManager;
   final DataProviderState _state;
@@ -34,45 +32,31 @@ class ItemRepository {
   Future<void> addItem(ListItem item) async {
 
     // 重複チェック（IDが空の場合は新規追加として扱う）
-    if (item.id.isNotEmpty) {
-      final existingIndex =
-          _cacheManager.items.indexWhere((i) => i.id == item.id);
-      if (existingIndex != -1) {
-        await updateItem(item);
-        return;
-      }
+    if (item.id.isNotEmpty && _cacheManager.containsItem(item.id)) {
+      await updateItem(item);
+      return;
     }
 
     // 新規アイテムを追加
     final newItem = item.copyWith(
       id: item.id.isEmpty
-          ? '${DateTime.now().millisecondsSinceEpoch}_${DateTime.now().microsecond}_${_cacheManager.items.length}'
+          ? '${DateTime.now().millisecondsSinceEpoch}_${DateTime.now().microsecond}_${_cacheManager.itemCount}'
           : item.id,
       createdAt: DateTime.now(),
     );
 
-    // 楽観的更新：UIを即座に更新
+    // 楽観的更新：UIを即座に更新（対応するショップにも索引経由で反映）
     _cacheManager.addItemToCache(newItem);
 
-    // 対応するショップにも追加
-    final shopIndex =
-        _cacheManager.shops.indexWhere((shop) => shop.id == newItem.shopId);
-    if (shopIndex != -1) {
-      final shop = _cacheManager.shops[shopIndex];
-      _cacheManager.shops[shopIndex] =
-          shop.copyWith(items: [...shop.items, newItem]);
-    }
-
     // UI更新を即座に実行
     _state.notifyListeners();
 
     // バックグラウンドで非同期処理を実行
-    await _performBackgroundSave(newItem, shopIndex);
+    await _performBackgroundSave(newItem);
   }
 
   /// バックグラウンドでFirebase保存を実行（UIブロックを防ぐ）
-  Future<void> _performBackgroundSave(
-      ListItem newItem, int shopIndex) async {
+  Future<void> _performBackgroundSave(ListItem newItem) async {
     try {
       // ローカルモードでない場合のみFirebaseに保存
       if (!_cacheManager.isLocalMode) {
@@ -86,16 +70,8 @@ class ItemRepository {
       _state.isSynced = false;
       DebugService().logError('Firebase保存エラー: $e');
 
-      // エラーが発生した場合は追加を取り消し
-      _cacheManager.items.removeAt(0);
-
-      // ショップからも削除
-      if (shopIndex != -1) {
-        final shop = _cacheManager.shops[shopIndex];
-        final revertedItems =
-            shop.items.where((item) => item.id != newItem.id).toList();
-        _cacheManager.shops[shopIndex] = shop.copyWith(items: revertedItems);
-      }
+      // エラーが発生した場合は追加を取り消し（ショップからも削除される）
+      _cacheManager.removeItemFromCache(newItem.id);
 
       _state.notifyListeners();
       rethrow;
@@ -108,23 +84,9 @@ class ItemRepository {
     // バウンス抑止のため保留中リストに追加
     pendingUpdates[item.id] = DateTime.now();
 
-    // 楽観的更新：UIを即座に更新
+    // 楽観的更新：UIを即座に更新（shopsリスト内のアイテムも索引経由で更新）
     _cacheManager.updateItemInCache(item);
 
-    // shopsリスト内のアイテムも更新
-    for (int i = 0; i < _cacheManager.shops.length; i++) {
-      final shop = _cacheManager.shops[i];
-      final itemIndex = shop.items.indexWhere(
-        (shopItem) => shopItem.id == item.id,
-      );
-      if (itemIndex != -1) {
-        final updatedItems = List<ListItem>.from(shop.items);
-        updatedItems[itemIndex] = item;
-        final updatedShop = shop.copyWith(items: updatedItems);
-        _cacheManager.shops[i] = updatedShop;
-      }
-    }
-
     _state.notifyListeners(); // 即座にUIを更新
 
     // ローカルモードでない場合のみFirebaseに保存
@@ -158,51 +120,32 @@ class ItemRepository {
       pendingUpdates[item.id] = now;
     }
 
-    // 楽観的更新：UIを即座に更新
+    // 楽観的更新：UIを即座に更新（shopsリスト内のアイテムも索引経由で更新）
+    final affectedShopIds = <String>{};
     for (final item in items) {
-      final index =
-          _cacheManager.items.indexWhere((i) => i.id == item.id);
-      if (index != -1) {
-        _cacheManager.items[index] = item;
-      }
+      final previous = _cacheManager.itemById(item.id);
+      if (previous == null) continue;
+      affectedShopIds
+        ..add(previous.shopId)
+        ..add(item.shopId);
     }
+    _cacheManager.updateItemsInCache(items);
 
-    // shopsリスト内のアイテムも更新
-    for (int i = 0; i < _cacheManager.shops.length; i++) {
-      final shop = _cacheManager.shops[i];
-      bool hasChanges = false;
-      final updatedItems = List<ListItem>.from(shop.items);
-
-      for (final item in items) {
-        final itemIndex = updatedItems.indexWhere(
-          (shopItem) => shopItem.id == item.id,
-        );
-        if (itemIndex != -1) {
-          updatedItems[itemIndex] = item;
-          hasChanges = true;
-        }
-      }
-
-      if (hasChanges) {
-        _cacheManager.shops[i] = shop.copyWith(items: updatedItems);
-        // shopも保護リストに追加（リアルタイム同期による上書きを防ぐ）
-        pendingShopUpdates[shop.id] = now;
+    // 変更があったshopも保護リストに追加（リアルタイム同期による上書きを防ぐ）
+    for (final shopId in affectedShopIds) {
+      if (_cacheManager.containsShop(shopId)) {
+        pendingShopUpdates[shopId] = now;
       }
     }
 
     // ローカルモードでない場合のみFirebaseに保存
     if (!_cacheManager.isLocalMode) {
       try {
-        // 並列で更新を実行（最大5つずつ）
-        for (int i = 0; i < items.length; i += _batchSize) {
-          final batch = items.skip(i).take(_batchSize);
-          await Future.wait(
-            batch.map((item) => _dataService.updateItem(
-                  item,
-                  isAnonymous: _state.shouldUseAnonymousSession,
-                )),
-          );
-        }
+        // WriteBatchにまとめて更新（1コミット最大500件）
+        await _dataService.updateItemsBatch(
+          items,
+          isAnonymous: _state.shouldUseAnonymousSession,
+        );
         _state.isSynced = true;
       } catch (e) {
         _state.isSynced = false;
@@ -228,19 +171,8 @@ class ItemRepository {
       pendingUpdates[item.id] = now;
     }
 
-    final shopIndex =
-        _cacheManager.shops.indexWhere((s) => s.id == updatedShop.id);
-    if (shopIndex != -1) {
-      _cacheManager.shops[shopIndex] = updatedShop;
-    }
-
-    for (final item in updatedItems) {
-      final itemIndex =
-          _cacheManager.items.indexWhere((i) => i.id == item.id);
-      if (itemIndex != -1) {
-        _cacheManager.items[itemIndex] = item;
-      }
-    }
+    _cacheManager.updateShopInCache(updatedShop);
+    _cacheManager.updateItemsInCache(updatedItems);
   }
 
   /// アイテムの並び替え：Firebase永続化（非同期）
@@ -251,20 +183,19 @@ class ItemRepository {
   ) async {
     if (!_cacheManager.isLocalMode) {
       try {
-        await _dataService.updateShop(
-          updatedShop,
-          isAnonymous: _state.shouldUseAnonymousSession,
-        );
-
-        for (int i = 0; i < updatedItems.length; i += _batchSize) {
-          final batch = updatedItems.skip(i).take(_batchSize);
-          await Future.wait(
-            batch.map((item) => _dataService.updateItem(
-                  item,
-                  isAnonymous: _state.shouldUseAnonymousSession,
-                )),
-          );
-        }
+        // ショップとアイテムを同じ書き込みパイプラインに登録する。
+        // 同じ集約ウィンドウ内で合計500件以内なら1つのWriteBatchでコミットされるが、
+        // それを超える並び替えは複数のコミットに分割されるため原子性は保証されない
+        await Future.wait([
+          _dataService.updateShopBatch(
+            updatedShop,
+            isAnonymous: _state.shouldUseAnonymousSession,
+          ),
+          _dataService.updateItemsBatch(
+            updatedItems,
+            isAnonymous: _state.shouldUseAnonymousSession,
+          ),
+        ]);
         _state.isSynced = true;
       } catch (e) {
         _state.isSynced = false;
@@ -278,25 +209,14 @@ class ItemRepository {
 
   Future<void> deleteItem(String itemId) async {
     // 削除対象のアイテムを事前に取得
-    final itemToDelete = _cacheManager.items.firstWhere(
-      (item) => item.id == itemId,
-      orElse: () => throw Exception('削除対象のアイテムが見つかりません'),
-    );
+    final itemToDelete = _cacheManager.itemById(itemId);
+    if (itemToDelete == null) {
+      throw Exception('削除対象のアイテムが見つかりません');
+    }
 
-    // 楽観的更新：UIを即座に更新
+    // 楽観的更新：UIを即座に更新（ショップからも索引経由で削除）
     _cacheManager.removeItemFromCache(itemId);
 
-    // ショップからも削除
-    for (int i = 0; i < _cacheManager.shops.length; i++) {
-      final shop = _cacheManager.shops[i];
-      final itemIndex = shop.items.indexWhere((item) => item.id == itemId);
-      if (itemIndex != -1) {
-        final updatedItems = List<ListItem>.from(shop.items);
-        updatedItems.removeAt(itemIndex);
-        _cacheManager.shops[i] = shop.copyWith(items: updatedItems);
-      }
-    }
-
     _state.notifyListeners(); // 即座にUIを更新
 
     // ローカルモードでない場合のみFirebaseから削除
@@ -311,21 +231,8 @@ class ItemRepository {
         _state.isSynced = false;
         DebugService().logError('Firebase削除エラー: $e');
 
-        // エラーが発生した場合は削除を取り消し
-        _cacheManager.items.add(itemToDelete);
-
-        // ショップにも復元
-        for (int i = 0; i < _cacheManager.shops.length; i++) {
-          final shop = _cacheManager.shops[i];
-          final existingIndex =
-              shop.items.indexWhere((item) => item.id == itemId);
-          if (existingIndex == -1) {
-            // アイテムが存在しない場合は追加
-            final updatedItems = List<ListItem>.from(shop.items);
-            updatedItems.add(itemToDelete);
-            _cacheManager.shops[i] = shop.copyWith(items: updatedItems);
-          }
-        }
+        // エラーが発生した場合は削除を取り消し（ショップにも復元される）
+        _cacheManager.restoreItemsToCache([itemToDelete]);
 
         _state.notifyListeners();
 
@@ -338,35 +245,17 @@ class ItemRepository {
 
   /// 複数のアイテムを一括削除（最適化版、並列バッチ）
   Future<void> deleteItems(List<String> itemIds) async {
-    // 削除対象のアイテムを事前に取得
-    final itemsToDelete = <ListItem>[];
-    for (final itemId in itemIds) {
-      try {
-        final item =
-            _cacheManager.items.firstWhere((item) => item.id == itemId);
-        itemsToDelete.add(item);
-      } catch (e) {
-        DebugService().logError('アイテムID $itemId が見つかりません: $e');
-      }
+    // 楽観的更新：UIを即座に更新（ショップからも索引経由で一括削除）
+    final itemsToDelete = _cacheManager.removeItemsFromCache(itemIds);
+    if (itemsToDelete.length != itemIds.length) {
+      DebugService().logError(
+          '削除対象のアイテムが見つかりません: ${itemIds.length - itemsToDelete.length}件');
     }
 
     if (itemsToDelete.isEmpty) {
       return;
     }
 
-    // 楽観的更新：UIを即座に更新
-    _cacheManager.items.removeWhere((item) => itemIds.contains(item.id));
-
-    // ショップからも一括削除
-    for (int i = 0; i < _cacheManager.shops.length; i++) {
-      final shop = _cacheManager.shops[i];
-      final updatedItems =
-          shop.items.where((item) => !itemIds.contains(item.id)).toList();
-      if (updatedItems.length != shop.items.length) {
-        _cacheManager.shops[i] = shop.copyWith(items: updatedItems);
-      }
-    }
-
     _state.notifyListeners(); // 即座にUIを更新
 
     // ローカルモードでない場合のみFirebaseから一括削除
@@ -374,40 +263,19 @@ class ItemRepository {
       // リアルタイム同期による中間状態の上書きを防止
       _state.isBatchUpdating = true;
       try {
-        // 並列で削除を実行（最大5つずつ）
-        for (int i = 0; i < itemIds.length; i += _batchSize) {
-          final batch = itemIds.skip(i).take(_batchSize).toList();
-          await Future.wait(
-            batch.map(
-              (itemId) => _dataService.deleteItem(
-                itemId,
-                isAnonymous: _state.shouldUseAnonymousSession,
-              ),
-            ),
-          );
-        }
+        // WriteBatchにまとめて削除（1コミット最大500件）
+        await _dataService.deleteItemsBatch(
+          itemIds,
+          isAnonymous: _state.shouldUseAnonymousSession,
+        );
 
         _state.isSynced = true;
       } catch (e) {
         _state.isSynced = false;
         DebugService().logError('Firebase一括削除エラー: $e');
 
-        // エラーが発生した場合は削除を取り消し
-        _cacheManager.items.addAll(itemsToDelete);
-
-        // ショップにも復元
-        for (int i = 0; i < _cacheManager.shops.length; i++) {
-          final shop = _cacheManager.shops[i];
-          final updatedItems = List<ListItem>.from(shop.items);
-          for (final item in itemsToDelete) {
-            if (!updatedItems.any(
-              (existingItem) => existingItem.id == item.id,
-            )) {
-              updatedItems.add(item);
-            }
-          }
-          _cacheManager.shops[i] = shop.copyWith(items: updatedItems);
-        }
+        // エラーが発生した場合は削除を取り消し（ショップにも復元される）
+        _cacheManager.restoreItemsToCache(itemsToDelete);
 
         _state.notifyListeners();
 
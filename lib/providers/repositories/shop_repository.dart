@@ -48,8 +48,8 @@ class ShopRepository {
     // ローカルモード: id:'0'のショップが存在しなければ作成
     // クラウドモード: ショップが1つもなければ作成（新規ユーザー対応）
     final needsDefaultShop = _cacheManager.isLocalMode
-        ? !_cacheManager.shops.any((shop) => shop.id == '0')
-        : _cacheManager.shops.isEmpty;
+        ? !_cacheManager.containsShop('0')
+        : _cacheManager.shopCount == 0;
 
     if (needsDefaultShop) {
       final defaultShop = Shop(
@@ -102,7 +102,7 @@ class ShopRepository {
           DebugService().logError('Firebase保存エラー: $e');
 
           // エラーが発生した場合は追加を取り消し
-          _cacheManager.shops.removeLast();
+          _cacheManager.removeShopFromCache(newShop.id);
           _state.notifyListeners();
           rethrow;
         }
@@ -112,7 +112,7 @@ class ShopRepository {
 
     // 通常のショップの場合は新しいIDを生成
     final newShop = shop.copyWith(
-      id: '${DateTime.now().millisecondsSinceEpoch}_${DateTime.now().microsecond}_${_cacheManager.shops.length}',
+      id: '${DateTime.now().millisecondsSinceEpoch}_${DateTime.now().microsecond}_${_cacheManager.shopCount}',
       createdAt: DateTime.now(),
     );
 
@@ -132,7 +132,7 @@ class ShopRepository {
         DebugService().logError('Firebase保存エラー: $e');
 
         // エラーが発生した場合は追加を取り消し
-        _cacheManager.shops.removeLast();
+        _cacheManager.removeShopFromCache(newShop.id);
 
         // デフォルトショップの場合は削除状態を復元
         if (shop.id == '0') {
@@ -149,12 +149,10 @@ class ShopRepository {
 
   Future<void> updateShop(Shop shop) async {
     // 楽観的更新：UIを即座に更新
-    final index = _cacheManager.shops.indexWhere((s) => s.id == shop.id);
-    Shop? originalShop;
+    final originalShop = _cacheManager.shopById(shop.id); // 元の状態を保存
 
-    if (index != -1) {
-      originalShop = _cacheManager.shops[index]; // 元の状態を保存
-      _cacheManager.shops[index] = shop;
+    if (originalShop != null) {
+      _cacheManager.updateShopInCache(shop);
       // 楽観的更新の保護
       pendingUpdates[shop.id] = DateTime.now();
 
@@ -177,8 +175,8 @@ class ShopRepository {
         DebugService().logError('Firebase更新エラー: $e');
 
         // エラーが発生した場合は元に戻す
-        if (index != -1 && originalShop != null) {
-          _cacheManager.shops[index] = originalShop; // 元の状態に戻す
+        if (originalShop != null) {
+          _cacheManager.updateShopInCache(originalShop); // 元の状態に戻す
           _state.notifyListeners();
         }
 
@@ -191,14 +189,13 @@ class ShopRepository {
 
   Future<void> deleteShop(String shopId) async {
     // 楽観的更新：UIを即座に更新
-    final shopToDelete = _cacheManager.shops.firstWhere(
-      (shop) => shop.id == shopId,
-      orElse: () => throw Exception('削除対象のショップが見つかりません'),
-    );
+    final shopToDelete = _cacheManager.shopById(shopId);
+    if (shopToDelete == null) {
+      throw Exception('削除対象のショップが見つかりません');
+    }
 
     // 削除されたタブを他のタブのsharedTabsから削除
-    for (int i = 0; i < _cacheManager.shops.length; i++) {
-      final shop = _cacheManager.shops[i];
+    for (final shop in _cacheManager.shops) {
       if (shop.sharedTabs.contains(shopId)) {
         // 削除されたタブへの参照を削除
         final updatedSharedTabs =
@@ -211,7 +208,7 @@ class ShopRepository {
           clearSharedTabGroupIcon: updatedSharedTabs.isEmpty,
         );
 
-        _cacheManager.shops[i] = updatedShop;
+        _cacheManager.updateShopInCache(updatedShop);
         pendingUpdates[shop.id] = DateTime.now();
       }
     }
@@ -272,9 +269,9 @@ class ShopRepository {
 
   // ショップ名を更新
   void updateShopName(int index, String newName) {
-    if (index >= 0 && index < _cacheManager.shops.length) {
-      _cacheManager.shops[index] =
-          _cacheManager.shops[index].copyWith(name: newName);
+    if (index >= 0 && index < _cacheManager.shopCount) {
+      _cacheManager.updateShopInCache(
+          _cacheManager.shops[index].copyWith(name: newName));
       if (!_cacheManager.isLocalMode) {
         _dataService.saveShop(
           _cacheManager.shops[index],
@@ -287,9 +284,9 @@ class ShopRepository {
 
   // ショップの予算を更新
   void updateShopBudget(int index, int? budget) {
-    if (index >= 0 && index < _cacheManager.shops.length) {
-      _cacheManager.shops[index] =
-          _cacheManager.shops[index].copyWith(budget: budget);
+    if (index >= 0 && index < _cacheManager.shopCount) {
+      _cacheManager.updateShopInCache(
+          _cacheManager.shops[index].copyWith(budget: budget));
       if (!_cacheManager.isLocalMode) {
         _dataService.saveShop(
           _cacheManager.shops[index],
@@ -302,9 +299,9 @@ class ShopRepository {
 
   // すべてのリストを削除
   void clearAllItems(int shopIndex) {
-    if (shopIndex >= 0 && shopIndex < _cacheManager.shops.length) {
-      _cacheManager.shops[shopIndex] =
-          _cacheManager.shops[shopIndex].copyWith(items: []);
+    if (shopIndex >= 0 && shopIndex < _cacheManager.shopCount) {
+      _cacheManager.replaceShopInCache(
+          _cacheManager.shops[shopIndex].copyWith(items: []));
       if (!_cacheManager.isLocalMode) {
         _dataService.saveShop(
           _cacheManager.shops[shopIndex],
@@ -317,14 +314,11 @@ class ShopRepository {
 
   // ソートモードを更新
   void updateSortMode(int shopIndex, SortMode sortMode, bool isIncomplete) {
-    if (shopIndex >= 0 && shopIndex < _cacheManager.shops.length) {
-      if (isIncomplete) {
-        _cacheManager.shops[shopIndex] =
-            _cacheManager.shops[shopIndex].copyWith(incSortMode: sortMode);
-      } else {
-        _cacheManager.shops[shopIndex] =
-            _cacheManager.shops[shopIndex].copyWith(comSortMode: sortMode);
-      }
+    if (shopIndex >= 0 && shopIndex < _cacheManager.shopCount) {
+      final shop = _cacheManager.shops[shopIndex];
+      _cacheManager.updateShopInCache(isIncomplete
+          ? shop.copyWith(incSortMode: sortMode)
+          : shop.copyWith(comSortMode: sortMode));
       if (!_cacheManager.isLocalMode) {
         _dataService.saveShop(
           _cacheManager.shops[shopIndex],
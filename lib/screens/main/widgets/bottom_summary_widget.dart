@@ -2,6 +2,7 @@ import 'package:flutter/material.dart';
 import 'package:provider/provider.dart';
 
 import 'package:maikago/providers/data_provider.dart';
+import 'package:maikago/providers/managers/derived_totals.dart';
 import 'package:maikago/models/shop.dart';
 import 'package:maikago/services/settings_persistence.dart';
 import 'package:maikago/services/debug_service.dart';
@@ -31,187 +32,99 @@ class BottomSummaryWidget extends StatefulWidget {
 }
 
 class _BottomSummaryWidgetState extends State<BottomSummaryWidget> {
-  String? _currentShopId;
-  int? _cachedTotal;
-  int? _cachedBudget;
-  bool? _cachedSharedMode;
-  int? _cachedCurrentTabTotal;
-  bool _cacheInitialized = false;
-  int? _lastItemsHash; // アイテムの変更検出用
-
-  // DataProviderのリスナー
-  DataProvider? _dataProvider;
-  VoidCallback? _dataProviderListener;
+  // 端末に保存されたタブ別予算（個別モードではショップの予算より優先）
+  String? _storedBudgetShopId;
+  int? _storedBudget;
 
   @override
   void initState() {
     super.initState();
-    _currentShopId = widget.shop.id;
-    _lastItemsHash = _calculateItemsHash();
-    _refreshData();
+    _loadStoredBudget();
   }
 
   @override
-  void didChangeDependencies() {
-    super.didChangeDependencies();
-    // DataProviderのリスナーを設定
-    final newDataProvider = context.read<DataProvider>();
-    if (_dataProvider != newDataProvider) {
-      // 古いリスナーを削除
-      if (_dataProvider != null && _dataProviderListener != null) {
-        _dataProvider!.removeListener(_dataProviderListener!);
-      }
-      // 新しいリスナーを設定
-      _dataProvider = newDataProvider;
-      _dataProviderListener = _onDataProviderChanged;
-      _dataProvider!.addListener(_dataProviderListener!);
-    }
-  }
+  void didUpdateWidget(BottomSummaryWidget oldWidget) {
+    super.didUpdateWidget(oldWidget);
 
-  void _onDataProviderChanged() {
-    // DataProviderの変更を検出してUIをリフレッシュ
-    if (mounted) {
-      _refreshData();
+    // 合計は集計値の購読で更新されるため、ここでは予算の再読み込みのみ行う
+    if (oldWidget.shop.id != widget.shop.id ||
+        oldWidget.shop.budget != widget.shop.budget) {
+      _loadStoredBudget();
     }
   }
 
-  @override
-  void dispose() {
-    // DataProviderのリスナーを削除
-    if (_dataProvider != null && _dataProviderListener != null) {
-      _dataProvider!.removeListener(_dataProviderListener!);
-    }
-    super.dispose();
-  }
+  Future<void> _loadStoredBudget() async {
+    final String shopId = widget.shop.id;
+    try {
+      final budget = await SettingsPersistence.loadTabBudget(shopId);
+      if (!mounted || shopId != widget.shop.id) return;
 
-  /// アイテムリストのハッシュを計算（変更検出用）
-  int _calculateItemsHash() {
-    int hash = 0;
-    for (final item in widget.shop.items) {
-      hash ^= item.id.hashCode;
-      hash ^= item.price.hashCode;
-      hash ^= item.quantity.hashCode;
-      hash ^= item.discount.hashCode;
-      hash ^= item.isChecked.hashCode;
+      setState(() {
+        _storedBudgetShopId = shopId;
+        _storedBudget = budget;
+      });
+    } catch (e) {
+      DebugService().logError('タブ予算の読み込みエラー: $e');
     }
-    return hash;
   }
 
-  @override
-  void didUpdateWidget(BottomSummaryWidget oldWidget) {
-    super.didUpdateWidget(oldWidget);
+  /// 個別モードの予算（読み込み完了前はショップの予算を使用）
+  int? get _individualBudget => _storedBudgetShopId == widget.shop.id
+      ? (_storedBudget ?? widget.shop.budget)
+      : widget.shop.budget;
+
+  Widget _buildDetails({
+    required int total,
+    required int? budget,
+    bool isSharedMode = false,
+    int? currentTabTotal,
+  }) {
+    // 予算関連の計算
+    final remainingBudget = budget != null ? budget - total : null;
 
-    final bool shopIdChanged = oldWidget.shop.id != widget.shop.id;
-    final bool sharedTabGroupIdChanged =
-        oldWidget.shop.sharedTabGroupId != widget.shop.sharedTabGroupId;
-    final bool budgetChanged = oldWidget.shop.budget != widget.shop.budget;
-    final int currentItemsHash = _calculateItemsHash();
-    final bool itemsChanged = _lastItemsHash != currentItemsHash;
-
-    if (shopIdChanged) {
-      // タブ切り替え時: ちらつき防止のため、キャッシュをクリアせず新しいデータを取得
-      _currentShopId = widget.shop.id;
-      _lastItemsHash = currentItemsHash;
-      _refreshData();
-    } else if (sharedTabGroupIdChanged || itemsChanged || budgetChanged) {
-      // 同じタブ内でのアイテム変更、共有タブ変更、または予算変更時
-      _lastItemsHash = currentItemsHash;
-      _refreshData();
-    }
+    return BottomSummaryDetails(
+      total: total,
+      budget: budget,
+      over: budget != null && total > budget,
+      remainingBudget: remainingBudget,
+      isNegative: remainingBudget != null && remainingBudget < 0,
+      isSharedMode: isSharedMode,
+      currentTabTotal: currentTabTotal,
+    );
   }
 
-  void _refreshData() {
-    final String shopId = widget.shop.id;
+  /// 予算・合計表示エリア。表示する集計値（現在のタブ、共有時はグループも）のみを購読する
+  Widget _buildSummary(BuildContext context) {
+    final dataProvider = Provider.of<DataProvider>(context, listen: false);
+    final shopTotals = dataProvider.watchShopTotals(widget.shop.id);
     final String? sharedTabGroupId = widget.shop.sharedTabGroupId;
-    _getAllSummaryData().then((data) {
-      if (mounted) {
-        if (shopId != widget.shop.id) return;
-        if (sharedTabGroupId != widget.shop.sharedTabGroupId) return;
-
-        setState(() {
-          _cachedTotal = data['total'] as int;
-          _cachedBudget = data['budget'] as int?;
-          _cachedSharedMode = data['isSharedMode'] as bool;
-          _cachedCurrentTabTotal = data['currentTabTotal'] as int?;
-          _currentShopId = shopId;
-          _cacheInitialized = true;
-        });
-      }
-    });
-  }
 
-  // 現在のショップの即座の合計を計算
-  int _calculateCurrentShopTotal() {
-    int total = 0;
-    for (final item in widget.shop.items.where((e) => e.isChecked)) {
-      final price = (item.price * (1 - item.discount)).round();
-      total += price * item.quantity;
+    if (sharedTabGroupId == null) {
+      return ValueListenableBuilder<ShopTotals>(
+        valueListenable: shopTotals,
+        builder: (context, totals, _) => _buildDetails(
+          total: totals.checkedUnitRoundedTotal,
+          budget: _individualBudget,
+        ),
+      );
     }
-    return total;
-  }
 
-  // 全てのサマリーデータを一度に取得
-  Future<Map<String, dynamic>> _getAllSummaryData() async {
-    try {
-      // 共有タブモードの場合
-      if (widget.shop.sharedTabGroupId != null) {
-        final dataProvider = context.read<DataProvider>();
-        final sharedTotal =
-            dataProvider.getSharedTabTotal(widget.shop.sharedTabGroupId!);
-        final sharedBudget =
-            dataProvider.getSharedTabBudget(widget.shop.sharedTabGroupId!);
-
-        return {
-          'total': sharedTotal,
-          'currentTabTotal': _calculateCurrentShopTotal(),
-          'budget': sharedBudget,
-          'isSharedMode': true,
-        };
-      } else {
-        // 個別モードの場合
-        final total = _calculateCurrentShopTotal();
-        final budget =
-            await SettingsPersistence.loadTabBudget(widget.shop.id) ??
-                widget.shop.budget;
-
-        return {
-          'total': total,
-          'currentTabTotal': null,
-          'budget': budget,
-          'isSharedMode': false,
-        };
-      }
-    } catch (e) {
-      DebugService().logError('サマリーデータ取得エラー: $e');
-      return {
-        'total': _calculateCurrentShopTotal(),
-        'currentTabTotal': null,
-        'budget': widget.shop.budget,
-        'isSharedMode': false,
-      };
-    }
+    return ValueListenableBuilder<ShopTotals>(
+      valueListenable: dataProvider.watchSharedTabTotals(sharedTabGroupId),
+      builder: (context, groupTotals, _) => ValueListenableBuilder<ShopTotals>(
+        valueListenable: shopTotals,
+        builder: (context, totals, _) => _buildDetails(
+          total: groupTotals.checkedTotal,
+          budget: groupTotals.budget,
+          isSharedMode: true,
+          currentTabTotal: totals.checkedUnitRoundedTotal,
+        ),
+      ),
+    );
   }
 
   @override
   Widget build(BuildContext context) {
-    // 即座の計算値を使用（共有モード時は現在のタブのみ計算）
-    final instantTotal = _calculateCurrentShopTotal();
-
-    // キャッシュが初期化されていて、現在のショップに対応するキャッシュの場合はキャッシュを使用
-    // タブ切り替え時はキャッシュ値を維持してちらつきを防止
-    final bool useCache =
-        _cacheInitialized && _currentShopId == widget.shop.id;
-
-    final total = useCache ? (_cachedTotal ?? instantTotal) : instantTotal;
-    final budget = useCache ? _cachedBudget : widget.shop.budget;
-    final isSharedMode = useCache ? (_cachedSharedMode ?? false) : false;
-    final currentTabTotal = useCache ? _cachedCurrentTabTotal : null;
-
-    // 予算関連の計算
-    final over = budget != null && total > budget;
-    final remainingBudget = budget != null ? budget - total : null;
-    final isNegative = remainingBudget != null && remainingBudget < 0;
-
     return Container(
       decoration: BoxDecoration(
         color: Theme.of(context).scaffoldBackgroundColor,
@@ -238,15 +151,7 @@ class _BottomSummaryWidgetState extends State<BottomSummaryWidget> {
           ),
           const SizedBox(height: 10),
           // 予算・合計表示エリア
-          BottomSummaryDetails(
-            total: total,
-            budget: budget,
-            over: over,
-            remainingBudget: remainingBudget,
-            isNegative: isNegative,
-            isSharedMode: isSharedMode,
-            currentTabTotal: currentTabTotal,
-          ),
+          _buildSummary(context),
           const SizedBox(height: 10),
         ],
       ),
@@ -1,3 +1,5 @@
+import 'dart:async';
+
 import 'package:flutter/material.dart';
 import 'package:provider/provider.dart';
 import 'package:maikago/models/list.dart';
@@ -41,6 +43,8 @@ class _RecipeConfirmScreenState extends State<RecipeConfirmScreen> {
   final Map<int, bool> _integrationToggles = {};
   final Map<int, VolumeHandling> _volumeHandlings = {};
   final Map<int, ListItem?> _matchedItems = {};
+  final RecipeParserService _recipeParserService = RecipeParserService();
+  int _matchGeneration = 0;
 
   @override
   void initState() {
@@ -56,40 +60,56 @@ class _RecipeConfirmScreenState extends State<RecipeConfirmScreen> {
     for (int i = 0; i < _ingredients.length; i++) {
       _integrationToggles[i] = true;
       _volumeHandlings[i] = VolumeHandling.addUp;
-      _findMatch(i);
     }
+    unawaited(_findMatches());
   }
 
-  void _findMatch(int index) {
+  /// 各材料と同じ食材の既存アイテムを探す
+  /// 1. 選択中のショップ内のみを対象とする
+  /// 2. 未購入（isChecked == false）のアイテムのみを対象とする
+  /// 材料名で見つからない場合は、解析時に正規化された材料名（normalizedName）でも探す
+  /// 表記ゆれは端末内で判定し、判定できない組み合わせのみサーバーに問い合わせる
+  Future<void> _findMatches() async {
     final dataProvider = Provider.of<DataProvider>(context, listen: false);
-    final ingredient = _ingredients[index];
-    final targetName = ingredient.name.trim();
+    final generation = ++_matchGeneration;
+    final ingredientCount = _ingredients.length;
+    final candidates = dataProvider.items
+        .where((item) => item.shopId == _selectedShopId && !item.isChecked)
+        .toList();
+
+    // 正規化された材料名は代替の検索語として同じ呼び出しで探す
+    final queries = [
+      for (final ingredient in _ingredients) ingredient.name.trim(),
+    ];
+    final fallbackQueries = <int, int>{};
+    for (int i = 0; i < ingredientCount; i++) {
+      final normalizedName = _ingredients[i].normalizedName.trim();
+      if (normalizedName.isNotEmpty && normalizedName != queries[i]) {
+        fallbackQueries[i] = queries.length;
+        queries.add(normalizedName);
+      }
+    }
 
-    // 材料名が空の場合はマッチングしない
-    if (targetName.isEmpty) {
-      _matchedItems[index] = null;
-      return;
+    void applyMatches(List<int?> matches) {
+      // 検索中に材料やショップが変更された場合は古い結果を捨てる
+      if (!mounted || generation != _matchGeneration) return;
+      setState(() {
+        _matchedItems.clear();
+        for (int i = 0; i < ingredientCount; i++) {
+          final fallback = fallbackQueries[i];
+          final match =
+              matches[i] ?? (fallback == null ? null : matches[fallback]);
+          _matchedItems[i] = match == null ? null : candidates[match];
+        }
+      });
     }
 
-    // 単純な名前一致で既存アイテムを探す
-    // 1. 選択中のショップ内のみを対象とする
-    // 2. 未購入（isChecked == false）のアイテムのみを対象とする
-    final matched = dataProvider.items.firstWhere(
-      (item) =>
-          item.shopId == _selectedShopId &&
-          !item.isChecked &&
-          (item.name == targetName ||
-              (ingredient.normalizedName.isNotEmpty &&
-                  item.name == ingredient.normalizedName)),
-      orElse: () =>
-          ListItem(id: '', name: '', quantity: 0, price: 0, shopId: ''),
+    final matches = await _recipeParserService.findMatchingIngredients(
+      queries,
+      [for (final item in candidates) item.name],
+      onLocalMatches: applyMatches,
     );
-
-    if (matched.id.isNotEmpty) {
-      _matchedItems[index] = matched;
-    } else {
-      _matchedItems[index] = null;
-    }
+    applyMatches(matches);
   }
 
   Future<void> _editIngredient(int index) async {
@@ -135,8 +155,8 @@ class _RecipeConfirmScreenState extends State<RecipeConfirmScreen> {
         _ingredients[index].name = result['name']!;
         _ingredients[index].quantity =
             result['quantity']!.isEmpty ? null : result['quantity'];
-        _findMatch(index);
       });
+      unawaited(_findMatches());
     }
   }
 
@@ -158,12 +178,10 @@ class _RecipeConfirmScreenState extends State<RecipeConfirmScreen> {
       _integrationToggles.addAll(newToggles);
       _volumeHandlings.clear();
       _volumeHandlings.addAll(newVolume);
-
-      // 再検索
-      for (int i = 0; i < _ingredients.length; i++) {
-        _findMatch(i);
-      }
+      _matchedItems.clear();
     });
+    // 再検索
+    unawaited(_findMatches());
   }
 
   Future<void> _onAdd() async {
@@ -283,11 +301,9 @@ class _RecipeConfirmScreenState extends State<RecipeConfirmScreen> {
                   onChanged: (val) {
                     setState(() {
                       _selectedShopId = val;
-                      // ショップを選択し直した場合は、各材料の既存一致を再検索する
-                      for (int i = 0; i < _ingredients.length; i++) {
-                        _findMatch(i);
-                      }
                     });
+                    // ショップを選択し直した場合は、各材料の既存一致を再検索する
+                    unawaited(_findMatches());
                   },
                 ),
               ),
@@ -0,0 +1,189 @@
+// Firestore書き込みをWriteBatchにまとめるパイプライン
+import 'dart:async';
+import 'package:maikago/services/debug_service.dart';
+
+/// バッチに積む1件の書き込み（`set(merge: true)` または削除）
+class BatchWriteOp {
+  const BatchWriteOp.merge(this.path, Map<String, dynamic> this.data);
+
+  const BatchWriteOp.delete(this.path) : data = null;
+
+  /// ドキュメントパス（例: `users/{uid}/items/{itemId}`）
+  final String path;
+
+  /// マージするフィールド。削除の場合は null
+  final Map<String, dynamic>? data;
+
+  bool get isDelete => data == null;
+
+  @override
+  String toString() =>
+      isDelete ? 'BatchWriteOp.delete($path)' : 'BatchWriteOp.merge($path)';
+}
+
+/// 1回のバッチコミットの結果
+class BatchCommitReport {
+  const BatchCommitReport({
+    required this.opCount,
+    required this.collapsedCount,
+    required this.latency,
+    this.error,
+  });
+
+  /// コミットした書き込み件数
+  final int opCount;
+
+  /// 同一ドキュメントへの書き込みとして集約された件数（フラッシュの先頭バッチにのみ計上）
+  final int collapsedCount;
+
+  /// コミットに要した時間
+  final Duration latency;
+
+  /// 失敗時のエラー（成功時は null）
+  final Object? error;
+
+  bool get isSuccess => error == null;
+}
+
+/// Firestore への書き込みを [window] の間バッファし、WriteBatch にまとめてコミットする。
+/// - 1コミットあたり最大 [maxOpsPerBatch] 件（Firestore の上限は500件）
+/// - 同一ドキュメントへの連続したマージは1件に集約し、削除は以前の書き込みを置き換える
+/// - コミットごとの件数とレイテンシを [onBatchCommitted] とログに報告する
+///
+/// 実際のコミット処理は [commit] として注入するため、テストではフェイクに差し替えられる。
+class BatchWritePipeline {
+  BatchWritePipeline({
+    required Future<void> Function(List<BatchWriteOp> ops) commit,
+    this.window = const Duration(milliseconds: 100),
+    this.maxOpsPerBatch = 500,
+    this.onBatchCommitted,
+  })  : assert(maxOpsPerBatch > 1),
+        _commit = commit;
+
+  final Future<void> Function(List<BatchWriteOp> ops) _commit;
+  final Duration window;
+  final int maxOpsPerBatch;
+  final void Function(BatchCommitReport report)? onBatchCommitted;
+
+  // ドキュメントパス → 保留中の書き込み（削除 → マージの順で最大2件）
+  final Map<String, List<BatchWriteOp>> _pending = {};
+  final Map<String, List<Completer<void>>> _waiters = {};
+  int _collapsedCount = 0;
+  Timer? _timer;
+  Future<void> _lastFlush = Future.value();
+
+  /// 保留中の書き込み件数
+  int get pendingOpCount =>
+      _pending.values.fold(0, (sum, ops) => sum + ops.length);
+
+  /// 書き込みを登録し、その書き込みを含むバッチのコミット完了を待つ
+  Future<void> enqueue(BatchWriteOp op) => enqueueAll([op]);
+
+  /// 複数の書き込みを登録し、すべてのコミット完了を待つ
+  Future<void> enqueueAll(Iterable<BatchWriteOp> ops) {
+    final futures = <Future<void>>[];
+    for (final op in ops) {
+      _collapse(op);
+      final completer = Completer<void>();
+      (_waiters[op.path] ??= []).add(completer);
+      futures.add(completer.future);
+    }
+    if (futures.isEmpty) return Future.value();
+
+    _timer ??= Timer(window, () => unawaited(flush()));
+    return Future.wait(futures);
+  }
+
+  /// 保留中の書き込みを直ちにコミットする
+  Future<void> flush() {
+    _timer?.cancel();
+    _timer = null;
+    if (_pending.isEmpty) return _lastFlush;
+
+    final pending = Map.of(_pending);
+    final waiters = Map.of(_waiters);
+    final collapsedCount = _collapsedCount;
+    _pending.clear();
+    _waiters.clear();
+    _collapsedCount = 0;
+
+    return _lastFlush = _lastFlush
+        .then((_) => _commitInBatches(pending, waiters, collapsedCount));
+  }
+
+  void _collapse(BatchWriteOp op) {
+    final ops = _pending[op.path];
+    if (ops == null) {
+      _pending[op.path] = [op];
+      return;
+    }
+
+    _collapsedCount++;
+    if (op.isDelete) {
+      // 削除は以前の書き込みをすべて無効にする
+      _pending[op.path] = [op];
+    } else if (ops.last.isDelete) {
+      // 削除後の再作成は順序を保ったまま2件で送る
+      ops.add(op);
+      _collapsedCount--;
+    } else {
+      ops[ops.length - 1] =
+          BatchWriteOp.merge(op.path, {...?ops.last.data, ...op.data!});
+    }
+  }
+
+  Future<void> _commitInBatches(
+    Map<String, List<BatchWriteOp>> pending,
+    Map<String, List<Completer<void>>> waiters,
+    int collapsedCount,
+  ) async {
+    // 同一ドキュメントの書き込みは同じバッチに収める
+    final batches = <List<String>>[[]];
+    var batchOpCount = 0;
+    for (final entry in pending.entries) {
+      if (batchOpCount + entry.value.length > maxOpsPerBatch) {
+        batches.add([]);
+        batchOpCount = 0;
+      }
+      batches.last.add(entry.key);
+      batchOpCount += entry.value.length;
+    }
+
+    for (final (index, paths) in batches.indexed) {
+      final ops = [for (final path in paths) ...pending[path]!];
+      final stopwatch = Stopwatch()..start();
+      Object? error;
+      try {
+        await _commit(ops);
+      } catch (e) {
+        error = e;
+      }
+      stopwatch.stop();
+
+      final report = BatchCommitReport(
+        opCount: ops.length,
+        collapsedCount: index == 0 ? collapsedCount : 0,
+        latency: stopwatch.elapsed,
+        error: error,
+      );
+      onBatchCommitted?.call(report);
+      if (error == null) {
+        DebugService().logDebug(
+            'バッチコミット完了: ${ops.length}件（集約${report.collapsedCount}件）'
+            ' ${stopwatch.elapsedMilliseconds}ms');
+      } else {
+        DebugService().logError('バッチコミットエラー: ${ops.length}件 - $error');
+      }
+
+      for (final path in paths) {
+        for (final completer in waiters[path] ?? const <Completer<void>>[]) {
+          if (error == null) {
+            completer.complete();
+          } else {
+            completer.completeError(error);
+          }
+        }
+      }
+    }
+  }
+}
@@ -0,0 +1,43 @@
+// Firestoreスナップショットの差分（docChanges）をモデル化
+import 'package:cloud_firestore/cloud_firestore.dart';
+
+/// ドキュメント差分の種類
+enum DataChangeType { added, modified, removed }
+
+/// 1ドキュメント分の差分。
+/// [data] は added/modified の場合のみデコード済みの値を持つ（removed は null）。
+class DataChange<T> {
+  const DataChange({
+    required this.type,
+    required this.id,
+    this.data,
+  });
+
+  /// Firestoreの [DocumentChange] から差分を生成する。
+  /// removed の場合はデコードを省略し、IDのみを保持する。
+  factory DataChange.fromDocumentChange(
+    DocumentChange<Map<String, dynamic>> change,
+    T Function(Map<String, dynamic> map) decode,
+  ) {
+    final doc = change.doc;
+    switch (change.type) {
+      case DocumentChangeType.added:
+      case DocumentChangeType.modified:
+        final map = doc.data() ?? <String, dynamic>{};
+        map['id'] = doc.id;
+        return DataChange(
+          type: change.type == DocumentChangeType.added
+              ? DataChangeType.added
+              : DataChangeType.modified,
+          id: doc.id,
+          data: decode(map),
+        );
+      case DocumentChangeType.removed:
+        return DataChange(type: DataChangeType.removed, id: doc.id);
+    }
+  }
+
+  final DataChangeType type;
+  final String id;
+  final T? data;
+}
@@ -4,6 +4,7 @@ import 'package:firebase_auth/firebase_auth.dart';
 import 'package:shared_preferences/shared_preferences.dart';
 import 'package:firebase_core/firebase_core.dart';
 import 'package:uuid/uuid.dart';
+import 'package:maikago/services/data/batch_write_pipeline.dart';
 
 /// DataService系クラスの共通基盤。
 /// Firebase接続チェック・コレクション参照・匿名セッション管理を提供する。
@@ -15,6 +16,24 @@ class DataServiceBase {
   FirebaseAuth get auth => FirebaseAuth.instance;
   static const String anonymousSessionKey = 'anonymous_session_id';
 
+  /// 一括書き込み用パイプライン（WriteBatchへの集約）
+  late final BatchWritePipeline writePipeline =
+      BatchWritePipeline(commit: commitWriteBatch);
+
+  /// パイプラインの書き込みを1つのWriteBatchとしてコミット
+  Future<void> commitWriteBatch(List<BatchWriteOp> ops) async {
+    final batch = firestore.batch();
+    for (final op in ops) {
+      final docRef = firestore.doc(op.path);
+      if (op.isDelete) {
+        batch.delete(docRef);
+      } else {
+        batch.set(docRef, op.data!, SetOptions(merge: true));
+      }
+    }
+    await batch.commit();
+  }
+
   /// Firebaseが利用可能かチェック
   bool get isFirebaseAvailable {
     try {
@@ -4,6 +4,8 @@ import 'dart:async'; // TimeoutException用
 import 'package:maikago/models/list.dart';
 import 'package:maikago/services/debug_service.dart';
 import 'package:maikago/utils/exceptions.dart';
+import 'package:maikago/services/data/batch_write_pipeline.dart';
+import 'package:maikago/services/data/data_change.dart';
 import 'package:maikago/services/data/data_service_base.dart';
 
 /// Item（リスト項目）に対するCRUD操作を提供するmixin。
@@ -65,6 +67,37 @@ mixin ItemDataOperations on DataServiceBase {
     await collection.doc(itemId).delete();
   }
 
+  /// 複数のリストを一括更新（存在しない場合は作成）
+  ///
+  /// [writePipeline] 経由で WriteBatch（最大500件）にまとめてコミットする。
+  /// 同じウィンドウ内の同一アイテムへの書き込みは1件に集約される。
+  Future<void> updateItemsBatch(List<ListItem> items,
+      {bool isAnonymous = false}) async {
+    // Firebaseが利用できない場合はスキップ
+    if (!isFirebaseAvailable || items.isEmpty) return;
+
+    final collection =
+        isAnonymous ? await anonymousItemsCollection : userItemsCollection;
+
+    await writePipeline.enqueueAll(items.map((item) =>
+        BatchWriteOp.merge(collection.doc(item.id).path, item.toMap())));
+  }
+
+  /// 複数のリストを一括削除（存在しない場合は何もしない）
+  ///
+  /// [writePipeline] 経由で WriteBatch（最大500件）にまとめてコミットする。
+  Future<void> deleteItemsBatch(List<String> itemIds,
+      {bool isAnonymous = false}) async {
+    // Firebaseが利用できない場合はスキップ
+    if (!isFirebaseAvailable || itemIds.isEmpty) return;
+
+    final collection =
+        isAnonymous ? await anonymousItemsCollection : userItemsCollection;
+
+    await writePipeline.enqueueAll(itemIds
+        .map((itemId) => BatchWriteOp.delete(collection.doc(itemId).path)));
+  }
+
   /// すべてのリストを取得（リアルタイム購読）
   Stream<List<ListItem>> getItems({bool isAnonymous = false}) {
     // Firebaseが利用できない場合は空のストリームを返す
@@ -98,6 +131,39 @@ mixin ItemDataOperations on DataServiceBase {
     }
   }
 
+  /// リストの差分を購読（リアルタイム購読・差分のみデコード）
+  ///
+  /// [getItems] と異なり、スナップショットごとに全件を [ListItem.fromMap] せず
+  /// `snapshot.docChanges` に含まれる追加/更新/削除分のみを流す。
+  /// 購読開始直後の最初のイベントには既存の全ドキュメントが added として含まれる。
+  Stream<List<DataChange<ListItem>>> getItemChanges(
+      {bool isAnonymous = false}) {
+    // Firebaseが利用できない場合は空のストリームを返す
+    if (!isFirebaseAvailable) return Stream.value([]);
+
+    List<DataChange<ListItem>> toChanges(
+        QuerySnapshot<Map<String, dynamic>> snapshot) {
+      return snapshot.docChanges
+          .map((change) =>
+              DataChange<ListItem>.fromDocumentChange(change, ListItem.fromMap))
+          .toList();
+    }
+
+    if (isAnonymous) {
+      return Stream.fromFuture(anonymousItemsCollection).asyncExpand(
+        (collection) => collection
+            .orderBy('createdAt', descending: true)
+            .snapshots()
+            .map(toChanges),
+      );
+    } else {
+      return userItemsCollection
+          .orderBy('createdAt', descending: true)
+          .snapshots()
+          .map(toChanges);
+    }
+  }
+
   /// すべてのリストを取得（一度だけ）
   Future<List<ListItem>> getItemsOnce({bool isAnonymous = false}) async {
     // Firebaseが利用できない場合は空のリストを返す
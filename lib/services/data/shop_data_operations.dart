@@ -4,6 +4,7 @@ import 'dart:async'; // TimeoutException用
 import 'package:maikago/models/shop.dart';
 import 'package:maikago/services/debug_service.dart';
 import 'package:maikago/utils/exceptions.dart';
+import 'package:maikago/services/data/batch_write_pipeline.dart';
 import 'package:maikago/services/data/data_service_base.dart';
 
 /// Shop（ショップ）に対するCRUD操作を提供するmixin。
@@ -44,19 +45,31 @@ mixin ShopDataOperations on DataServiceBase {
       collection = userShopsCollection;
     }
 
-    // null値を明示的に削除するためにFieldValue.delete()を使用
-    final updateData = <String, dynamic>{};
-    final shopMap = shop.toMap();
-    shopMap.forEach((key, value) {
-      if (value == null) {
-        updateData[key] = FieldValue.delete();
-      } else {
-        updateData[key] = value;
-      }
-    });
-
     // set(merge: true) で存在確認不要（存在すれば更新、なければ作成）
-    await collection.doc(shop.id).set(updateData, SetOptions(merge: true));
+    await collection
+        .doc(shop.id)
+        .set(_shopUpdateData(shop), SetOptions(merge: true));
+  }
+
+  /// ショップを一括書き込みパイプライン経由で更新（存在しない場合は作成）
+  ///
+  /// [updateShop] と同じ内容を [writePipeline] に積み、同じウィンドウ内の
+  /// アイテム更新（`updateItemsBatch`）と1つの WriteBatch でコミットする。
+  Future<void> updateShopBatch(Shop shop, {bool isAnonymous = false}) async {
+    // Firebaseが利用できない場合はスキップ
+    if (!isFirebaseAvailable) return;
+
+    final collection =
+        isAnonymous ? await anonymousShopsCollection : userShopsCollection;
+
+    await writePipeline.enqueue(
+        BatchWriteOp.merge(collection.doc(shop.id).path, _shopUpdateData(shop)));
+  }
+
+  /// 更新用のフィールド（null値を明示的に削除するためにFieldValue.delete()を使用）
+  Map<String, dynamic> _shopUpdateData(Shop shop) {
+    return shop.toMap().map((key, value) =>
+        MapEntry(key, value ?? FieldValue.delete()));
   }
 
   /// ショップを削除（存在しない場合は何もしない）
@@ -7,6 +7,8 @@ import 'package:maikago/services/data/item_data_operations.dart';
 import 'package:maikago/services/data/shop_data_operations.dart';
 
 // モデルの再エクスポート（既存のインポートとの互換性維持）
+export 'package:maikago/services/data/batch_write_pipeline.dart';
+export 'package:maikago/services/data/data_change.dart';
 export 'package:maikago/services/data/data_service_base.dart';
 export 'package:maikago/services/data/item_data_operations.dart';
 export 'package:maikago/services/data/shop_data_operations.dart';
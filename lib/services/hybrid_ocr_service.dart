@@ -1,46 +1,56 @@
+import 'dart:async';
 import 'dart:io';
-import 'package:crypto/crypto.dart';
 import 'package:maikago/config.dart';
+import 'package:maikago/services/ocr_result_cache.dart';
 import 'package:maikago/services/vision_ocr_service.dart';
 import 'package:maikago/services/debug_service.dart';
 
 class HybridOcrService {
+  HybridOcrService({OcrResultCache? cache}) : _cache = cache ?? _sharedCache;
+
+  // 画面をまたいで同じキャッシュを使う（永続化先も共通）
+  static final OcrResultCache _sharedCache = OcrResultCache();
+
   final VisionOcrService _visionService = VisionOcrService();
 
-  // キャッシュ用のMap（メモリ内キャッシュ）
-  final Map<String, OcrItemResult> _cache = {};
-  static const int _maxCacheSize = 100; // 最大キャッシュ数を50から100に増加
+  // OCR結果の永続キャッシュ（LRU・TTL・似た値札の候補探索）
+  final OcrResultCache _cache;
 
   /// Vision API専用OCRサービスの初期化
   Future<void> initialize() async {
     // Cloud Functions OCRサービス初期化
   }
 
-  /// 画像のハッシュ値を計算
-  String _calculateImageHash(File image) {
-    final bytes = image.readAsBytesSync();
-    final hash = sha256.convert(bytes);
-    return hash.toString();
-  }
-
   /// Cloud Functions経由で商品情報を抽出
   Future<OcrItemResult?> detectItemFromImage(File image,
       {OcrProgressCallback? onProgress}) async {
     try {
       onProgress?.call(OcrProgressStep.initializing, 'OCR解析を初期化中...');
 
-      // キャッシュチェック
-      final imageHash = _calculateImageHash(image);
-      if (_cache.containsKey(imageHash)) {
-        onProgress?.call(OcrProgressStep.completed, 'キャッシュから結果を取得');
-        return _cache[imageHash];
-      }
-
       onProgress?.call(OcrProgressStep.imageOptimization, '画像を最適化中...');
 
+      // 前処理と同じisolateでキャッシュキーを計算し、送信用の画像も使い回す
+      final preprocessed = await _visionService.preprocessImage(image);
+      final fingerprint = preprocessed == null
+          ? null
+          : OcrImageFingerprint.fromPreprocessResult(preprocessed);
+
+      OcrItemResult? hint;
+      if (fingerprint != null) {
+        final cached = await _cache.lookup(fingerprint);
+        if (cached != null) {
+          onProgress?.call(OcrProgressStep.completed, 'キャッシュから結果を取得');
+          return cached;
+        }
+        // 似た値札の結果は価格が違うことがあるため、そのまま返さず
+        // サーバー側でOCRテキストと照合するヒントとしてのみ渡す
+        hint = await _cache.findSimilar(fingerprint);
+      }
+
       // Cloud Functions経由で実行
       final result = await _visionService
-          .detectItemFromImage(image, onProgress: onProgress)
+          .detectItemFromImage(image,
+              onProgress: onProgress, preprocessed: preprocessed, hint: hint)
           .timeout(
         const Duration(seconds: cloudFunctionsTimeoutSeconds),
         onTimeout: () {
@@ -51,7 +61,7 @@ class HybridOcrService {
 
       if (result != null) {
         onProgress?.call(OcrProgressStep.completed, 'Cloud Functionsで解析完了');
-        _addToCache(imageHash, result);
+        if (fingerprint != null) await _cache.put(fingerprint, result);
         return result;
       }
 
@@ -71,33 +81,73 @@ class HybridOcrService {
     return detectItemFromImage(image, onProgress: onProgress);
   }
 
-  /// キャッシュに結果を追加（LRU方式）
-  void _addToCache(String imageHash, OcrItemResult result) {
-    // キャッシュサイズ制限チェック
-    if (_cache.length >= _maxCacheSize) {
-      // 最も古いエントリを削除（簡易的なLRU）
-      final oldestKey = _cache.keys.first;
-      _cache.remove(oldestKey);
-    }
+  /// 複数の値札画像をまとめて解析（キャッシュにない画像のみ1回の呼び出しで送信）
+  /// 画像ごとの結果は確定した順に [onResult] へ通知し、最後に入力順の結果を返す。
+  Future<List<OcrItemResult?>> detectItemsFromImages(List<File> images,
+      {OcrProgressCallback? onProgress,
+      OcrBatchResultCallback? onResult}) async {
+    final results = List<OcrItemResult?>.filled(images.length, null);
+    try {
+      onProgress?.call(OcrProgressStep.initializing, 'OCR解析を初期化中...');
 
-    _cache[imageHash] = result;
-  }
+      // キャッシュチェック（ハッシュは前処理と同じisolateで計算）
+      // 前処理は共有の OcrImagePreprocessor で同時実行数を抑え、結果は送信にも使い回す
+      final preprocessed = await Future.wait(
+          images.map((image) => _visionService.preprocessImage(image)));
+      final fingerprints = [
+        for (final result in preprocessed)
+          result == null
+              ? null
+              : OcrImageFingerprint.fromPreprocessResult(result),
+      ];
+      final pending = <int>[];
+      for (int i = 0; i < images.length; i++) {
+        final fingerprint = fingerprints[i];
+        final cached =
+            fingerprint == null ? null : await _cache.lookup(fingerprint);
+        if (cached != null) {
+          results[i] = cached;
+          onResult?.call(i, cached);
+        } else {
+          pending.add(i);
+        }
+      }
 
-  /// キャッシュをクリア
-  void clearCache() {
-    _cache.clear();
-  }
+      if (pending.isEmpty) {
+        onProgress?.call(OcrProgressStep.completed, 'キャッシュから結果を取得');
+        return results;
+      }
 
-  /// キャッシュ統計を取得
-  Map<String, dynamic> getCacheStats() {
-    return {
-      'size': _cache.length,
-      'maxSize': _maxCacheSize,
-      'keys': _cache.keys.toList(),
-    };
+      await _visionService.detectItemsFromImages(
+        [for (final i in pending) images[i]],
+        preprocessed: [for (final i in pending) preprocessed[i]],
+        onProgress: onProgress,
+        onResult: (index, result) {
+          final original = pending[index];
+          results[original] = result;
+          final fingerprint = fingerprints[original];
+          if (result != null && fingerprint != null) {
+            unawaited(_cache.put(fingerprint, result));
+          }
+          onResult?.call(original, result);
+        },
+      );
+      return results;
+    } catch (e) {
+      onProgress?.call(OcrProgressStep.failed, 'エラーが発生しました');
+      DebugService().logError('OCR一括解析エラー: $e');
+      return results;
+    }
   }
 
+  /// キャッシュをクリア（保存済みの結果も削除）
+  Future<void> clearCache() => _cache.clear();
+
+  /// キャッシュ統計を取得（件数・上限・ヒット/ミス数・ヒット率）
+  Map<String, dynamic> getCacheStats() => _cache.stats();
+
+  /// 画面破棄時に呼ぶ。キャッシュは再利用のため破棄せず、未保存分を書き出す
   void dispose() {
-    clearCache();
+    unawaited(_cache.flush());
   }
 }
@@ -0,0 +1,207 @@
+// 材料名の正規化と、表記ゆれを端末内で判定するための索引
+
+/// 同じ食材を指す表記のグループ（先頭が代表表記）
+/// ひらがな/カタカナの違いは正規化で吸収されるため、漢字表記と別名を中心に登録する
+const List<List<String>> ingredientSynonymGroups = [
+  ['玉ねぎ', '玉葱', 'たまねぎ', 'オニオン'],
+  ['じゃがいも', 'じゃが芋', '馬鈴薯', 'ポテト'],
+  ['にんじん', '人参', 'キャロット'],
+  ['長ねぎ', '長葱', '白ねぎ', '白葱', '根深ねぎ'],
+  ['ねぎ', '葱'],
+  ['青ねぎ', '青葱', '万能ねぎ', '小ねぎ', '小葱'],
+  ['大根', 'だいこん'],
+  ['白菜', 'はくさい'],
+  ['ほうれん草', 'ほうれんそう'],
+  ['きゅうり', '胡瓜'],
+  ['なす', '茄子', 'なすび'],
+  ['しいたけ', '椎茸'],
+  ['しょうが', '生姜', 'ジンジャー'],
+  ['にんにく', '大蒜', 'ガーリック'],
+  ['卵', '玉子', 'たまご', '鶏卵'],
+  ['牛乳', 'ミルク'],
+  ['豚肉', 'ぶた肉', 'ポーク'],
+  ['牛肉', 'ぎゅう肉', 'ビーフ'],
+  ['鶏肉', 'とり肉', '鳥肉', 'チキン'],
+  ['ひき肉', '挽肉', '挽き肉', 'ミンチ'],
+  ['鮭', 'しゃけ', 'サーモン'],
+  ['米', 'お米', '白米'],
+  ['醤油', '醬油', 'しょうゆ', 'しょう油'],
+  ['砂糖', 'さとう', '上白糖'],
+  ['塩', 'しお', '食塩'],
+  ['酒', '料理酒', '日本酒'],
+  ['みりん', '味醂', '本みりん'],
+  ['味噌', 'みそ'],
+  ['酢', '米酢', '穀物酢'],
+  ['胡椒', 'こしょう'],
+  ['ごま油', '胡麻油'],
+  ['サラダ油', '植物油'],
+  ['小麦粉', '薄力粉'],
+  ['片栗粉', 'かたくり粉'],
+  ['ケチャップ', 'トマトケチャップ'],
+  ['マヨネーズ', 'マヨ'],
+];
+
+// 全角英数字・記号（！〜～）
+const int _fullWidthStart = 0xFF01;
+const int _fullWidthEnd = 0xFF5E;
+const int _fullWidthOffset = 0xFEE0;
+
+// ひらがな（ぁ〜ゖ）→ カタカナ
+const int _hiraganaStart = 0x3041;
+const int _hiraganaEnd = 0x3096;
+const int _kanaOffset = 0x60;
+
+final RegExp _bracketPattern = RegExp(r'\([^)]*\)|\[[^\]]*\]|【[^】]*】');
+final RegExp _quantityPattern = RegExp(
+  r'[0-9½¼¾]+(?:[./][0-9]+)?\s*(?:[~〜\-][0-9]+(?:[./][0-9]+)?)?\s*'
+  r'(?:kg|mg|g|ml|cc|l|個|本|枚|片|束|袋|パック|缶|合|玉|株|房|切レ|切|尾|杯|丁|カケ|粒|ツ|ケ)?',
+);
+final RegExp _measurePattern = RegExp(
+  r'(?:大サジ|小サジ)\s*[0-9½¼¾./]*|カップ\s*[0-9½¼¾./]+'
+  r'|適量|適宜|少々|少量|オ好ミデ|ヒトツマミ',
+);
+final RegExp _separatorPattern =
+    RegExp(r'''[\s・、。,.!?:;/\-~〜「」『』"'※]''');
+
+/// 表記の違いを吸収する（全角→半角、ひらがな→カタカナ、小文字化、
+/// 括弧書き・分量・単位・区切り記号の除去）
+String foldIngredientName(String name) {
+  final buffer = StringBuffer();
+  for (final rune in name.runes) {
+    if (rune >= _fullWidthStart && rune <= _fullWidthEnd) {
+      buffer.writeCharCode(rune - _fullWidthOffset);
+    } else if (rune == 0x3000) {
+      buffer.write(' ');
+    } else if (rune >= _hiraganaStart && rune <= _hiraganaEnd) {
+      buffer.writeCharCode(rune + _kanaOffset);
+    } else {
+      buffer.writeCharCode(rune);
+    }
+  }
+
+  return buffer
+      .toString()
+      .toLowerCase()
+      .replaceAll(_bracketPattern, '')
+      .replaceAll(_measurePattern, '')
+      .replaceAll(_quantityPattern, '')
+      .replaceAll(_separatorPattern, '');
+}
+
+final Map<String, String> _synonymIndex = {
+  for (final group in ingredientSynonymGroups)
+    for (final name in group)
+      foldIngredientName(name): foldIngredientName(group.first),
+};
+
+/// 材料名を比較用のキーに正規化する（同じ食材を指す表記は同じキーになる）
+/// 分量や単位だけで材料名が残らない場合は空文字
+String normalizeIngredientName(String name) {
+  final folded = foldIngredientName(name);
+  return _synonymIndex[folded] ?? folded;
+}
+
+/// 正規化キーを文字bigramに分割する（1文字の場合はその文字）
+Set<String> _ngramsOf(String key) {
+  if (key.length < 2) return {key};
+  return {for (int i = 0; i < key.length - 1; i++) key.substring(i, i + 2)};
+}
+
+/// [IngredientIndex.lookup] の結果
+class IngredientLookup {
+  const IngredientLookup({
+    required this.key,
+    this.sameIndex,
+    this.ambiguousIndexes = const [],
+  });
+
+  /// 問い合わせた材料名の正規化キー
+  final String key;
+
+  /// 正規化キーが一致した候補（同じ食材と確定）
+  final int? sameIndex;
+
+  /// 端末内では判定できなかった候補（似ている順）
+  final List<int> ambiguousIndexes;
+}
+
+/// 候補の材料名を正規化キーと文字bigramで索引し、材料名ごとに
+/// 「同じ」「違う」「判定できない」を振り分ける。
+/// - 正規化キーが一致 → 同じ
+/// - bigramのDice係数が [ambiguousThreshold] 以上、または一方が他方を含む → 判定できない
+/// - それ以外 → 違う
+class IngredientIndex {
+  IngredientIndex(
+    Iterable<String> names, {
+    this.ambiguousThreshold = 0.4,
+    this.maxAmbiguousCandidates = 3,
+  }) {
+    for (final name in names) {
+      final index = _keys.length;
+      final key = normalizeIngredientName(name);
+      _keys.add(key);
+      if (key.isEmpty) continue;
+
+      _indexesByKey.putIfAbsent(key, () => index);
+      final grams = _ngramsOf(key);
+      _gramsByIndex[index] = grams;
+      for (final gram in grams) {
+        (_indexesByGram[gram] ??= []).add(index);
+      }
+    }
+  }
+
+  final double ambiguousThreshold;
+  final int maxAmbiguousCandidates;
+
+  final List<String> _keys = [];
+  final Map<String, int> _indexesByKey = {};
+  final Map<String, List<int>> _indexesByGram = {};
+  final Map<int, Set<String>> _gramsByIndex = {};
+
+  /// 候補 [index] の正規化キー
+  String keyAt(int index) => _keys[index];
+
+  /// 材料名に対応する候補を探す
+  IngredientLookup lookup(String name) {
+    final key = normalizeIngredientName(name);
+    if (key.isEmpty) return IngredientLookup(key: key);
+
+    final sameIndex = _indexesByKey[key];
+    if (sameIndex != null) {
+      return IngredientLookup(key: key, sameIndex: sameIndex);
+    }
+
+    // 共通するbigramを持つ候補のみを比較する
+    final grams = _ngramsOf(key);
+    final shared = <int, int>{};
+    for (final gram in grams) {
+      for (final index in _indexesByGram[gram] ?? const <int>[]) {
+        shared[index] = (shared[index] ?? 0) + 1;
+      }
+    }
+
+    final scored = <(int, double)>[];
+    final seenKeys = <String>{};
+    shared.forEach((index, count) {
+      final candidateKey = _keys[index];
+      if (!seenKeys.add(candidateKey)) return;
+
+      final dice = 2 * count / (grams.length + _gramsByIndex[index]!.length);
+      final contains = key.length >= 2 &&
+          candidateKey.length >= 2 &&
+          (key.contains(candidateKey) || candidateKey.contains(key));
+      if (dice >= ambiguousThreshold || contains) {
+        scored.add((index, dice));
+      }
+    });
+    scored.sort((a, b) => b.$2.compareTo(a.$2));
+
+    return IngredientLookup(
+      key: key,
+      ambiguousIndexes: [
+        for (final (index, _) in scored.take(maxAmbiguousCandidates)) index,
+      ],
+    );
+  }
+}
@@ -0,0 +1,250 @@
+// OCR送信前の画像前処理（バックグラウンドisolateで実行）
+import 'dart:async';
+import 'dart:collection';
+import 'dart:math' as math;
+import 'dart:typed_data';
+import 'package:crypto/crypto.dart';
+import 'package:flutter/foundation.dart';
+import 'package:image/image.dart' as img;
+import 'package:maikago/config.dart';
+
+/// 切り抜き範囲（向き補正後の画像に対する 0.0〜1.0 の割合）
+/// カメラ画面のガイド枠など、値札が写っている範囲を指定する。
+class OcrCropRegion {
+  const OcrCropRegion({
+    required this.left,
+    required this.top,
+    required this.width,
+    required this.height,
+  });
+
+  final double left;
+  final double top;
+  final double width;
+  final double height;
+}
+
+/// 前処理の設定
+class OcrPreprocessOptions {
+  const OcrPreprocessOptions({
+    this.maxSize = maxImageSize,
+    this.quality = imageQuality,
+    this.contrast = 1.15,
+    this.cropRegion,
+  });
+
+  /// 出力画像の長辺の最大ピクセル数
+  final int maxSize;
+
+  /// JPEG品質（0-100）
+  final int quality;
+
+  /// コントラスト（1.0 = 無変化）
+  final num contrast;
+
+  /// 切り抜き範囲（null の場合は画像全体）
+  final OcrCropRegion? cropRegion;
+}
+
+/// 前処理の結果
+class OcrPreprocessResult {
+  const OcrPreprocessResult({
+    required this.bytes,
+    required this.width,
+    required this.height,
+    required this.originalWidth,
+    required this.originalHeight,
+    required this.contentHash,
+    required this.perceptualHash,
+    required this.stageTimings,
+  });
+
+  /// 前処理後のJPEGデータ
+  final Uint8List bytes;
+
+  final int width;
+  final int height;
+  final int originalWidth;
+  final int originalHeight;
+
+  /// 元画像データのSHA-256（OCRキャッシュの完全一致用）
+  final String contentHash;
+
+  /// 前処理後の画像の知覚ハッシュ（[computeOcrPerceptualHash]、OCRキャッシュのあいまい一致用）
+  final Uint8List perceptualHash;
+
+  /// 工程ごとの処理時間（decode / resize / orient / crop / grayscale / contrast /
+  /// fingerprint / encode）
+  final Map<String, Duration> stageTimings;
+}
+
+/// 画像を前処理する（isolate で実行する想定）。デコードできない場合は null
+///
+/// 処理はすべて縮小後の画像に対して行う。
+/// 1. デコード
+/// 2. 縮小（切り抜き後の長辺が [OcrPreprocessOptions.maxSize] 以下になる倍率）
+/// 3. EXIFの向きを反映
+/// 4. 切り抜き
+/// 5. グレースケール化 + コントラスト強調
+/// 6. キャッシュキー（元データのSHA-256と前処理後の画像の知覚ハッシュ）の計算
+/// 7. JPEGエンコード
+OcrPreprocessResult? preprocessOcrImage(
+    (Uint8List bytes, OcrPreprocessOptions options) request) {
+  final (bytes, options) = request;
+  final timings = <String, Duration>{};
+  final stopwatch = Stopwatch()..start();
+
+  T stage<T>(String name, T Function() run) {
+    stopwatch.reset();
+    final result = run();
+    timings[name] = stopwatch.elapsed;
+    return result;
+  }
+
+  final decoded = stage('decode', () => img.decodeImage(bytes));
+  if (decoded == null) return null;
+
+  final crop = options.cropRegion;
+  final exif = decoded.exif;
+  final orientation =
+      exif.imageIfd.hasOrientation ? exif.imageIfd.orientation ?? 1 : 1;
+  // 5〜8 は90度回転を含むため、向き補正後は幅と高さが入れ替わる
+  final swapsAxes = orientation >= 5 && orientation <= 8;
+  final orientedWidth = swapsAxes ? decoded.height : decoded.width;
+  final orientedHeight = swapsAxes ? decoded.width : decoded.height;
+
+  // 切り抜き後の長辺を基準に縮小率を決める
+  final targetWidth = orientedWidth * (crop?.width ?? 1.0);
+  final targetHeight = orientedHeight * (crop?.height ?? 1.0);
+  final scale =
+      math.min(1.0, options.maxSize / math.max(targetWidth, targetHeight));
+
+  img.Image working = stage('resize', () {
+    // copyResize は EXIF の向きを先に反映してから指定サイズに縮小するため、
+    // 向きの情報を外して保存時の画素の並びのまま縮小する（向き補正は縮小後に行う）
+    exif.imageIfd.orientation = null;
+    if (scale >= 1.0) return decoded;
+    return img.copyResize(
+      decoded,
+      width: math.max(1, (decoded.width * scale).round()),
+      height: math.max(1, (decoded.height * scale).round()),
+      interpolation: img.Interpolation.linear,
+    );
+  });
+
+  final resized = working;
+  working = stage('orient', () {
+    if (orientation == 1) return resized;
+    resized.exif.imageIfd.orientation = orientation;
+    return img.bakeOrientation(resized);
+  });
+
+  if (crop != null) {
+    final source = working;
+    working = stage('crop', () {
+      final x = (crop.left * source.width).round().clamp(0, source.width - 1);
+      final y = (crop.top * source.height).round().clamp(0, source.height - 1);
+      return img.copyCrop(
+        source,
+        x: x,
+        y: y,
+        width: (crop.width * source.width).round().clamp(1, source.width - x),
+        height:
+            (crop.height * source.height).round().clamp(1, source.height - y),
+      );
+    });
+  }
+
+  working = stage('grayscale', () => img.grayscale(working));
+  working = stage(
+      'contrast', () => img.adjustColor(working, contrast: options.contrast));
+
+  final (contentHash, perceptualHash) = stage(
+      'fingerprint',
+      () => (
+            sha256.convert(bytes).toString(),
+            computeOcrPerceptualHash(working),
+          ));
+
+  final encoded =
+      stage('encode', () => img.encodeJpg(working, quality: options.quality));
+
+  return OcrPreprocessResult(
+    bytes: encoded,
+    width: working.width,
+    height: working.height,
+    originalWidth: orientedWidth,
+    originalHeight: orientedHeight,
+    contentHash: contentHash,
+    perceptualHash: perceptualHash,
+    stageTimings: timings,
+  );
+}
+
+/// 知覚ハッシュのビット数（16x16）
+const int ocrPerceptualHashBits = 256;
+
+/// 画像の知覚ハッシュ（256bitの dHash）
+///
+/// 17x16 に縮小し、横方向に隣接する画素の輝度の大小を 32 バイトに詰める。
+/// 前処理後（切り抜き・グレースケール化後）の画像に対して計算するため、
+/// 値札の範囲外の背景や色味の違いには左右されにくい。
+Uint8List computeOcrPerceptualHash(img.Image image) {
+  final thumbnail = img.copyResize(
+    image,
+    width: 17,
+    height: 16,
+    interpolation: img.Interpolation.average,
+  );
+  final hash = Uint8List(ocrPerceptualHashBits ~/ 8);
+  var bit = 0;
+  for (int y = 0; y < 16; y++) {
+    for (int x = 0; x < 16; x++) {
+      if (_luminance(thumbnail.getPixel(x, y)) >
+          _luminance(thumbnail.getPixel(x + 1, y))) {
+        hash[bit >> 3] |= 0x80 >> (bit & 7);
+      }
+      bit++;
+    }
+  }
+  return hash;
+}
+
+num _luminance(img.Pixel pixel) =>
+    0.299 * pixel.r + 0.587 * pixel.g + 0.114 * pixel.b;
+
+/// 画像の前処理をバックグラウンドisolateで実行する。
+/// 連続撮影時も同時に動くisolateは [maxConcurrent] 個までに抑え、残りは順番待ちにする。
+class OcrImagePreprocessor {
+  OcrImagePreprocessor({this.maxConcurrent = 2}) : assert(maxConcurrent > 0);
+
+  final int maxConcurrent;
+
+  int _running = 0;
+  final Queue<Completer<void>> _waiting = Queue();
+
+  /// 画像を前処理する。デコードできない場合は null
+  Future<OcrPreprocessResult?> process(
+    Uint8List bytes, {
+    OcrPreprocessOptions options = const OcrPreprocessOptions(),
+  }) async {
+    if (_running >= maxConcurrent) {
+      final slot = Completer<void>();
+      _waiting.add(slot);
+      await slot.future;
+    } else {
+      _running++;
+    }
+
+    try {
+      return await compute(preprocessOcrImage, (bytes, options));
+    } finally {
+      if (_waiting.isNotEmpty) {
+        // 実行枠をそのまま次の待機者に引き継ぐ
+        _waiting.removeFirst().complete();
+      } else {
+        _running--;
+      }
+    }
+  }
+}
@@ -0,0 +1,250 @@
+// OCR結果の永続キャッシュ（LRU・TTL・知覚ハッシュによる似た値札の候補探索）
+import 'dart:async';
+import 'dart:collection';
+import 'dart:convert';
+import 'dart:typed_data';
+import 'package:maikago/services/debug_service.dart';
+import 'package:maikago/services/ocr_image_preprocessor.dart';
+import 'package:maikago/services/settings_persistence.dart';
+import 'package:maikago/services/vision_ocr_service.dart';
+
+/// 画像のキャッシュキー
+/// - [contentHash]: 元ファイルのSHA-256（完全一致用）
+/// - [perceptualHash]: 前処理後の画像の dHash（256bit、似た値札の候補探索用）
+class OcrImageFingerprint {
+  const OcrImageFingerprint({
+    required this.contentHash,
+    this.perceptualHash,
+  });
+
+  /// 前処理の結果から作成（ハッシュは前処理と同じ isolate で計算済み）
+  factory OcrImageFingerprint.fromPreprocessResult(
+          OcrPreprocessResult result) =>
+      OcrImageFingerprint(
+        contentHash: result.contentHash,
+        perceptualHash: result.perceptualHash,
+      );
+
+  final String contentHash;
+
+  /// null の場合は完全一致のみで照合
+  final Uint8List? perceptualHash;
+}
+
+/// 知覚ハッシュ同士のハミング距離
+int _hammingDistance(Uint8List a, Uint8List b) {
+  var count = 0;
+  for (int i = 0; i < a.length; i++) {
+    var diff = a[i] ^ b[i];
+    while (diff != 0) {
+      diff &= diff - 1;
+      count++;
+    }
+  }
+  return count;
+}
+
+String _encodeHash(Uint8List hash) =>
+    hash.map((byte) => byte.toRadixString(16).padLeft(2, '0')).join();
+
+Uint8List? _decodeHash(Object? value) {
+  // 旧形式（64bitの整数）は照合に使わない
+  if (value is! String || value.length != ocrPerceptualHashBits ~/ 4) {
+    return null;
+  }
+  return Uint8List.fromList([
+    for (int i = 0; i < value.length; i += 2)
+      int.parse(value.substring(i, i + 2), radix: 16),
+  ]);
+}
+
+class _OcrCacheEntry {
+  _OcrCacheEntry({
+    required this.contentHash,
+    required this.perceptualHash,
+    required this.name,
+    required this.price,
+    required this.storedAt,
+  });
+
+  factory _OcrCacheEntry.fromMap(Map<String, dynamic> map) => _OcrCacheEntry(
+        contentHash: map['contentHash'] as String,
+        perceptualHash: _decodeHash(map['perceptualHash']),
+        name: map['name'] as String,
+        price: (map['price'] as num).toInt(),
+        storedAt: DateTime.parse(map['storedAt'] as String),
+      );
+
+  final String contentHash;
+  final Uint8List? perceptualHash;
+  final String name;
+  final int price;
+  final DateTime storedAt;
+
+  Map<String, dynamic> toMap() => {
+        'contentHash': contentHash,
+        'perceptualHash':
+            perceptualHash == null ? null : _encodeHash(perceptualHash!),
+        'name': name,
+        'price': price,
+        'storedAt': storedAt.toIso8601String(),
+      };
+}
+
+/// OCR結果の永続キャッシュ。
+/// - SharedPreferences に保存し、アプリ再起動後も再利用する
+/// - 参照のたびに最新へ移動する LRU（最大 [maxEntries] 件）と、保存からの [ttl] で失効
+/// - 結果として返すのは完全一致（SHA-256）のみ。見た目が似ているだけの値札は
+///   価格が違うことがあるため、[findSimilar] の候補はサーバー側でOCRテキストと
+///   照合するヒントとしてのみ使う
+/// - ハッシュは前処理（[OcrPreprocessResult]）と同じ isolate で計算する
+class OcrResultCache {
+  OcrResultCache({
+    this.maxEntries = 200,
+    this.ttl = const Duration(days: 30),
+    this.maxHammingDistance = 8,
+    this.saveDelay = const Duration(seconds: 1),
+    DateTime Function()? clock,
+  }) : _clock = clock ?? DateTime.now;
+
+  final int maxEntries;
+  final Duration ttl;
+  final int maxHammingDistance;
+  final Duration saveDelay;
+  final DateTime Function() _clock;
+
+  // 挿入順 = 参照順（先頭が最も古い）
+  final LinkedHashMap<String, _OcrCacheEntry> _entries = LinkedHashMap();
+  Future<void>? _loading;
+  Timer? _saveTimer;
+
+  int _hits = 0;
+  int _misses = 0;
+
+  int get hits => _hits;
+  int get misses => _misses;
+  int get length => _entries.length;
+
+  /// キャッシュを参照（完全一致のみ。ヒットした場合は最新に移動）
+  Future<OcrItemResult?> lookup(OcrImageFingerprint fingerprint) async {
+    await _ensureLoaded();
+    _evictExpired();
+
+    final entry = _entries[fingerprint.contentHash];
+    if (entry == null) {
+      _misses++;
+      return null;
+    }
+
+    _hits++;
+    _entries
+      ..remove(entry.contentHash)
+      ..[entry.contentHash] = entry;
+    _scheduleSave();
+    return OcrItemResult(name: entry.name, price: entry.price);
+  }
+
+  /// 結果を追加（上限を超えた場合は最も長く参照されていないものから削除）
+  Future<void> put(OcrImageFingerprint fingerprint, OcrItemResult result) async {
+    await _ensureLoaded();
+
+    _entries.remove(fingerprint.contentHash);
+    _entries[fingerprint.contentHash] = _OcrCacheEntry(
+      contentHash: fingerprint.contentHash,
+      perceptualHash: fingerprint.perceptualHash,
+      name: result.name,
+      price: result.price,
+      storedAt: _clock(),
+    );
+    while (_entries.length > maxEntries) {
+      _entries.remove(_entries.keys.first);
+    }
+    _scheduleSave();
+  }
+
+  /// 知覚ハッシュのハミング距離が [maxHammingDistance] 以内で最も近い結果
+  /// （ヒント用。ヒット数には数えず、参照順も変えない）
+  Future<OcrItemResult?> findSimilar(OcrImageFingerprint fingerprint) async {
+    final perceptualHash = fingerprint.perceptualHash;
+    if (perceptualHash == null) return null;
+    await _ensureLoaded();
+    _evictExpired();
+
+    _OcrCacheEntry? best;
+    var bestDistance = maxHammingDistance + 1;
+    for (final entry in _entries.values) {
+      final candidate = entry.perceptualHash;
+      if (candidate == null || candidate.length != perceptualHash.length) {
+        continue;
+      }
+      final distance = _hammingDistance(perceptualHash, candidate);
+      if (distance < bestDistance) {
+        best = entry;
+        bestDistance = distance;
+      }
+    }
+    return best == null
+        ? null
+        : OcrItemResult(name: best.name, price: best.price);
+  }
+
+  /// キャッシュと統計をクリア（保存済みのデータも削除）
+  Future<void> clear() async {
+    await _ensureLoaded();
+    _entries.clear();
+    _hits = 0;
+    _misses = 0;
+    await flush();
+  }
+
+  /// 予約中の保存を直ちに実行
+  Future<void> flush() async {
+    _saveTimer?.cancel();
+    _saveTimer = null;
+    if (_loading == null) return;
+
+    await SettingsPersistence.saveOcrResultCache(
+        json.encode([for (final entry in _entries.values) entry.toMap()]));
+  }
+
+  /// キャッシュ統計（件数・上限・ヒット/ミス数・ヒット率）
+  Map<String, dynamic> stats() {
+    final total = _hits + _misses;
+    return {
+      'size': _entries.length,
+      'maxSize': maxEntries,
+      'hits': _hits,
+      'misses': _misses,
+      'hitRate': total == 0 ? 0.0 : _hits / total,
+    };
+  }
+
+  void _evictExpired() {
+    final now = _clock();
+    final before = _entries.length;
+    _entries.removeWhere((_, entry) => now.difference(entry.storedAt) > ttl);
+    if (_entries.length != before) _scheduleSave();
+  }
+
+  void _scheduleSave() {
+    _saveTimer?.cancel();
+    _saveTimer = Timer(saveDelay, () => unawaited(flush()));
+  }
+
+  Future<void> _ensureLoaded() => _loading ??= _load();
+
+  Future<void> _load() async {
+    try {
+      final cacheJson = await SettingsPersistence.loadOcrResultCache();
+      if (cacheJson == null) return;
+
+      final List<dynamic> entries = json.decode(cacheJson);
+      for (final e in entries) {
+        final entry = _OcrCacheEntry.fromMap(Map<String, dynamic>.from(e));
+        _entries[entry.contentHash] = entry;
+      }
+    } catch (e) {
+      DebugService().logError('OCRキャッシュ読み込みエラー: $e');
+    }
+  }
+}
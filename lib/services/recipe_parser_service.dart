@@ -1,7 +1,12 @@
 import 'dart:async';
+import 'dart:collection';
+import 'dart:convert';
+import 'dart:math';
 
 import 'package:cloud_functions/cloud_functions.dart';
 import 'package:maikago/services/debug_service.dart';
+import 'package:maikago/services/ingredient_normalizer.dart';
+import 'package:maikago/services/settings_persistence.dart';
 
 /// レシピから抽出された材料のモデル
 class RecipeIngredient {
@@ -88,12 +93,100 @@ class RecipeParseError {
   }
 }
 
+/// 材料名の組み合わせが同じ食材かどうかをまとめて判定する関数
+/// （判定できなかった組み合わせは null）
+typedef IngredientSimilarityChecker = Future<List<bool?>> Function(
+    List<(String, String)> pairs);
+
+/// 材料の同一性判定結果のキャッシュ（正規化キーの組み合わせ単位、SharedPreferencesに永続化）
+class IngredientSimilarityMemo {
+  IngredientSimilarityMemo({
+    this.maxEntries = 2000,
+    this.saveDelay = const Duration(seconds: 1),
+  });
+
+  final int maxEntries;
+  final Duration saveDelay;
+
+  // 挿入順（先頭が最も古い）
+  final LinkedHashMap<String, bool> _entries = LinkedHashMap();
+  Future<void>? _loading;
+  Timer? _saveTimer;
+
+  int get length => _entries.length;
+
+  /// 組み合わせのキー（順序に依存しない）
+  static String keyOf(String key1, String key2) =>
+      key1.compareTo(key2) <= 0 ? '$key1\t$key2' : '$key2\t$key1';
+
+  /// 保存済みの判定結果を読み込む（初回のみ）
+  Future<void> load() => _loading ??= _load();
+
+  /// 判定結果を取得（未判定の場合は null）
+  bool? get(String key1, String key2) => _entries[keyOf(key1, key2)];
+
+  /// 判定結果を記録（上限を超えた場合は古いものから削除）
+  void putByKey(String key, bool isSame) {
+    _entries
+      ..remove(key)
+      ..[key] = isSame;
+    while (_entries.length > maxEntries) {
+      _entries.remove(_entries.keys.first);
+    }
+  }
+
+  /// 判定結果の保存を予約
+  void scheduleSave() {
+    _saveTimer?.cancel();
+    _saveTimer = Timer(saveDelay, () => unawaited(flush()));
+  }
+
+  /// 予約中の保存を直ちに実行
+  Future<void> flush() async {
+    _saveTimer?.cancel();
+    _saveTimer = null;
+    if (_loading == null) return;
+
+    await SettingsPersistence.saveIngredientSimilarityCache(
+        json.encode(_entries));
+  }
+
+  Future<void> _load() async {
+    try {
+      final cacheJson =
+          await SettingsPersistence.loadIngredientSimilarityCache();
+      if (cacheJson == null) return;
+
+      final Map<String, dynamic> entries = json.decode(cacheJson);
+      entries.forEach((key, value) {
+        if (value is bool) _entries[key] = value;
+      });
+    } catch (e) {
+      DebugService().logError('材料同一性キャッシュ読み込みエラー: $e');
+    }
+  }
+}
+
 class RecipeParserService {
-  RecipeParserService();
+  RecipeParserService({
+    IngredientSimilarityChecker? similarityChecker,
+    IngredientSimilarityMemo? similarityMemo,
+  })  : _similarityChecker = similarityChecker ?? _checkSimilaritiesRemotely,
+        _similarityMemo = similarityMemo ?? _sharedSimilarityMemo;
+
+  // 画面をまたいで同じ判定結果を使う（永続化先も共通）
+  static final IngredientSimilarityMemo _sharedSimilarityMemo =
+      IngredientSimilarityMemo();
+
+  final IngredientSimilarityChecker _similarityChecker;
+  final IngredientSimilarityMemo _similarityMemo;
 
   /// レシピテキストの最大文字数
   static const int maxRecipeTextLength = 5000;
 
+  /// 1回の問い合わせで送る材料名の組み合わせ数の上限
+  static const int maxSimilarityPairsPerRequest = 50;
+
   /// レシピテキストから材料を抽出する（Cloud Functions経由）
   /// 成功時は (RecipeParseResult, null)、失敗時は (null, RecipeParseError) を返す
   Future<(RecipeParseResult?, RecipeParseError?)> parseRecipe(String recipeText) async {
@@ -151,24 +244,100 @@ class RecipeParserService {
     }
   }
 
-  /// AIを使用して2つの材料が意味的に同一かどうかを判定する（Cloud Functions経由）
+  /// 2つの材料が同じ食材かどうかを判定する
+  /// 表記ゆれは端末内で判定し、判定できない場合のみCloud Functionsに問い合わせる
   Future<bool> isSameIngredient(String name1, String name2) async {
     // 完全に一致する場合は即座にtrue
     if (name1.trim() == name2.trim()) return true;
 
-    try {
-      final callable = FirebaseFunctions.instance
-          .httpsCallable('checkIngredientSimilarity');
-      final response = await callable.call<Map<String, dynamic>>({
-        'name1': name1,
-        'name2': name2,
-      }).timeout(const Duration(seconds: 5));
+    final matches = await findMatchingIngredients([name1], [name2]);
+    return matches.single != null;
+  }
 
-      final data = response.data;
-      return data['isSame'] == true;
+  /// 各材料名 [names] と同じ食材を [candidates] から探し、候補のインデックスを返す
+  /// （見つからない場合は null）
+  /// 1. 正規化キー（かな・全角半角・分量・単位・別名を吸収）が一致すれば同じ
+  /// 2. 似ている候補のみ判定済みの結果（永続化）を参照
+  /// 3. それでも判定できない組み合わせをまとめてCloud Functionsに問い合わせる
+  /// [onLocalMatches] には端末内で確定した結果を問い合わせ前に通知する。
+  Future<List<int?>> findMatchingIngredients(
+    List<String> names,
+    List<String> candidates, {
+    void Function(List<int?> matches)? onLocalMatches,
+  }) async {
+    final index = IngredientIndex(candidates);
+    final lookups = [for (final name in names) index.lookup(name)];
+    final matches = [for (final lookup in lookups) lookup.sameIndex];
+
+    await _similarityMemo.load();
+
+    // 判定済みの結果で解決し、残りの組み合わせを集める（正規化キー単位で重複を除く）
+    final unresolved = <String, (String, String)>{};
+    void resolveFromMemo({required bool collectUnresolved}) {
+      for (int i = 0; i < names.length; i++) {
+        if (matches[i] != null) continue;
+        for (final candidate in lookups[i].ambiguousIndexes) {
+          final isSame =
+              _similarityMemo.get(lookups[i].key, index.keyAt(candidate));
+          if (isSame == true) {
+            matches[i] = candidate;
+            break;
+          }
+          if (isSame == null && collectUnresolved) {
+            unresolved.putIfAbsent(
+                IngredientSimilarityMemo.keyOf(
+                    lookups[i].key, index.keyAt(candidate)),
+                () => (names[i], candidates[candidate]));
+          }
+        }
+      }
+    }
+
+    resolveFromMemo(collectUnresolved: true);
+    onLocalMatches?.call(List.of(matches));
+    if (unresolved.isEmpty) return matches;
+
+    DebugService().log('🤖 材料の同一性判定: ${unresolved.length}件をサーバーで判定');
+    final keys = unresolved.keys.toList();
+    final pairs = unresolved.values.toList();
+    try {
+      for (int start = 0;
+          start < pairs.length;
+          start += maxSimilarityPairsPerRequest) {
+        final end = min(start + maxSimilarityPairsPerRequest, pairs.length);
+        final results = await _similarityChecker(pairs.sublist(start, end));
+        for (int i = start; i < end; i++) {
+          // 判定できなかった組み合わせは記録せず、次回に再判定する
+          final isSame =
+              i - start < results.length ? results[i - start] : null;
+          if (isSame != null) _similarityMemo.putByKey(keys[i], isSame);
+        }
+      }
     } catch (e) {
+      // 判定できなかった組み合わせは別の食材として扱い、次回に再判定する
       DebugService().log('⚠️ 同一性判定失敗: $e');
-      return false;
     }
+    _similarityMemo.scheduleSave();
+
+    resolveFromMemo(collectUnresolved: false);
+    return matches;
+  }
+
+  /// 材料名の組み合わせをまとめてCloud Functionsで判定する
+  static Future<List<bool?>> _checkSimilaritiesRemotely(
+      List<(String, String)> pairs) async {
+    final callable = FirebaseFunctions.instance
+        .httpsCallable('checkIngredientSimilarities');
+    final response = await callable.call<Map<String, dynamic>>({
+      'pairs': [
+        for (final (name1, name2) in pairs) {'name1': name1, 'name2': name2},
+      ],
+    }).timeout(const Duration(seconds: 15));
+
+    final results = response.data['results'] as List<dynamic>? ?? [];
+    return [
+      for (int i = 0; i < pairs.length; i++)
+        i < results.length && results[i] is bool ? results[i] as bool : null,
+    ];
   }
 }
@@ -276,6 +276,9 @@ class SettingsPersistence {
   static const String _guestModeKey = 'is_guest_mode';
   static const String _guestItemsKey = 'guest_items';
   static const String _guestShopsKey = 'guest_shops';
+  static const String _guestItemShardCountKey = 'guest_item_shard_count';
+
+  static String _guestItemShardKey(int shard) => 'guest_items_$shard';
 
   /// ゲストモードフラグを保存
   static Future<void> saveGuestMode(bool isGuest) =>
@@ -300,9 +303,52 @@ class SettingsPersistence {
     }
   }
 
+  /// ゲストモードのアイテムデータをシャード単位で保存（シャード番号 → JSON文字列）
+  /// 保存後は旧形式（[saveGuestItems] の単一JSON）のデータを削除する
+  /// 失敗時は例外を投げる（呼び出し元の GuestPersistenceQueue が再試行する）
+  static Future<void> saveGuestItemShards(
+      Map<int, String> shardsJson, int shardCount) async {
+    final prefs = await SharedPreferences.getInstance();
+    final results = await Future.wait([
+      for (final entry in shardsJson.entries)
+        prefs.setString(_guestItemShardKey(entry.key), entry.value),
+    ]);
+    if (results.contains(false)) {
+      throw Exception('ゲストアイテムの保存に失敗しました');
+    }
+    if (prefs.getInt(_guestItemShardCountKey) != shardCount) {
+      await prefs.setInt(_guestItemShardCountKey, shardCount);
+    }
+    if (prefs.containsKey(_guestItemsKey)) {
+      await prefs.remove(_guestItemsKey);
+    }
+  }
+
+  /// ゲストモードのアイテムデータをシャード単位で読み込み
+  /// シャード形式で保存されていない場合は null を返す
+  static Future<List<String>?> loadGuestItemShards() async {
+    try {
+      final prefs = await SharedPreferences.getInstance();
+      final shardCount = prefs.getInt(_guestItemShardCountKey);
+      if (shardCount == null) return null;
+      return [
+        for (int i = 0; i < shardCount; i++)
+          if (prefs.getString(_guestItemShardKey(i)) case final json?) json,
+      ];
+    } catch (e) {
+      DebugService().logError('loadGuestItemShards エラー: $e');
+      return null;
+    }
+  }
+
   /// ゲストモードのショップデータを保存（JSON文字列）
-  static Future<void> saveGuestShops(String shopsJson) =>
-      _save(_guestShopsKey, shopsJson, 'saveGuestShops');
+  /// 失敗時は例外を投げる（呼び出し元の GuestPersistenceQueue が再試行する）
+  static Future<void> saveGuestShops(String shopsJson) async {
+    final prefs = await SharedPreferences.getInstance();
+    if (!await prefs.setString(_guestShopsKey, shopsJson)) {
+      throw Exception('ゲストショップの保存に失敗しました');
+    }
+  }
 
   /// ゲストモードのショップデータを読み込み
   static Future<String?> loadGuestShops() async {
@@ -319,16 +365,47 @@ class SettingsPersistence {
   static Future<void> clearGuestData() async {
     try {
       final prefs = await SharedPreferences.getInstance();
+      final shardCount = prefs.getInt(_guestItemShardCountKey) ?? 0;
       await Future.wait([
         prefs.remove(_guestModeKey),
         prefs.remove(_guestItemsKey),
         prefs.remove(_guestShopsKey),
+        prefs.remove(_guestItemShardCountKey),
+        for (int i = 0; i < shardCount; i++)
+          prefs.remove(_guestItemShardKey(i)),
       ]);
     } catch (e) {
       DebugService().logError('clearGuestData エラー: $e');
     }
   }
 
+  // ── OCR結果キャッシュ ────────────────────────────────────
+
+  static const String _ocrResultCacheKey = 'ocr_result_cache';
+
+  /// OCR結果キャッシュを保存（JSON文字列）
+  static Future<void> saveOcrResultCache(String cacheJson) =>
+      _save(_ocrResultCacheKey, cacheJson, 'saveOcrResultCache');
+
+  /// OCR結果キャッシュを読み込み
+  static Future<String?> loadOcrResultCache() =>
+      _load<String?>(_ocrResultCacheKey, null, 'loadOcrResultCache');
+
+  // ── 材料の同一性判定キャッシュ ────────────────────────────
+
+  static const String _ingredientSimilarityCacheKey =
+      'ingredient_similarity_cache';
+
+  /// 材料の同一性判定結果を保存（JSON文字列）
+  static Future<void> saveIngredientSimilarityCache(String cacheJson) => _save(
+      _ingredientSimilarityCacheKey,
+      cacheJson,
+      'saveIngredientSimilarityCache');
+
+  /// 材料の同一性判定結果を読み込み
+  static Future<String?> loadIngredientSimilarityCache() => _load<String?>(
+      _ingredientSimilarityCacheKey, null, 'loadIngredientSimilarityCache');
+
   // ── カメラガイドライン ────────────────────────────────────
 
   /// カメラガイドラインを表示すべきかチェック
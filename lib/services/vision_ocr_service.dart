@@ -4,8 +4,8 @@ import 'dart:convert';
 import 'package:cloud_functions/cloud_functions.dart';
 import 'package:flutter/foundation.dart';
 import 'package:maikago/config.dart';
-import 'package:image/image.dart' as img;
 import 'package:maikago/services/debug_service.dart';
+import 'package:maikago/services/ocr_image_preprocessor.dart';
 
 class OcrItemResult {
   OcrItemResult({required this.name, required this.price});
@@ -29,17 +29,36 @@ enum OcrProgressStep {
 typedef OcrProgressCallback = void Function(
     OcrProgressStep step, String message);
 
+/// 一括解析で画像ごとの結果が確定したときのコールバック（[index] は入力順）
+typedef OcrBatchResultCallback = void Function(
+    int index, OcrItemResult? result);
+
 class VisionOcrService {
-  VisionOcrService();
+  VisionOcrService({OcrImagePreprocessor? preprocessor})
+      : _preprocessor = preprocessor ?? _sharedPreprocessor;
+
+  // 連続撮影時もisolateの同時実行数を全体で抑えるため共有する
+  static final OcrImagePreprocessor _sharedPreprocessor =
+      OcrImagePreprocessor();
+
+  final OcrImagePreprocessor _preprocessor;
 
   /// Cloud Functions経由で画像解析（Vision API + ChatGPT）
+  /// [cropRegion] を指定した場合は、その範囲（ガイド枠など）のみを解析する
+  /// [preprocessed] を指定した場合は前処理を省略してその画像を送信する
+  /// [hint] は似た値札の過去の結果。サーバー側でOCRテキストに商品名と価格が
+  /// 含まれることを確認できた場合のみ採用され、ChatGPTの呼び出しが省略される
   Future<OcrItemResult?> detectItemFromImage(File image,
-      {OcrProgressCallback? onProgress}) async {
+      {OcrProgressCallback? onProgress,
+      OcrCropRegion? cropRegion,
+      OcrPreprocessResult? preprocessed,
+      OcrItemResult? hint}) async {
     try {
       onProgress?.call(OcrProgressStep.imageOptimization, '画像を最適化中...');
 
       // 画像を前処理＋リサイズしてファイルサイズを削減
-      final resizedBytes = await _resizeImage(image);
+      final resizedBytes =
+          preprocessed?.bytes ?? await _resizeImage(image, cropRegion);
       final b64 = base64Encode(resizedBytes);
 
       onProgress?.call(
@@ -51,6 +70,7 @@ class VisionOcrService {
       final response = await callable.call<Map<String, dynamic>>({
         'imageUrl': b64,
         'timestamp': DateTime.now().toIso8601String(),
+        if (hint != null) 'hint': {'name': hint.name, 'price': hint.price},
       }).timeout(const Duration(seconds: cloudFunctionsTimeoutSeconds));
 
       final data = response.data;
@@ -71,21 +91,7 @@ class VisionOcrService {
       onProgress?.call(OcrProgressStep.failed, error);
       return null;
     } on FirebaseFunctionsException catch (e) {
-      String message;
-      switch (e.code) {
-        case 'unauthenticated':
-          message = '認証が必要です。ログインしてください。';
-          break;
-        case 'deadline-exceeded':
-          message = '解析がタイムアウトしました。画像サイズを小さくして再試行してください。';
-          break;
-        case 'invalid-argument':
-          message = '画像データが不正です。';
-          break;
-        default:
-          message = 'サーバーエラーが発生しました。';
-      }
-      onProgress?.call(OcrProgressStep.failed, message);
+      onProgress?.call(OcrProgressStep.failed, _functionsErrorMessage(e));
       DebugService().logError('Cloud Functionsエラー: [${e.code}] ${e.message}');
       return null;
     } catch (e) {
@@ -101,79 +107,132 @@ class VisionOcrService {
     }
   }
 
-  /// 画像を前処理＋リサイズして最適化（精度向上版）
-  Future<Uint8List> _resizeImage(File image) async {
+  /// 複数の画像を1回のCloud Functions呼び出しで解析（analyzeImages）
+  /// 画像ごとの結果は確定した順に [onResult] へ通知し、最後に入力順の結果を返す。
+  /// （先に届くのはOCRに失敗した画像のみで、成功した画像はまとめて届く）
+  /// 失敗した画像は null。
+  /// [preprocessed] を指定した場合は、null でない画像の前処理を省略する（入力と同じ順）
+  Future<List<OcrItemResult?>> detectItemsFromImages(List<File> images,
+      {OcrProgressCallback? onProgress,
+      OcrBatchResultCallback? onResult,
+      List<OcrPreprocessResult?>? preprocessed}) async {
+    final results = List<OcrItemResult?>.filled(images.length, null);
+    if (images.isEmpty) return results;
+
     try {
-      final bytes = await image.readAsBytes();
-      final originalImage = img.decodeImage(bytes);
+      onProgress?.call(OcrProgressStep.imageOptimization,
+          '画像を最適化中...（${images.length}枚）');
 
-      if (originalImage == null) {
-        DebugService().logError('画像のデコードに失敗しました');
-        return bytes;
-      }
+      final encoded = await Future.wait(List.generate(
+          images.length,
+          (i) async => base64Encode(preprocessed?[i]?.bytes ??
+              await _resizeImage(images[i], null))));
 
-      // EXIFの向きを反映してから処理
-      img.Image working = img.bakeOrientation(originalImage);
-
-      // グレースケール化 + コントラスト強調 + 軽いシャープ処理
-      try {
-        working = img.grayscale(working);
-        // コントラストをやや強める（1.0 = 無変化）
-        // image 4.x の adjustColor を想定
-        working = img.adjustColor(working, contrast: 1.15);
-        // シャープ処理は環境差異が大きいためスキップ（必要なら別実装に差し替え）
-      } catch (e) {
-        // ランタイム差異でAPIが存在しない場合はそのまま進行
-        DebugService().logError('画像前処理エラー: $e');
-      }
+      onProgress?.call(
+          OcrProgressStep.cloudFunctionsCall, 'Cloud Functionsで解析中...');
 
-      // より積極的なリサイズで処理速度とOCR安定性を両立
-      const maxSize = maxImageSize; // 設定ファイルから取得
-      const quality = imageQuality; // 設定ファイルから取得
-
-      if (working.width > maxSize || working.height > maxSize) {
-        // アスペクト比を保持してリサイズ
-        final aspectRatio = working.width / working.height;
-        int newWidth, newHeight;
-
-        if (aspectRatio > 1) {
-          // 横長画像
-          newWidth = maxSize;
-          newHeight = (maxSize / aspectRatio).round();
-        } else {
-          // 縦長画像
-          newHeight = maxSize;
-          newWidth = (maxSize * aspectRatio).round();
+      // 結果を画像ごとに受け取るためストリーミングで呼び出す
+      final callable =
+          FirebaseFunctions.instance.httpsCallable('analyzeImages');
+      final stream = callable.stream<Object?, Map<String, dynamic>>({
+        'images': encoded,
+        'timestamp': DateTime.now().toIso8601String(),
+      }).timeout(const Duration(seconds: cloudFunctionsTimeoutSeconds));
+
+      final received = <int>{};
+      void handle(Object? data) {
+        final (index, result) = _parseBatchResult(data);
+        if (index == null || index >= images.length || !received.add(index)) {
+          return;
         }
+        results[index] = result;
+        onResult?.call(index, result);
+      }
 
-        final resizedImage = img.copyResize(
-          working,
-          width: newWidth,
-          height: newHeight,
-          interpolation: img.Interpolation.linear,
-        );
-
-        final resizedBytes = img.encodeJpg(resizedImage, quality: quality);
-        DebugService().log(
-            '画像を最適化（前処理＋リサイズ）: ${originalImage.width}x${originalImage.height} → ${resizedImage.width}x${resizedImage.height} (${bytes.length} → ${resizedBytes.length} bytes)');
-        return resizedBytes;
+      await for (final response in stream) {
+        switch (response) {
+          case Chunk(:final partialData):
+            handle(partialData);
+          case Result(:final result):
+            final data = result.data;
+            for (final item in (data['results'] as List<dynamic>? ?? [])) {
+              handle(item);
+            }
+        }
       }
 
-      // 元画像が小さい場合でも品質を最適化
-      if (bytes.length > 500000) {
-        // 500KB以上の場合
-        final optimizedBytes = img.encodeJpg(working, quality: quality);
-        DebugService().log(
-            '画像品質を最適化: ${bytes.length} → ${optimizedBytes.length} bytes');
-        return optimizedBytes;
+      final successCount = results.whereType<OcrItemResult>().length;
+      onProgress?.call(OcrProgressStep.completed,
+          '解析完了（$successCount/${images.length}件）');
+      DebugService().log(
+          'Cloud Functions一括解析完了: $successCount/${images.length}件');
+      return results;
+    } on FirebaseFunctionsException catch (e) {
+      onProgress?.call(OcrProgressStep.failed, _functionsErrorMessage(e));
+      DebugService().logError('Cloud Functionsエラー: [${e.code}] ${e.message}');
+      return results;
+    } catch (e) {
+      onProgress?.call(OcrProgressStep.failed, 'ネットワークエラーが発生しました');
+      DebugService().logError('Cloud Functions一括解析エラー: $e');
+      return results;
+    }
+  }
+
+  /// analyzeImages の画像1件分の結果を解析
+  (int?, OcrItemResult?) _parseBatchResult(Object? data) {
+    if (data is! Map) return (null, null);
+    final index = data['index'] as int?;
+    if (data['success'] != true) return (index, null);
+
+    final name = data['name'] as String? ?? '';
+    final price = data['price'] as int? ?? 0;
+    if (name.isEmpty || price <= 0) return (index, null);
+    return (index, OcrItemResult(name: name, price: price));
+  }
+
+  String _functionsErrorMessage(FirebaseFunctionsException e) {
+    switch (e.code) {
+      case 'unauthenticated':
+        return '認証が必要です。ログインしてください。';
+      case 'deadline-exceeded':
+        return '解析がタイムアウトしました。画像サイズを小さくして再試行してください。';
+      case 'invalid-argument':
+        return '画像データが不正です。';
+      case 'resource-exhausted':
+        return e.message ?? '呼び出し回数の上限に達しました。';
+      default:
+        return 'サーバーエラーが発生しました。';
+    }
+  }
+
+  /// 画像を前処理＋リサイズして最適化（バックグラウンドisolateで実行）
+  /// デコードできない場合や前処理に失敗した場合は null
+  Future<OcrPreprocessResult?> preprocessImage(File image,
+      {OcrCropRegion? cropRegion}) async {
+    try {
+      final bytes = await image.readAsBytes();
+      final result = await _preprocessor.process(
+        bytes,
+        options: OcrPreprocessOptions(cropRegion: cropRegion),
+      );
+
+      if (result == null) {
+        DebugService().logError('画像のデコードに失敗しました');
+        return null;
       }
 
-      // 前処理のみ反映
-      final preprocessed = img.encodeJpg(working, quality: quality);
-      return preprocessed;
+      DebugService().log(
+          '画像を最適化（前処理＋リサイズ）: ${result.originalWidth}x${result.originalHeight} → ${result.width}x${result.height} (${bytes.length} → ${result.bytes.length} bytes)');
+      return result;
     } catch (e) {
       DebugService().logError('画像リサイズエラー: $e');
-      return await image.readAsBytes();
+      return null;
     }
   }
+
+  /// 前処理後の画像データ（前処理できない場合は元の画像データ）
+  Future<Uint8List> _resizeImage(File image, OcrCropRegion? cropRegion) async {
+    final result = await preprocessImage(image, cropRegion: cropRegion);
+    return result?.bytes ?? await image.readAsBytes();
+  }
 }
@@ -0,0 +1,212 @@
+@Tags(['benchmark'])
+// ignore_for_file: avoid_print
+import 'package:flutter_test/flutter_test.dart';
+import 'package:maikago/models/list.dart';
+import 'package:maikago/models/shop.dart';
+import 'package:maikago/providers/data_provider_state.dart';
+import 'package:maikago/providers/managers/data_cache_manager.dart';
+import '../helpers/test_helpers.dart';
+import '../mocks.mocks.dart';
+
+/// キャッシュ操作（追加/更新/削除/並び替え）1回あたりのコスト比較
+/// - リスト: 従来の List + indexWhere と、ショップ items の再構築による更新
+/// - 索引: [DataCacheManager]（ID索引付きストア）による更新
+///
+/// いずれも操作後に UI と同じく `shops` を参照するまでを計測する。
+///
+/// 実行: flutter test --run-skipped --tags benchmark test/benchmark/data_store_benchmark_test.dart
+const _itemCount = 10000;
+const _shopCount = 30;
+const _iterations = 200;
+
+List<ListItem> _createItems() {
+  return List.generate(
+    _itemCount,
+    (i) => createSampleItem(
+      id: 'item_$i',
+      name: '商品$i',
+      price: 100 + i,
+      shopId: 'shop_${i % _shopCount}',
+      sortOrder: i ~/ _shopCount,
+    ),
+  );
+}
+
+List<Shop> _createShops() {
+  return List.generate(_shopCount, (i) => createSampleShop(id: 'shop_$i'));
+}
+
+/// 従来の List ベースのキャッシュ操作（ItemRepository の旧実装と同じ手順）
+class _ListCache {
+  _ListCache(List<ListItem> items, List<Shop> shops)
+      : items = List.of(items),
+        shops = [
+          for (final shop in shops)
+            shop.copyWith(
+                items: items.where((i) => i.shopId == shop.id).toList()),
+        ];
+
+  final List<ListItem> items;
+  final List<Shop> shops;
+
+  void add(ListItem item) {
+    items.insert(0, item);
+    final shopIndex = shops.indexWhere((s) => s.id == item.shopId);
+    if (shopIndex != -1) {
+      final shop = shops[shopIndex];
+      shops[shopIndex] = shop.copyWith(items: [...shop.items, item]);
+    }
+  }
+
+  void update(ListItem item) {
+    final index = items.indexWhere((i) => i.id == item.id);
+    if (index != -1) items[index] = item;
+    for (int i = 0; i < shops.length; i++) {
+      final shop = shops[i];
+      final itemIndex = shop.items.indexWhere((s) => s.id == item.id);
+      if (itemIndex != -1) {
+        final updatedItems = List<ListItem>.from(shop.items);
+        updatedItems[itemIndex] = item;
+        shops[i] = shop.copyWith(items: updatedItems);
+      }
+    }
+  }
+
+  void delete(String itemId) {
+    final item = items.firstWhere((i) => i.id == itemId);
+    items.removeWhere((i) => i.id == itemId);
+    final shopIndex = shops.indexWhere((s) => s.id == item.shopId);
+    if (shopIndex != -1) {
+      final shop = shops[shopIndex];
+      shops[shopIndex] = shop.copyWith(
+          items: shop.items.where((i) => i.id != itemId).toList());
+    }
+  }
+
+  void reorder(Shop updatedShop, List<ListItem> updatedItems) {
+    final shopIndex = shops.indexWhere((s) => s.id == updatedShop.id);
+    if (shopIndex != -1) shops[shopIndex] = updatedShop;
+    for (final item in updatedItems) {
+      final itemIndex = items.indexWhere((i) => i.id == item.id);
+      if (itemIndex != -1) items[itemIndex] = item;
+    }
+  }
+}
+
+DataCacheManager _createIndexedCache(List<ListItem> items, List<Shop> shops) {
+  final cacheManager = DataCacheManager(
+    dataService: MockDataService(),
+    state: DataProviderState(notifyListeners: () {}),
+  );
+  cacheManager.updateShops(shops);
+  cacheManager.updateItems(items);
+  return cacheManager;
+}
+
+/// 並び替え対象（1ショップ分のアイテムの sortOrder を反転）
+(Shop, List<ListItem>) _reorderPayload(List<Shop> shops, int iteration) {
+  final shop = shops[iteration % _shopCount];
+  final shopItems = shop.items;
+  final updatedItems = [
+    for (final (index, item) in shopItems.indexed)
+      item.copyWith(sortOrder: shopItems.length - index),
+  ];
+  return (shop.copyWith(items: updatedItems), updatedItems);
+}
+
+double _measureMicros(void Function(int iteration) body) {
+  final stopwatch = Stopwatch()..start();
+  for (int i = 0; i < _iterations; i++) {
+    body(i);
+  }
+  stopwatch.stop();
+  return stopwatch.elapsedMicroseconds / _iterations;
+}
+
+void _report(String operation, double listMicros, double indexedMicros) {
+  print('[data_store] op=$operation items=$_itemCount '
+      'list=${listMicros.toStringAsFixed(1)}us/op '
+      'indexed=${indexedMicros.toStringAsFixed(1)}us/op '
+      'speedup=${(listMicros / indexedMicros).toStringAsFixed(1)}x');
+}
+
+void main() {
+  late List<ListItem> items;
+  late List<Shop> shops;
+  late _ListCache listCache;
+  late DataCacheManager indexedCache;
+
+  setUp(() {
+    items = _createItems();
+    shops = _createShops();
+    listCache = _ListCache(items, shops);
+    indexedCache = _createIndexedCache(items, shops);
+  });
+
+  test('追加', () {
+    ListItem newItem(int i) =>
+        createSampleItem(id: 'new_$i', shopId: 'shop_${i % _shopCount}');
+
+    final listMicros = _measureMicros((i) {
+      listCache.add(newItem(i));
+      listCache.shops.length;
+    });
+    final indexedMicros = _measureMicros((i) {
+      indexedCache.addItemToCache(newItem(i));
+      indexedCache.shops.length;
+    });
+
+    _report('add', listMicros, indexedMicros);
+    expect(indexedCache.itemCount, listCache.items.length);
+  });
+
+  test('更新', () {
+    ListItem updated(int i) => items[(i * 37) % _itemCount]
+        .copyWith(isChecked: i.isEven);
+
+    final listMicros = _measureMicros((i) {
+      listCache.update(updated(i));
+      listCache.shops.length;
+    });
+    final indexedMicros = _measureMicros((i) {
+      indexedCache.updateItemInCache(updated(i));
+      indexedCache.shops.length;
+    });
+
+    _report('update', listMicros, indexedMicros);
+    expect(indexedCache.itemCount, _itemCount);
+  });
+
+  test('削除', () {
+    String targetId(int i) => 'item_${_itemCount - 1 - i}';
+
+    final listMicros = _measureMicros((i) {
+      listCache.delete(targetId(i));
+      listCache.shops.length;
+    });
+    final indexedMicros = _measureMicros((i) {
+      indexedCache.removeItemFromCache(targetId(i));
+      indexedCache.shops.length;
+    });
+
+    _report('delete', listMicros, indexedMicros);
+    expect(indexedCache.itemCount, listCache.items.length);
+  });
+
+  test('並び替え', () {
+    final listMicros = _measureMicros((i) {
+      final (shop, updatedItems) = _reorderPayload(listCache.shops, i);
+      listCache.reorder(shop, updatedItems);
+      listCache.shops.length;
+    });
+    final indexedMicros = _measureMicros((i) {
+      final (shop, updatedItems) = _reorderPayload(indexedCache.shops, i);
+      indexedCache.updateShopInCache(shop);
+      indexedCache.updateItemsInCache(updatedItems);
+      indexedCache.shops.length;
+    });
+
+    _report('reorder', listMicros, indexedMicros);
+    expect(indexedCache.itemCount, _itemCount);
+  });
+}
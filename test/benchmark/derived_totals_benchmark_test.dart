@@ -0,0 +1,134 @@
+@Tags(['benchmark'])
+// ignore_for_file: avoid_print
+import 'package:flutter_test/flutter_test.dart';
+import 'package:maikago/models/list.dart';
+import 'package:maikago/models/shop.dart';
+import 'package:maikago/providers/data_provider_state.dart';
+import 'package:maikago/providers/managers/data_cache_manager.dart';
+import 'package:maikago/providers/managers/derived_totals.dart';
+import '../helpers/test_helpers.dart';
+import '../mocks.mocks.dart';
+
+/// ボトムサマリーの合計計算と再描画回数の比較
+/// - 全件: 従来の BottomSummaryWidget と同じく、通知のたびにアイテムのハッシュ計算、
+///   チェック済みアイテムの合計、共有タブグループ全ショップの再集計を行う
+/// - 差分: [DerivedTotalsEngine] の集計値を購読し、値が変わった場合のみ再描画する
+///
+/// 表示中のタブ（shop_0、共有タブグループ group_1 に所属）に対し、全ショップの
+/// アイテムをランダムに更新する（4回に1回は金額に影響しない名前のみの変更）。
+///
+/// 実行: flutter test --run-skipped --tags benchmark test/benchmark/derived_totals_benchmark_test.dart
+const _itemCount = 10000;
+const _shopCount = 30;
+const _groupShopCount = 3;
+const _iterations = 500;
+
+const _shopId = 'shop_0';
+const _groupId = 'group_1';
+
+DataCacheManager _createCache() {
+  final cacheManager = DataCacheManager(
+    dataService: MockDataService(),
+    state: DataProviderState(notifyListeners: () {}),
+  );
+  cacheManager.updateShops(List.generate(
+    _shopCount,
+    (i) => createSampleShop(
+      id: 'shop_$i',
+      budget: 50000,
+      sharedTabGroupId: i < _groupShopCount ? _groupId : null,
+    ),
+  ));
+  cacheManager.updateItems(List.generate(
+    _itemCount,
+    (i) => createSampleItem(
+      id: 'item_$i',
+      price: 100 + i % 500,
+      quantity: 1 + i % 3,
+      discount: i % 7 == 0 ? 0.1 : 0.0,
+      isChecked: i.isEven,
+      shopId: 'shop_${i % _shopCount}',
+    ),
+  ));
+  return cacheManager;
+}
+
+/// [iteration] 回目の更新内容
+ListItem _mutation(DataCacheManager cacheManager, int iteration) {
+  final itemId = 'item_${(iteration * 7919) % _itemCount}';
+  final item = cacheManager.itemById(itemId)!;
+  return iteration % 4 == 3
+      ? item.copyWith(name: '${item.name}*')
+      : item.copyWith(isChecked: !item.isChecked);
+}
+
+/// 従来の BottomSummaryWidget の再描画1回分の計算
+(int, int, int) _recomputeSummary(DataCacheManager cacheManager) {
+  final shop = cacheManager.shopById(_shopId)!;
+
+  int hash = 0;
+  for (final item in shop.items) {
+    hash ^= item.id.hashCode;
+    hash ^= item.price.hashCode;
+    hash ^= item.quantity.hashCode;
+    hash ^= item.discount.hashCode;
+    hash ^= item.isChecked.hashCode;
+  }
+
+  // タブの合計は単価ごと、グループの合計（getSharedTabTotal）は行ごとに四捨五入
+  int sum(Shop shop, int Function(ListItem item) lineTotal) => shop.items
+      .where((item) => item.isChecked)
+      .fold<int>(0, (total, item) => total + lineTotal(item));
+
+  final groupTotal = cacheManager.shops
+      .where((s) => s.sharedTabGroupId == _groupId)
+      .fold<int>(0, (total, s) => total + sum(s, itemLineTotal));
+  return (hash, sum(shop, itemUnitRoundedTotal), groupTotal);
+}
+
+void _report(String mode, int rebuilds, double micros) {
+  print('[derived_totals] mode=$mode items=$_itemCount ops=$_iterations '
+      'rebuilds=$rebuilds compute=${micros.toStringAsFixed(1)}us/op');
+}
+
+void main() {
+  test('表示中タブの合計（全件再計算 vs 差分集計）', () {
+    // 全件: DataProvider 全体を購読し、通知のたびに再計算する
+    final fullCache = _createCache();
+    var fullRebuilds = 0;
+    late (int, int, int) fullResult;
+    final fullStopwatch = Stopwatch()..start();
+    for (int i = 0; i < _iterations; i++) {
+      fullCache.updateItemInCache(_mutation(fullCache, i));
+      fullResult = _recomputeSummary(fullCache);
+      fullRebuilds++;
+    }
+    fullStopwatch.stop();
+
+    // 差分: 表示中タブとグループの集計値のみを購読する
+    final derivedCache = _createCache();
+    final totals = derivedCache.totals;
+    final shopTotals = totals.watchShop(_shopId);
+    final groupTotals = totals.watchSharedTabGroup(_groupId);
+    var derivedRebuilds = 0;
+    void onChanged() => derivedRebuilds++;
+    shopTotals.addListener(onChanged);
+    groupTotals.addListener(onChanged);
+
+    final derivedStopwatch = Stopwatch()..start();
+    for (int i = 0; i < _iterations; i++) {
+      derivedCache.updateItemInCache(_mutation(derivedCache, i));
+      totals.publish();
+    }
+    derivedStopwatch.stop();
+
+    _report('full', fullRebuilds,
+        fullStopwatch.elapsedMicroseconds / _iterations);
+    _report('derived', derivedRebuilds,
+        derivedStopwatch.elapsedMicroseconds / _iterations);
+
+    expect(shopTotals.value.checkedUnitRoundedTotal, fullResult.$2);
+    expect(groupTotals.value.checkedTotal, fullResult.$3);
+    expect(derivedRebuilds, lessThan(fullRebuilds));
+  });
+}
@@ -0,0 +1,134 @@
+@Tags(['benchmark'])
+// ignore_for_file: avoid_print
+import 'dart:io';
+import 'dart:typed_data';
+
+import 'package:flutter_test/flutter_test.dart';
+import 'package:image/image.dart' as img;
+import 'package:maikago/services/ocr_image_preprocessor.dart';
+
+/// OCR前処理の工程別コスト比較（test_images/ の値札画像）
+/// - 従来: 元解像度のまま向き補正・グレースケール・コントラストを行ってから縮小
+/// - 新方式: 縮小してから向き補正・グレースケール・コントラスト（必要に応じて切り抜き）
+///
+/// 実行: flutter test --run-skipped --tags benchmark test/benchmark/ocr_preprocess_benchmark_test.dart
+const _options = OcrPreprocessOptions();
+
+// カメラ画面のガイド枠を想定した切り抜き範囲（中央の横長領域）
+const _guidelineOptions = OcrPreprocessOptions(
+  cropRegion: OcrCropRegion(left: 0.1, top: 0.3, width: 0.8, height: 0.4),
+);
+
+/// 従来の VisionOcrService._resizeImage と同じ順序の処理
+(Uint8List, Map<String, Duration>) _legacyPreprocess(Uint8List bytes) {
+  final timings = <String, Duration>{};
+  final stopwatch = Stopwatch()..start();
+
+  T stage<T>(String name, T Function() run) {
+    stopwatch.reset();
+    final result = run();
+    timings[name] = stopwatch.elapsed;
+    return result;
+  }
+
+  final decoded = stage('decode', () => img.decodeImage(bytes)!);
+  var working = stage('orient', () => img.bakeOrientation(decoded));
+  working = stage('grayscale', () => img.grayscale(working));
+  working = stage('contrast', () => img.adjustColor(working, contrast: 1.15));
+  working = stage('resize', () {
+    final maxSize = _options.maxSize;
+    if (working.width <= maxSize && working.height <= maxSize) return working;
+    final aspectRatio = working.width / working.height;
+    return img.copyResize(
+      working,
+      width: aspectRatio > 1 ? maxSize : (maxSize * aspectRatio).round(),
+      height: aspectRatio > 1 ? (maxSize / aspectRatio).round() : maxSize,
+      interpolation: img.Interpolation.linear,
+    );
+  });
+  final encoded = stage(
+      'encode', () => img.encodeJpg(working, quality: _options.quality));
+  return (encoded, timings);
+}
+
+/// 工程ごとの合計時間と出力サイズを集計する
+class _Totals {
+  final Map<String, int> stageMicros = {};
+  int outputBytes = 0;
+
+  void add(Map<String, Duration> timings, int bytes) {
+    timings.forEach((stage, elapsed) {
+      stageMicros[stage] = (stageMicros[stage] ?? 0) + elapsed.inMicroseconds;
+    });
+    outputBytes += bytes;
+  }
+
+  int get totalMicros => stageMicros.values.fold(0, (sum, v) => sum + v);
+
+  String format(int imageCount) {
+    String ms(int micros) => (micros / imageCount / 1000).toStringAsFixed(1);
+    final stages =
+        stageMicros.entries.map((e) => '${e.key}=${ms(e.value)}ms').join(' ');
+    return '$stages '
+        'total=${ms(totalMicros)}ms/image '
+        'output=${(outputBytes / imageCount / 1024).toStringAsFixed(1)}KB/image';
+  }
+}
+
+void main() {
+  final images = (Directory('test_images')
+          .listSync()
+          .whereType<File>()
+          .where((f) => f.path.toLowerCase().endsWith('.jpg'))
+          .toList()
+        ..sort((a, b) => a.path.compareTo(b.path)))
+      .map((f) => f.readAsBytesSync())
+      .toList();
+
+  test('前処理の工程別コスト: ${images.length}枚', () {
+    final inputBytes = images.fold<int>(0, (sum, b) => sum + b.length);
+    final legacy = _Totals();
+    final downscaleFirst = _Totals();
+    final cropped = _Totals();
+
+    for (final bytes in images) {
+      final (legacyBytes, legacyTimings) = _legacyPreprocess(bytes);
+      legacy.add(legacyTimings, legacyBytes.length);
+
+      final result = preprocessOcrImage((bytes, _options))!;
+      downscaleFirst.add(result.stageTimings, result.bytes.length);
+
+      final croppedResult = preprocessOcrImage((bytes, _guidelineOptions))!;
+      cropped.add(croppedResult.stageTimings, croppedResult.bytes.length);
+
+      expect(
+          result.width <= _options.maxSize && result.height <= _options.maxSize,
+          true);
+    }
+
+    final count = images.length;
+    print('[ocr_preprocess] images=$count '
+        'input=${(inputBytes / count / 1024).toStringAsFixed(1)}KB/image');
+    print('[ocr_preprocess] legacy         ${legacy.format(count)}');
+    print('[ocr_preprocess] downscaleFirst ${downscaleFirst.format(count)}');
+    print('[ocr_preprocess] guidelineCrop  ${cropped.format(count)}');
+    print('[ocr_preprocess] speedup='
+        '${(legacy.totalMicros / downscaleFirst.totalMicros).toStringAsFixed(1)}x');
+  }, skip: images.isEmpty ? 'test_images/ に画像がありません' : false);
+
+  test('isolateでの連続撮影スループット', () async {
+    for (final maxConcurrent in [1, 2, 4]) {
+      final preprocessor = OcrImagePreprocessor(maxConcurrent: maxConcurrent);
+      final stopwatch = Stopwatch()..start();
+      final results = await Future.wait(
+          images.map((bytes) => preprocessor.process(bytes)));
+      stopwatch.stop();
+
+      print('[ocr_preprocess] isolates=$maxConcurrent '
+          'images=${results.length} '
+          'wall=${stopwatch.elapsedMilliseconds}ms '
+          '(${(stopwatch.elapsedMilliseconds / results.length).toStringAsFixed(1)}ms/image)');
+      expect(results.every((r) => r != null), true);
+    }
+  }, skip: images.isEmpty ? 'test_images/ に画像がありません' : false);
+}
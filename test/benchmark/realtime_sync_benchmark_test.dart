@@ -0,0 +1,157 @@
+@Tags(['benchmark'])
+// ignore_for_file: avoid_print
+import 'package:flutter_test/flutter_test.dart';
+import 'package:maikago/models/list.dart';
+import 'package:maikago/models/shop.dart';
+import 'package:maikago/providers/data_provider_state.dart';
+import 'package:maikago/providers/managers/data_cache_manager.dart';
+import 'package:maikago/services/data_service.dart';
+import '../helpers/test_helpers.dart';
+import '../mocks.mocks.dart';
+
+/// リアルタイム同期1イベントあたりのコスト比較
+/// - 全件: 全ドキュメントをデコードし、List ベースのキャッシュとショップを再構築
+///   （索引導入前の従来の経路を [_FullSnapshotCache] で再現）
+/// - 差分: 変更ドキュメントのみデコードし、影響ショップのみ更新
+///
+/// 実行: flutter test --run-skipped --tags benchmark test/benchmark/realtime_sync_benchmark_test.dart
+const _shopCount = 30;
+const _iterations = 50;
+
+DataCacheManager _createCache(List<ListItem> items) {
+  final cacheManager = DataCacheManager(
+    dataService: MockDataService(),
+    state: DataProviderState(notifyListeners: () {}),
+  );
+  cacheManager.updateShops(_createShops());
+  cacheManager.updateItems(List.of(items));
+  return cacheManager;
+}
+
+List<Shop> _createShops() {
+  return List.generate(_shopCount, (i) => createSampleShop(id: 'shop_$i'));
+}
+
+List<ListItem> _createItems(int count) {
+  return List.generate(
+    count,
+    (i) => createSampleItem(
+      id: 'item_$i',
+      name: '商品$i',
+      price: 100 + i,
+      shopId: 'shop_${i % _shopCount}',
+      createdAt: DateTime(2026, 1, 1).add(Duration(seconds: i)),
+    ),
+  );
+}
+
+/// 従来の List ベースのキャッシュ（索引導入前の DataCacheManager と同じ手順）
+class _FullSnapshotCache {
+  _FullSnapshotCache(List<ListItem> items, this.shops)
+      : items = List.of(items) {
+    _associateItemsWithShops();
+  }
+
+  List<ListItem> items;
+  List<Shop> shops;
+
+  /// スナップショット全件をデコードし、キャッシュとショップを再構築
+  void apply(
+    List<Map<String, dynamic>> docs,
+    Map<String, DateTime> pendingUpdates,
+  ) {
+    final remoteItems = docs.map(ListItem.fromMap).toList();
+    final currentLocal = List<ListItem>.from(items);
+    final merged = <ListItem>[];
+    for (final remote in remoteItems) {
+      if (pendingUpdates.containsKey(remote.id)) {
+        merged.add(currentLocal.firstWhere(
+          (i) => i.id == remote.id,
+          orElse: () => remote,
+        ));
+      } else {
+        merged.add(remote);
+      }
+    }
+    items = merged;
+    _associateItemsWithShops();
+    _removeDuplicateItems();
+  }
+
+  void _associateItemsWithShops() {
+    final shopItems = <String, List<ListItem>>{
+      for (final shop in shops) shop.id: [],
+    };
+    final processedItemIds = <String>{};
+    final uniqueItems = <ListItem>[];
+    for (final item in items) {
+      if (processedItemIds.add(item.id)) {
+        uniqueItems.add(item);
+        shopItems[item.shopId]?.add(item);
+      }
+    }
+    shops = [
+      for (final shop in shops)
+        shop.copyWith(items: shopItems[shop.id] ?? []),
+    ];
+    items = uniqueItems;
+  }
+
+  void _removeDuplicateItems() {
+    final seenIds = <String>{};
+    items = [
+      for (final item in items)
+        if (seenIds.add(item.id)) item,
+    ];
+  }
+}
+
+double _measureMicros(void Function(int iteration) body) {
+  final stopwatch = Stopwatch()..start();
+  for (int i = 0; i < _iterations; i++) {
+    body(i);
+  }
+  stopwatch.stop();
+  return stopwatch.elapsedMicroseconds / _iterations;
+}
+
+void main() {
+  for (final count in [100, 1000, 10000]) {
+    test('チェック1件の同期コスト: $count件', () {
+      final items = _createItems(count);
+      final docs = items.map((item) => item.toMap()).toList();
+      final pendingUpdates = {'item_0': DateTime.now()};
+
+      final fullCache = _FullSnapshotCache(items, _createShops());
+      final fullMicros = _measureMicros((iteration) {
+        final target = iteration % count;
+        docs[target] = {...docs[target], 'isChecked': iteration.isEven};
+        fullCache.apply(docs, pendingUpdates);
+      });
+
+      final deltaCache = _createCache(items);
+      final deltaMicros = _measureMicros((iteration) {
+        final target = iteration % count;
+        final doc = {...docs[target], 'isChecked': iteration.isOdd};
+        deltaCache.applyItemChanges(
+          [
+            DataChange(
+              type: DataChangeType.modified,
+              id: doc['id'] as String,
+              data: ListItem.fromMap(doc),
+            ),
+          ],
+          shouldKeepLocal: pendingUpdates.containsKey,
+        );
+      });
+
+      print('[realtime_sync] items=$count '
+          'full=${fullMicros.toStringAsFixed(1)}us/event '
+          'delta=${deltaMicros.toStringAsFixed(1)}us/event '
+          'speedup=${(fullMicros / deltaMicros).toStringAsFixed(1)}x');
+
+      expect(deltaCache.items.length, count);
+      expect(fullCache.items.length, count);
+    });
+  }
+}
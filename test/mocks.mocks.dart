@@ -7,6 +7,7 @@ import 'dart:async' as _i3;
 
 import 'package:maikago/models/list.dart' as _i4;
 import 'package:maikago/models/shop.dart' as _i5;
+import 'package:maikago/services/data/data_change.dart' as _i6;
 import 'package:maikago/services/data_service.dart' as _i2;
 import 'package:mockito/mockito.dart' as _i1;
 
@@ -78,6 +79,36 @@ class MockDataService extends _i1.Mock implements _i2.DataService {
         returnValueForMissingStub: _i3.Future<void>.value(),
       ) as _i3.Future<void>);
 
+  @override
+  _i3.Future<void> updateItemsBatch(
+    List<_i4.ListItem>? items, {
+    bool? isAnonymous = false,
+  }) =>
+      (super.noSuchMethod(
+        Invocation.method(
+          #updateItemsBatch,
+          [items],
+          {#isAnonymous: isAnonymous},
+        ),
+        returnValue: _i3.Future<void>.value(),
+        returnValueForMissingStub: _i3.Future<void>.value(),
+      ) as _i3.Future<void>);
+
+  @override
+  _i3.Future<void> deleteItemsBatch(
+    List<String>? itemIds, {
+    bool? isAnonymous = false,
+  }) =>
+      (super.noSuchMethod(
+        Invocation.method(
+          #deleteItemsBatch,
+          [itemIds],
+          {#isAnonymous: isAnonymous},
+        ),
+        returnValue: _i3.Future<void>.value(),
+        returnValueForMissingStub: _i3.Future<void>.value(),
+      ) as _i3.Future<void>);
+
   @override
   _i3.Stream<List<_i4.ListItem>> getItems({bool? isAnonymous = false}) =>
       (super.noSuchMethod(
@@ -89,6 +120,18 @@ class MockDataService extends _i1.Mock implements _i2.DataService {
         returnValue: _i3.Stream<List<_i4.ListItem>>.empty(),
       ) as _i3.Stream<List<_i4.ListItem>>);
 
+  @override
+  _i3.Stream<List<_i6.DataChange<_i4.ListItem>>> getItemChanges(
+          {bool? isAnonymous = false}) =>
+      (super.noSuchMethod(
+        Invocation.method(
+          #getItemChanges,
+          [],
+          {#isAnonymous: isAnonymous},
+        ),
+        returnValue: _i3.Stream<List<_i6.DataChange<_i4.ListItem>>>.empty(),
+      ) as _i3.Stream<List<_i6.DataChange<_i4.ListItem>>>);
+
   @override
   _i3.Future<List<_i4.ListItem>> getItemsOnce({bool? isAnonymous = false}) =>
       (super.noSuchMethod(
@@ -130,6 +173,21 @@ class MockDataService extends _i1.Mock implements _i2.DataService {
         returnValueForMissingStub: _i3.Future<void>.value(),
       ) as _i3.Future<void>);
 
+  @override
+  _i3.Future<void> updateShopBatch(
+    _i5.Shop? shop, {
+    bool? isAnonymous = false,
+  }) =>
+      (super.noSuchMethod(
+        Invocation.method(
+          #updateShopBatch,
+          [shop],
+          {#isAnonymous: isAnonymous},
+        ),
+        returnValue: _i3.Future<void>.value(),
+        returnValueForMissingStub: _i3.Future<void>.value(),
+      ) as _i3.Future<void>);
+
   @override
   _i3.Future<void> deleteShop(
     String? shopId, {
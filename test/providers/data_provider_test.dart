@@ -102,7 +102,7 @@ void main() {
 
     test('対応するショップにもアイテムが追加される', () async {
       final shop = createSampleShop(id: '0', name: 'デフォルト');
-      dataProvider.shops.add(shop);
+      await dataProvider.addShop(shop);
 
       final item = createSampleItem(id: '', name: 'テスト', shopId: '0');
       await dataProvider.addItem(item);
@@ -169,7 +169,7 @@ void main() {
 
     test('ショップ内のアイテムも同期更新される', () async {
       final shop = createSampleShop(id: '0', name: 'デフォルト');
-      dataProvider.shops.add(shop);
+      await dataProvider.addShop(shop);
 
       final item = createSampleItem(id: '', name: '元の名前', shopId: '0');
       await dataProvider.addItem(item);
@@ -221,7 +221,7 @@ void main() {
 
     test('ショップからもアイテムが削除される', () async {
       final shop = createSampleShop(id: '0', name: 'デフォルト');
-      dataProvider.shops.add(shop);
+      await dataProvider.addShop(shop);
 
       final item = createSampleItem(id: '', name: 'テスト', shopId: '0');
       await dataProvider.addItem(item);
@@ -339,8 +339,8 @@ void main() {
             createSampleShop(id: '0', name: 'デフォルト'),
           ]);
 
-      // getItemsとgetShopsのStreamもスタブが必要（_startRealtimeSync用）
-      when(mockDataService.getItems(
+      // getItemChangesとgetShopsのStreamもスタブが必要（_startRealtimeSync用）
+      when(mockDataService.getItemChanges(
         isAnonymous: anyNamed('isAnonymous'),
       )).thenAnswer((_) => Stream.value([]));
       when(mockDataService.getShops(
@@ -1,6 +1,7 @@
 import 'package:flutter_test/flutter_test.dart';
 import 'package:maikago/providers/data_provider_state.dart';
 import 'package:maikago/providers/managers/data_cache_manager.dart';
+import 'package:maikago/services/data_service.dart';
 import '../../helpers/test_helpers.dart';
 import '../../mocks.mocks.dart';
 
@@ -18,18 +19,14 @@ void main() {
     );
   });
 
-  group('removeDuplicateShops', () {
+  // ストアはIDで一意にショップを保持するため、一括置換時に重複が除去される
+  group('updateShops（重複除去）', () {
     test('重複ショップがIDベースで除去される', () {
       final shop1 = createSampleShop(id: 'shop_1', name: 'ショップ1');
       final shop1Dup = createSampleShop(id: 'shop_1', name: 'ショップ1(重複)');
       final shop2 = createSampleShop(id: 'shop_2', name: 'ショップ2');
 
-      cacheManager.shops
-        ..add(shop1)
-        ..add(shop2)
-        ..add(shop1Dup);
-
-      cacheManager.removeDuplicateShops();
+      cacheManager.updateShops([shop1, shop2, shop1Dup]);
 
       expect(cacheManager.shops.length, 2);
       expect(cacheManager.shops.map((s) => s.id).toList(), ['shop_1', 'shop_2']);
@@ -41,31 +38,129 @@ void main() {
       final shop1 = createSampleShop(id: 'shop_1', name: 'ショップ1');
       final shop2 = createSampleShop(id: 'shop_2', name: 'ショップ2');
 
-      cacheManager.shops
-        ..add(shop1)
-        ..add(shop2);
-
-      cacheManager.removeDuplicateShops();
+      cacheManager.updateShops([shop1, shop2]);
 
       expect(cacheManager.shops.length, 2);
     });
 
     test('空リストで安全に動作する', () {
-      cacheManager.removeDuplicateShops();
+      cacheManager.updateShops([]);
 
       expect(cacheManager.shops, isEmpty);
     });
 
     test('全て同一IDの場合に1つだけ残る', () {
-      cacheManager.shops
-        ..add(createSampleShop(id: 'same', name: 'A'))
-        ..add(createSampleShop(id: 'same', name: 'B'))
-        ..add(createSampleShop(id: 'same', name: 'C'));
-
-      cacheManager.removeDuplicateShops();
+      cacheManager.updateShops([
+        createSampleShop(id: 'same', name: 'A'),
+        createSampleShop(id: 'same', name: 'B'),
+        createSampleShop(id: 'same', name: 'C'),
+      ]);
 
       expect(cacheManager.shops.length, 1);
       expect(cacheManager.shops[0].name, 'A');
     });
   });
+
+  group('applyItemChanges', () {
+    setUp(() {
+      cacheManager.addShopToCache(createSampleShop(id: 'shop_a'));
+      cacheManager.addShopToCache(createSampleShop(id: 'shop_b'));
+      cacheManager.updateItems([
+        createSampleItem(id: 'item_1', name: '牛乳', shopId: 'shop_a'),
+        createSampleItem(id: 'item_2', name: '卵', shopId: 'shop_b'),
+      ]);
+    });
+
+    test('modifiedで該当アイテムとショップが更新される', () {
+      final changed = cacheManager.applyItemChanges([
+        DataChange(
+          type: DataChangeType.modified,
+          id: 'item_1',
+          data: createSampleItem(
+              id: 'item_1', name: '牛乳', shopId: 'shop_a', isChecked: true),
+        ),
+      ]);
+
+      expect(changed, true);
+      expect(cacheManager.items.firstWhere((i) => i.id == 'item_1').isChecked,
+          true);
+      expect(cacheManager.shops[0].items.single.isChecked, true);
+    });
+
+    test('影響のないショップは再構築されない', () {
+      final untouchedShop = cacheManager.shops[1];
+
+      cacheManager.applyItemChanges([
+        DataChange(
+          type: DataChangeType.modified,
+          id: 'item_1',
+          data: createSampleItem(id: 'item_1', name: '低脂肪乳', shopId: 'shop_a'),
+        ),
+      ]);
+
+      expect(identical(cacheManager.shops[1], untouchedShop), true);
+    });
+
+    test('addedで新規アイテムが先頭とショップに追加される', () {
+      cacheManager.applyItemChanges([
+        DataChange(
+          type: DataChangeType.added,
+          id: 'item_3',
+          data: createSampleItem(id: 'item_3', name: 'パン', shopId: 'shop_b'),
+        ),
+      ]);
+
+      expect(cacheManager.items.first.id, 'item_3');
+      expect(cacheManager.shops[1].items.map((i) => i.id),
+          containsAll(['item_2', 'item_3']));
+    });
+
+    test('removedでキャッシュとショップから削除される', () {
+      cacheManager.applyItemChanges([
+        const DataChange(type: DataChangeType.removed, id: 'item_2'),
+      ]);
+
+      expect(cacheManager.items.map((i) => i.id), ['item_1']);
+      expect(cacheManager.shops[1].items, isEmpty);
+    });
+
+    test('shopIdの変更でショップ間を移動する', () {
+      cacheManager.applyItemChanges([
+        DataChange(
+          type: DataChangeType.modified,
+          id: 'item_1',
+          data: createSampleItem(id: 'item_1', name: '牛乳', shopId: 'shop_b'),
+        ),
+      ]);
+
+      expect(cacheManager.shops[0].items, isEmpty);
+      expect(cacheManager.shops[1].items.map((i) => i.id),
+          containsAll(['item_1', 'item_2']));
+    });
+
+    test('shouldKeepLocalがtrueのアイテムはローカル版が保持される', () {
+      final changed = cacheManager.applyItemChanges(
+        [
+          DataChange(
+            type: DataChangeType.modified,
+            id: 'item_1',
+            data: createSampleItem(id: 'item_1', name: 'リモート', shopId: 'shop_a'),
+          ),
+        ],
+        shouldKeepLocal: (id) => id == 'item_1',
+      );
+
+      expect(changed, false);
+      expect(cacheManager.items.firstWhere((i) => i.id == 'item_1').name, '牛乳');
+    });
+
+    test('存在しないIDのremovedは変更なしとして扱われる', () {
+      final changed = cacheManager.applyItemChanges([
+        const DataChange(type: DataChangeType.removed, id: 'unknown'),
+      ]);
+
+      expect(changed, false);
+      expect(cacheManager.items.length, 2);
+    });
+  });
 }
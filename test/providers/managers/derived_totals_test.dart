@@ -0,0 +1,204 @@
+import 'package:flutter_test/flutter_test.dart';
+import 'package:maikago/providers/managers/derived_totals.dart';
+import 'package:maikago/providers/managers/indexed_data_store.dart';
+import '../../helpers/test_helpers.dart';
+
+void main() {
+  late IndexedDataStore store;
+  late DerivedTotalsEngine totals;
+
+  setUp(() {
+    store = IndexedDataStore();
+    totals = store.totals;
+    store.replaceShops([
+      createSampleShop(id: 'shop_a', budget: 1000),
+      createSampleShop(id: 'shop_b', sharedTabGroupId: 'group_1'),
+      createSampleShop(
+          id: 'shop_c', sharedTabGroupId: 'group_1', budget: 3000),
+    ]);
+    store.replaceItems([
+      createSampleItem(
+          id: 'a1', shopId: 'shop_a', price: 100, quantity: 2, isChecked: true),
+      createSampleItem(id: 'a2', shopId: 'shop_a', price: 300),
+      createSampleItem(
+          id: 'b1', shopId: 'shop_b', price: 200, isChecked: true),
+      createSampleItem(
+          id: 'c1', shopId: 'shop_c', price: 500, isChecked: true),
+    ]);
+  });
+
+  group('ショップの集計', () {
+    test('チェック済み・未チェックの合計と件数、残り予算を集計する', () {
+      final shopTotals = totals.shopTotals('shop_a');
+
+      expect(shopTotals.checkedTotal, 200);
+      expect(shopTotals.uncheckedTotal, 300);
+      expect(shopTotals.checkedCount, 1);
+      expect(shopTotals.itemCount, 2);
+      expect(shopTotals.remainingBudget, 800);
+      expect(shopTotals.isOverBudget, false);
+    });
+
+    test('アイテムの追加・更新・削除が差分で反映される', () {
+      store.prependItem(createSampleItem(
+          id: 'a3', shopId: 'shop_a', price: 1000, isChecked: true));
+      store.putItem(createSampleItem(
+          id: 'a2', shopId: 'shop_a', price: 300, isChecked: true));
+      store.removeItem('a1');
+
+      final shopTotals = totals.shopTotals('shop_a');
+      expect(shopTotals.checkedTotal, 1300);
+      expect(shopTotals.uncheckedTotal, 0);
+      expect(shopTotals.itemCount, 2);
+      expect(shopTotals.isOverBudget, true);
+    });
+
+    test('ショップを移動したアイテムは移動元から除かれる', () {
+      store.putItem(createSampleItem(
+          id: 'a1',
+          shopId: 'shop_b',
+          price: 100,
+          quantity: 2,
+          isChecked: true));
+
+      expect(totals.shopTotals('shop_a').checkedTotal, 0);
+      expect(totals.shopTotals('shop_b').checkedTotal, 400);
+    });
+
+    test('割引後の端数は getDisplayTotal と同じく四捨五入', () {
+      store.putItem(createSampleItem(
+          id: 'a1',
+          shopId: 'shop_a',
+          price: 333,
+          quantity: 1,
+          discount: 0.1,
+          isChecked: true));
+
+      // 333 * 0.9 = 299.7 → 300
+      expect(totals.shopTotals('shop_a').checkedTotal, 300);
+    });
+
+    test('タブ表示用の合計は割引後の単価を四捨五入してから個数を掛ける', () {
+      store.putItem(createSampleItem(
+          id: 'a1',
+          shopId: 'shop_a',
+          price: 105,
+          quantity: 3,
+          discount: 0.1,
+          isChecked: true));
+
+      final shopTotals = totals.shopTotals('shop_a');
+      // 105 * 3 * 0.9 = 283.5 → 284
+      expect(shopTotals.checkedTotal, 284);
+      // 105 * 0.9 = 94.5 → 95、95 * 3 = 285
+      expect(shopTotals.checkedUnitRoundedTotal, 285);
+    });
+  });
+
+  group('共有タブグループの集計', () {
+    test('グループ内の全ショップを合計し、最初に設定された予算を使う', () {
+      final groupTotals = totals.sharedTabGroupTotals('group_1');
+
+      expect(groupTotals.checkedTotal, 700);
+      expect(groupTotals.budget, 3000);
+      expect(groupTotals.remainingBudget, 2300);
+    });
+
+    test('グループへの参加・離脱が反映される', () {
+      store.putShop(createSampleShop(
+          id: 'shop_a', sharedTabGroupId: 'group_1', budget: 1000));
+      expect(totals.sharedTabGroupTotals('group_1').checkedTotal, 900);
+      expect(totals.sharedTabGroupTotals('group_1').budget, 1000);
+
+      store.removeShop('shop_c');
+      expect(totals.sharedTabGroupTotals('group_1').checkedTotal, 400);
+    });
+
+    test('所属ショップがないグループは空の集計値', () {
+      expect(totals.sharedTabGroupTotals('nonexistent'), ShopTotals.empty);
+    });
+  });
+
+  group('購読', () {
+    test('publish時に変更のあった集計値の購読先のみ通知される', () {
+      var shopANotifications = 0;
+      var shopBNotifications = 0;
+      var groupNotifications = 0;
+      totals.watchShop('shop_a').addListener(() => shopANotifications++);
+      totals.watchShop('shop_b').addListener(() => shopBNotifications++);
+      totals
+          .watchSharedTabGroup('group_1')
+          .addListener(() => groupNotifications++);
+
+      store.putItem(createSampleItem(id: 'c1', shopId: 'shop_c', price: 600));
+      store.putItem(createSampleItem(id: 'c1', shopId: 'shop_c', price: 700));
+      totals.publish();
+
+      expect(shopANotifications, 0);
+      expect(shopBNotifications, 0);
+      expect(groupNotifications, 1);
+      expect(totals.watchSharedTabGroup('group_1').value.checkedTotal, 200);
+    });
+
+    test('値が変わらない変更では通知されない', () {
+      var notifications = 0;
+      totals.watchShop('shop_a').addListener(() => notifications++);
+
+      store.putItem(createSampleItem(
+          id: 'a1',
+          name: '名前のみ変更',
+          shopId: 'shop_a',
+          price: 100,
+          quantity: 2,
+          isChecked: true));
+      totals.publish();
+
+      expect(notifications, 0);
+    });
+
+    test('購読者がいなくなった集計値は破棄され、次の購読では作り直される', () {
+      void listener() {}
+      final shopListenable = totals.watchShop('shop_a');
+      final groupListenable = totals.watchSharedTabGroup('group_1');
+      shopListenable.addListener(listener);
+      groupListenable.addListener(listener);
+
+      shopListenable.removeListener(listener);
+      groupListenable.removeListener(listener);
+
+      expect(totals.watchShop('shop_a'), isNot(same(shopListenable)));
+      expect(totals.watchSharedTabGroup('group_1'),
+          isNot(same(groupListenable)));
+    });
+
+    test('破棄された購読先に再び購読すると最新の値で登録し直される', () {
+      var notifications = 0;
+      void listener() => notifications++;
+      final listenable = totals.watchShop('shop_a');
+      listenable.addListener(listener);
+      listenable.removeListener(listener);
+
+      store.putItem(createSampleItem(
+          id: 'a2', shopId: 'shop_a', price: 300, isChecked: true));
+      totals.publish();
+      listenable.addListener(listener);
+
+      expect(listenable.value.checkedTotal, 500);
+      expect(totals.watchShop('shop_a'), same(listenable));
+
+      store.removeItem('a2');
+      totals.publish();
+      expect(notifications, 1);
+      expect(listenable.value.checkedTotal, 200);
+    });
+
+    test('一括置換後は購読中の集計値が作り直される', () {
+      final listenable = totals.watchShop('shop_a');
+
+      store.clear();
+      totals.publish();
+
+      expect(listenable.value, ShopTotals.empty);
+    });
+  });
+}
@@ -0,0 +1,178 @@
+import 'dart:convert';
+
+import 'package:flutter_test/flutter_test.dart';
+import 'package:maikago/models/list.dart';
+import 'package:maikago/models/shop.dart';
+import 'package:maikago/providers/managers/guest_persistence_queue.dart';
+import 'package:maikago/services/settings_persistence.dart';
+import 'package:shared_preferences/shared_preferences.dart';
+import '../../helpers/test_helpers.dart';
+
+void main() {
+  late Map<String, ListItem> items;
+  late List<Shop> shops;
+  late int shopReads;
+  late GuestPersistenceQueue queue;
+
+  GuestPersistenceQueue createQueue() => GuestPersistenceQueue(
+        readItems: () => items.values,
+        readItem: (itemId) => items[itemId],
+        readShops: () {
+          shopReads++;
+          return shops;
+        },
+        debounce: const Duration(milliseconds: 20),
+      );
+
+  /// デバウンス経過後の書き込み完了を待つ
+  Future<void> waitForWrite() async {
+    await Future<void>.delayed(const Duration(milliseconds: 50));
+    await queue.flush();
+  }
+
+  setUp(() {
+    SharedPreferences.setMockInitialValues({});
+    items = {
+      for (final item in createSampleItems(40)) item.id: item,
+    };
+    shops = [createSampleShop(id: '0', items: items.values.toList())];
+    shopReads = 0;
+    queue = createQueue();
+  });
+
+  group('書き込みの集約', () {
+    test('デバウンス中の変更は1回の書き込みにまとめられる', () async {
+      for (int i = 0; i < 10; i++) {
+        queue.markShopsChanged();
+        queue.markItemsChanged(['item_$i']);
+      }
+      expect(queue.hasPendingChanges, true);
+
+      await waitForWrite();
+
+      expect(shopReads, 1);
+      expect(queue.hasPendingChanges, false);
+    });
+
+    test('変更のあったシャードのみ再保存される', () async {
+      queue.markAllChanged();
+      await queue.flush();
+
+      final prefs = await SharedPreferences.getInstance();
+      final targetShard = guestItemShardOf('item_0');
+      final otherShard = (targetShard + 1) % guestItemShardCount;
+      await prefs.setString('guest_items_$otherShard', 'untouched');
+
+      items['item_0'] = items['item_0']!.copyWith(name: '更新');
+      queue.markItemsChanged(['item_0']);
+      await waitForWrite();
+
+      expect(prefs.getString('guest_items_$otherShard'), 'untouched');
+      expect(prefs.getString('guest_items_$targetShard'), contains('更新'));
+    });
+
+    test('ショップはitemsを含めずに保存される', () async {
+      queue.markShopsChanged();
+      await queue.flush();
+
+      final prefs = await SharedPreferences.getInstance();
+      final List<dynamic> saved = json.decode(prefs.getString('guest_shops')!);
+      expect(saved.single['items'], isEmpty);
+    });
+
+    test('flush後にキャッシュを破棄しても呼び出し時点の内容が保存される', () async {
+      queue.markAllChanged();
+      final write = queue.flush();
+      items.clear();
+      shops = [];
+      await write;
+
+      final (loadedItems, loadedShops) = await createQueue().load();
+      expect(loadedItems.length, 40);
+      expect(loadedShops.length, 1);
+    });
+
+    test('書き込みに失敗した場合は新たな変更がなくても再試行される', () async {
+      var attempts = 0;
+      queue = GuestPersistenceQueue(
+        readItems: () => items.values,
+        readItem: (itemId) => items[itemId],
+        readShops: () => shops,
+        saveItemShards: (shardsJson, shardCount) async {
+          attempts++;
+          if (attempts == 1) throw Exception('書き込み失敗');
+          await SettingsPersistence.saveGuestItemShards(
+              shardsJson, shardCount);
+        },
+        debounce: const Duration(milliseconds: 20),
+      );
+
+      queue.markItemsChanged(['item_0']);
+      await queue.flush();
+      expect(attempts, 1);
+      expect(queue.hasPendingChanges, true);
+
+      await waitForWrite();
+
+      expect(attempts, 2);
+      expect(queue.hasPendingChanges, false);
+      final prefs = await SharedPreferences.getInstance();
+      expect(prefs.getString('guest_items_${guestItemShardOf('item_0')}'),
+          contains('item_0'));
+    });
+  });
+
+  group('読み込み', () {
+    test('保存したデータを作成日時の新しい順で復元できる', () async {
+      queue.markAllChanged();
+      await queue.flush();
+
+      final (loadedItems, loadedShops) = await createQueue().load();
+
+      expect(loadedItems.first.id, 'item_39');
+      expect(loadedItems.last.id, 'item_0');
+      expect(loadedShops.single.id, '0');
+    });
+
+    test('削除したアイテムは保存対象から外れる', () async {
+      queue.markAllChanged();
+      await queue.flush();
+
+      items.remove('item_5');
+      queue.markItemsChanged(['item_5']);
+      await waitForWrite();
+
+      final (loadedItems, _) = await createQueue().load();
+      expect(loadedItems.map((i) => i.id), isNot(contains('item_5')));
+      expect(loadedItems.length, 39);
+    });
+
+    test('旧形式（単一JSON）のデータを読み込み、シャード形式へ移行する', () async {
+      final legacy = createSampleItems(3);
+      SharedPreferences.setMockInitialValues({
+        'guest_items': json.encode(legacy.map((e) => e.toMap()).toList()),
+      });
+
+      final (loadedItems, _) = await queue.load();
+      expect(loadedItems.map((i) => i.id), ['item_0', 'item_1', 'item_2']);
+      expect(queue.hasPendingChanges, true);
+
+      await queue.flush();
+
+      final prefs = await SharedPreferences.getInstance();
+      expect(prefs.containsKey('guest_items'), false);
+      expect(prefs.getInt('guest_item_shard_count'), guestItemShardCount);
+    });
+
+    test('clearで保存済みデータが削除される', () async {
+      queue.markAllChanged();
+      await queue.flush();
+
+      await queue.clear();
+
+      final (loadedItems, loadedShops) = await createQueue().load();
+      expect(loadedItems, isEmpty);
+      expect(loadedShops, isEmpty);
+    });
+  });
+}
@@ -0,0 +1,142 @@
+import 'package:flutter_test/flutter_test.dart';
+import 'package:maikago/providers/managers/indexed_data_store.dart';
+import '../../helpers/test_helpers.dart';
+
+void main() {
+  late IndexedDataStore store;
+
+  setUp(() {
+    store = IndexedDataStore();
+    store.replaceShops([
+      createSampleShop(id: 'shop_a'),
+      createSampleShop(id: 'shop_b'),
+    ]);
+  });
+
+  group('アイテムの追加と並び順', () {
+    test('prependItemは先頭、appendItemは末尾に並ぶ', () {
+      store.appendItem(createSampleItem(id: 'tail_1', shopId: 'shop_a'));
+      store.prependItem(createSampleItem(id: 'head_1', shopId: 'shop_a'));
+      store.prependItem(createSampleItem(id: 'head_2', shopId: 'shop_a'));
+      store.appendItem(createSampleItem(id: 'tail_2', shopId: 'shop_a'));
+
+      expect(store.items.map((i) => i.id),
+          ['head_2', 'head_1', 'tail_1', 'tail_2']);
+      expect(store.itemCount, 4);
+    });
+
+    test('既存IDの追加は位置を保ったまま置換される', () {
+      store.replaceItems([
+        createSampleItem(id: 'item_1', shopId: 'shop_a'),
+        createSampleItem(id: 'item_2', shopId: 'shop_a'),
+      ]);
+
+      store.prependItem(
+          createSampleItem(id: 'item_2', name: '更新', shopId: 'shop_a'));
+
+      expect(store.items.map((i) => i.id), ['item_1', 'item_2']);
+      expect(store.itemById('item_2')!.name, '更新');
+    });
+
+    test('replaceItemsは同一IDの最初の要素を保持する', () {
+      store.replaceItems([
+        createSampleItem(id: 'dup', name: '最初', shopId: 'shop_a'),
+        createSampleItem(id: 'dup', name: '後', shopId: 'shop_a'),
+      ]);
+
+      expect(store.itemCount, 1);
+      expect(store.items.single.name, '最初');
+    });
+
+    test('itemsは変更不可', () {
+      expect(
+        () => store.items.add(createSampleItem(id: 'x')),
+        throwsUnsupportedError,
+      );
+    });
+  });
+
+  group('ショップ索引', () {
+    setUp(() {
+      store.replaceItems([
+        createSampleItem(id: 'item_1', shopId: 'shop_a'),
+        createSampleItem(id: 'item_2', shopId: 'shop_b'),
+      ]);
+    });
+
+    test('ショップのitemsは索引から導出される', () {
+      expect(store.shopById('shop_a')!.items.map((i) => i.id), ['item_1']);
+      expect(store.shopById('shop_b')!.items.map((i) => i.id), ['item_2']);
+    });
+
+    test('shopIdの変更で所属ショップが移動する', () {
+      store.putItem(createSampleItem(id: 'item_1', shopId: 'shop_b'));
+
+      expect(store.shopById('shop_a')!.items, isEmpty);
+      expect(store.shopById('shop_b')!.items.map((i) => i.id),
+          unorderedEquals(['item_1', 'item_2']));
+    });
+
+    test('影響のないショップのビューは再生成されない', () {
+      final before = store.shops[1];
+
+      store.putItem(
+          createSampleItem(id: 'item_1', isChecked: true, shopId: 'shop_a'));
+
+      expect(identical(store.shops[1], before), true);
+      expect(store.shops[0].items.single.isChecked, true);
+    });
+
+    test('putShopはメタ情報のみ置換し、itemsは索引を維持する', () {
+      store.putShop(createSampleShop(id: 'shop_a', name: '改名', items: []));
+
+      expect(store.shopById('shop_a')!.name, '改名');
+      expect(store.shopById('shop_a')!.items.length, 1);
+    });
+
+    test('replaceShopItemsで所属アイテムを置換できる', () {
+      store.replaceShopItems('shop_a', [
+        createSampleItem(id: 'item_3', shopId: 'shop_a'),
+      ]);
+
+      expect(store.containsItem('item_1'), false);
+      expect(store.shopById('shop_a')!.items.map((i) => i.id), ['item_3']);
+      expect(store.shopById('shop_b')!.items.length, 1);
+    });
+
+    test('removeItemで索引からも削除される', () {
+      final removed = store.removeItem('item_2');
+
+      expect(removed?.id, 'item_2');
+      expect(store.shopById('shop_b')!.items, isEmpty);
+      expect(store.removeItem('item_2'), isNull);
+    });
+  });
+
+  group('ショップの追加と削除', () {
+    test('addShopは既存IDを上書きしない', () {
+      expect(store.addShop(createSampleShop(id: 'shop_a', name: '別名')), false);
+      expect(store.shopById('shop_a')!.name, isNot('別名'));
+      expect(store.addShop(createSampleShop(id: 'shop_c')), true);
+      expect(store.indexOfShop('shop_c'), 2);
+    });
+
+    test('removeShopで並び順の位置が詰められる', () {
+      store.removeShop('shop_a');
+
+      expect(store.indexOfShop('shop_a'), -1);
+      expect(store.indexOfShop('shop_b'), 0);
+      expect(store.shops.map((s) => s.id), ['shop_b']);
+    });
+
+    test('clearで全データが破棄される', () {
+      store.appendItem(createSampleItem(id: 'item_1', shopId: 'shop_a'));
+
+      store.clear();
+
+      expect(store.items, isEmpty);
+      expect(store.shops, isEmpty);
+      expect(store.itemsOfShop('shop_a'), isEmpty);
+    });
+  });
+}
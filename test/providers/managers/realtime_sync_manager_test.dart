@@ -0,0 +1,214 @@
+import 'dart:async';
+
+import 'package:flutter_test/flutter_test.dart';
+import 'package:mockito/mockito.dart';
+import 'package:maikago/models/list.dart';
+import 'package:maikago/models/shop.dart';
+import 'package:maikago/providers/data_provider_state.dart';
+import 'package:maikago/providers/managers/data_cache_manager.dart';
+import 'package:maikago/providers/managers/realtime_sync_manager.dart';
+import 'package:maikago/providers/repositories/item_repository.dart';
+import 'package:maikago/providers/repositories/shop_repository.dart';
+import 'package:maikago/services/data_service.dart';
+import '../../helpers/test_helpers.dart';
+import '../../mocks.mocks.dart';
+
+void main() {
+  late MockDataService mockDataService;
+  late DataProviderState state;
+  late DataCacheManager cacheManager;
+  late ItemRepository itemRepository;
+  late RealtimeSyncManager syncManager;
+  late StreamController<List<DataChange<ListItem>>> itemChanges;
+  late StreamController<List<Shop>> shopSnapshots;
+  late int notifyCount;
+
+  DataChange<ListItem> added(ListItem item) =>
+      DataChange(type: DataChangeType.added, id: item.id, data: item);
+
+  DataChange<ListItem> modified(ListItem item) =>
+      DataChange(type: DataChangeType.modified, id: item.id, data: item);
+
+  setUp(() {
+    notifyCount = 0;
+    mockDataService = MockDataService();
+    state = DataProviderState(notifyListeners: () => notifyCount++);
+    cacheManager = DataCacheManager(
+      dataService: mockDataService,
+      state: state,
+    );
+    itemRepository = ItemRepository(
+      dataService: mockDataService,
+      cacheManager: cacheManager,
+      state: state,
+    );
+    syncManager = RealtimeSyncManager(
+      dataService: mockDataService,
+      cacheManager: cacheManager,
+      itemRepository: itemRepository,
+      shopRepository: ShopRepository(
+        dataService: mockDataService,
+        cacheManager: cacheManager,
+        state: state,
+      ),
+      state: state,
+    );
+
+    itemChanges = StreamController<List<DataChange<ListItem>>>();
+    shopSnapshots = StreamController<List<Shop>>();
+    when(mockDataService.getItemChanges(
+      isAnonymous: anyNamed('isAnonymous'),
+    )).thenAnswer((_) => itemChanges.stream);
+    when(mockDataService.getShops(
+      isAnonymous: anyNamed('isAnonymous'),
+    )).thenAnswer((_) => shopSnapshots.stream);
+
+    cacheManager.addShopToCache(createSampleShop(id: '0'));
+  });
+
+  tearDown(() {
+    syncManager.cancelRealtimeSync();
+    unawaited(itemChanges.close());
+    unawaited(shopSnapshots.close());
+  });
+
+  group('差分同期', () {
+    test('最初のイベントで全件がキャッシュに反映される', () async {
+      syncManager.startRealtimeSync();
+
+      itemChanges.add(createSampleItems(3).map(added).toList());
+      await pumpEventQueue();
+
+      expect(cacheManager.items.length, 3);
+      expect(cacheManager.shops.first.items.length, 3);
+      expect(state.isSynced, true);
+    });
+
+    test('最初のイベントが空の場合も全件スナップショットとして扱う', () async {
+      // 再購読前のキャッシュ（リモートではすべて削除済み）
+      cacheManager.addItemToCache(createSampleItem(id: 'stale'));
+      syncManager.startRealtimeSync();
+
+      itemChanges.add([]);
+      await pumpEventQueue();
+
+      expect(cacheManager.items, isEmpty);
+      expect(state.isSynced, true);
+
+      // スナップショット未着の楽観的追加は、次の差分で消えない
+      cacheManager.addItemToCache(createSampleItem(id: 'local'));
+      itemChanges.add([added(createSampleItem(id: 'remote'))]);
+      await pumpEventQueue();
+
+      expect(cacheManager.items.map((i) => i.id),
+          unorderedEquals(['local', 'remote']));
+      expect(state.isSynced, true);
+    });
+
+    test('バッチ更新中に届いた空の最初のイベントも完了後に反映される', () async {
+      cacheManager.addItemToCache(createSampleItem(id: 'stale'));
+      syncManager.startRealtimeSync();
+
+      state.isBatchUpdating = true;
+      itemChanges.add([]);
+      await pumpEventQueue();
+      expect(cacheManager.items.length, 1);
+
+      state.isBatchUpdating = false;
+
+      expect(cacheManager.items, isEmpty);
+      expect(state.isSynced, true);
+    });
+
+    test('2回目以降のイベントは差分のみ適用される', () async {
+      syncManager.startRealtimeSync();
+      itemChanges.add(createSampleItems(3).map(added).toList());
+      await pumpEventQueue();
+
+      itemChanges.add([
+        modified(createSampleItem(id: 'item_1', name: '更新', isChecked: true)),
+        const DataChange(type: DataChangeType.removed, id: 'item_2'),
+      ]);
+      await pumpEventQueue();
+
+      expect(cacheManager.items.map((i) => i.id), ['item_0', 'item_1']);
+      expect(cacheManager.items[1].name, '更新');
+      expect(cacheManager.shops.first.items.length, 2);
+    });
+
+    test('変更のない差分ではnotifyListenersが呼ばれない', () async {
+      syncManager.startRealtimeSync();
+      itemChanges.add(createSampleItems(1).map(added).toList());
+      await pumpEventQueue();
+      final countAfterInitial = notifyCount;
+
+      itemChanges.add([
+        const DataChange(type: DataChangeType.removed, id: 'unknown'),
+      ]);
+      await pumpEventQueue();
+
+      expect(notifyCount, countAfterInitial);
+    });
+
+    test('保留中のアイテムはローカル版が優先される', () async {
+      syncManager.startRealtimeSync();
+      itemChanges.add(createSampleItems(1).map(added).toList());
+      await pumpEventQueue();
+
+      itemRepository.pendingUpdates['item_0'] = DateTime.now();
+      itemChanges.add([modified(createSampleItem(id: 'item_0', name: '古い値'))]);
+      await pumpEventQueue();
+
+      expect(cacheManager.items.single.name, 'サンプル商品0');
+    });
+
+    test('保留中に見送ったリモート差分は保留の期限切れ後に適用される', () async {
+      syncManager.startRealtimeSync();
+      itemChanges.add(createSampleItems(1).map(added).toList());
+      await pumpEventQueue();
+
+      // 保留期間（10秒）の終了間際にリモートの変更が届く
+      itemRepository.pendingUpdates['item_0'] = DateTime.now()
+          .subtract(const Duration(seconds: 9, milliseconds: 900));
+      itemChanges.add([
+        modified(createSampleItem(id: 'item_0', name: '他端末')),
+      ]);
+      await pumpEventQueue();
+      expect(cacheManager.items.single.name, 'サンプル商品0');
+
+      await Future<void>.delayed(const Duration(milliseconds: 300));
+
+      expect(cacheManager.items.single.name, '他端末');
+    });
+
+    test('バッチ更新中の差分は完了後に適用される', () async {
+      syncManager.startRealtimeSync();
+      itemChanges.add(createSampleItems(1).map(added).toList());
+      await pumpEventQueue();
+
+      await syncManager.runBatchUpdate(() async {
+        itemChanges.add([added(createSampleItem(id: 'item_new'))]);
+        await pumpEventQueue();
+        expect(cacheManager.items.length, 1);
+      });
+
+      expect(cacheManager.items.map((i) => i.id), contains('item_new'));
+    });
+
+    test('バッチ更新フラグを直接解除した場合も保留した差分が適用される', () async {
+      syncManager.startRealtimeSync();
+      itemChanges.add(createSampleItems(1).map(added).toList());
+      await pumpEventQueue();
+
+      // ItemRepository.deleteItems と同じくフラグを直接操作する
+      state.isBatchUpdating = true;
+      itemChanges.add([added(createSampleItem(id: 'item_new'))]);
+      await pumpEventQueue();
+      expect(cacheManager.items.length, 1);
+
+      state.isBatchUpdating = false;
+
+      expect(cacheManager.items.map((i) => i.id), contains('item_new'));
+    });
+  });
+}
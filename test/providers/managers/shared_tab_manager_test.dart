@@ -2,6 +2,7 @@ import 'package:flutter_test/flutter_test.dart';
 import 'package:maikago/models/shop.dart';
 import 'package:maikago/providers/managers/shared_tab_manager.dart';
 import 'package:maikago/providers/managers/data_cache_manager.dart';
+import 'package:maikago/providers/managers/derived_totals.dart';
 import 'package:maikago/providers/data_provider_state.dart';
 import 'package:maikago/providers/repositories/shop_repository.dart';
 import 'package:maikago/services/data_service.dart';
@@ -16,6 +17,21 @@ class FakeDataCacheManager implements DataCacheManager {
   @override
   bool get isLocalMode => true;
 
+  @override
+  void updateShopInCache(Shop shop) {
+    final index = shops.indexWhere((s) => s.id == shop.id);
+    if (index != -1) shops[index] = shop;
+  }
+
+  // 各ショップの items から集計する（アイテムの shopId はショップに合わせる）
+  @override
+  DerivedTotalsEngine get totals => DerivedTotalsEngine()
+    ..resetShops(shops)
+    ..resetItems([
+      for (final shop in shops)
+        for (final item in shop.items) item.copyWith(shopId: shop.id),
+    ]);
+
   // テスト不要のメソッドは空実装
   @override
   dynamic noSuchMethod(Invocation invocation) => null;
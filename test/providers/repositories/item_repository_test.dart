@@ -370,7 +370,7 @@ void main() {
         cacheManager.addItemToCache(item);
       }
 
-      when(mockDataService.updateItem(
+      when(mockDataService.updateItemsBatch(
         any,
         isAnonymous: anyNamed('isAnonymous'),
       )).thenAnswer((_) async {});
@@ -381,11 +381,16 @@ void main() {
         pendingShopUpdates: pendingShopUpdates,
       );
 
-      // 7アイテム → batchSize=5で2回のバッチ
-      verify(mockDataService.updateItem(
+      // 7アイテム → 1回の一括書き込み
+      final captured = verify(mockDataService.updateItemsBatch(
+        captureAny,
+        isAnonymous: anyNamed('isAnonymous'),
+      )).captured;
+      expect(captured.single, hasLength(7));
+      verifyNever(mockDataService.updateItem(
         any,
         isAnonymous: anyNamed('isAnonymous'),
-      )).called(7);
+      ));
     });
 
     test('ローカルモードではFirebaseに保存されない', () async {
@@ -400,7 +405,7 @@ void main() {
         pendingShopUpdates: pendingShopUpdates,
       );
 
-      verifyNever(mockDataService.updateItem(
+      verifyNever(mockDataService.updateItemsBatch(
         any,
         isAnonymous: anyNamed('isAnonymous'),
       ));
@@ -469,7 +474,7 @@ void main() {
 
       await repository.persistReorderToFirebase(shop, items);
 
-      verifyNever(mockDataService.updateShop(
+      verifyNever(mockDataService.updateShopBatch(
         any,
         isAnonymous: anyNamed('isAnonymous'),
       ));
@@ -480,25 +485,26 @@ void main() {
       final shop = createSampleShop(id: '0', name: 'デフォルト');
       final items = createSampleItems(3, shopId: '0');
 
-      when(mockDataService.updateShop(
+      when(mockDataService.updateShopBatch(
         any,
         isAnonymous: anyNamed('isAnonymous'),
       )).thenAnswer((_) async {});
-      when(mockDataService.updateItem(
+      when(mockDataService.updateItemsBatch(
         any,
         isAnonymous: anyNamed('isAnonymous'),
       )).thenAnswer((_) async {});
 
       await repository.persistReorderToFirebase(shop, items);
 
-      verify(mockDataService.updateShop(
+      verify(mockDataService.updateShopBatch(
         any,
         isAnonymous: anyNamed('isAnonymous'),
       )).called(1);
-      verify(mockDataService.updateItem(
-        any,
+      final captured = verify(mockDataService.updateItemsBatch(
+        captureAny,
         isAnonymous: anyNamed('isAnonymous'),
-      )).called(3);
+      )).captured;
+      expect(captured.single, hasLength(3));
     });
 
     test('Firebase保存失敗時にisSyncedがfalseになりrethrowされる', () async {
@@ -506,10 +512,14 @@ void main() {
       final shop = createSampleShop(id: '0', name: 'デフォルト');
       final items = createSampleItems(1, shopId: '0');
 
-      when(mockDataService.updateShop(
+      when(mockDataService.updateShopBatch(
         any,
         isAnonymous: anyNamed('isAnonymous'),
       )).thenThrow(Exception('Firebase error'));
+      when(mockDataService.updateItemsBatch(
+        any,
+        isAnonymous: anyNamed('isAnonymous'),
+      )).thenAnswer((_) async {});
 
       expect(
         () => repository.persistReorderToFirebase(shop, items),
@@ -689,7 +699,7 @@ void main() {
         cacheManager.addItemToCache(item);
       }
 
-      when(mockDataService.deleteItem(
+      when(mockDataService.deleteItemsBatch(
         any,
         isAnonymous: anyNamed('isAnonymous'),
       )).thenAnswer((_) async {});
@@ -701,6 +711,31 @@ void main() {
       expect(state.isBatchUpdating, false);
     });
 
+    test('オンラインモードでは1回の一括削除でFirebaseから削除される', () async {
+      cacheManager.setLocalMode(false);
+      final items = createSampleItems(3, shopId: '0');
+      for (final item in items) {
+        cacheManager.addItemToCache(item);
+      }
+
+      when(mockDataService.deleteItemsBatch(
+        any,
+        isAnonymous: anyNamed('isAnonymous'),
+      )).thenAnswer((_) async {});
+
+      final idsToDelete = items.map((item) => item.id).toList();
+      await repository.deleteItems(idsToDelete);
+
+      verify(mockDataService.deleteItemsBatch(
+        idsToDelete,
+        isAnonymous: anyNamed('isAnonymous'),
+      )).called(1);
+      verifyNever(mockDataService.deleteItem(
+        any,
+        isAnonymous: anyNamed('isAnonymous'),
+      ));
+    });
+
     test('Firebase一括削除失敗時にロールバックされる', () async {
       cacheManager.setLocalMode(false);
       final items = createSampleItems(3, shopId: '0');
@@ -708,7 +743,7 @@ void main() {
         cacheManager.addItemToCache(item);
       }
 
-      when(mockDataService.deleteItem(
+      when(mockDataService.deleteItemsBatch(
         any,
         isAnonymous: anyNamed('isAnonymous'),
       )).thenThrow(Exception('Firebase error'));
@@ -730,7 +765,7 @@ void main() {
         cacheManager.addItemToCache(item);
       }
 
-      when(mockDataService.deleteItem(
+      when(mockDataService.deleteItemsBatch(
         any,
         isAnonymous: anyNamed('isAnonymous'),
       )).thenThrow(Exception('Firebase error'));
@@ -0,0 +1,144 @@
+import 'package:flutter_test/flutter_test.dart';
+import 'package:maikago/services/data/batch_write_pipeline.dart';
+
+/// コミット内容を記録するフェイク
+class FakeBatchCommitter {
+  final List<List<BatchWriteOp>> commits = [];
+  Object? error;
+
+  Future<void> commit(List<BatchWriteOp> ops) async {
+    commits.add(ops);
+    if (error != null) throw error!;
+  }
+}
+
+void main() {
+  late FakeBatchCommitter committer;
+  late List<BatchCommitReport> reports;
+  late BatchWritePipeline pipeline;
+
+  BatchWriteOp merge(String id, Map<String, dynamic> data) =>
+      BatchWriteOp.merge('users/u/items/$id', data);
+
+  setUp(() {
+    committer = FakeBatchCommitter();
+    reports = [];
+    pipeline = BatchWritePipeline(
+      commit: committer.commit,
+      window: const Duration(milliseconds: 10),
+      onBatchCommitted: reports.add,
+    );
+  });
+
+  group('バッチへの集約', () {
+    test('ウィンドウ内の書き込みは1回のコミットにまとめられる', () async {
+      await Future.wait([
+        pipeline.enqueue(merge('a', {'price': 1})),
+        pipeline.enqueueAll([merge('b', {'price': 2}), merge('c', {})]),
+      ]);
+
+      expect(committer.commits.length, 1);
+      expect(committer.commits.single.map((op) => op.path), [
+        'users/u/items/a',
+        'users/u/items/b',
+        'users/u/items/c',
+      ]);
+    });
+
+    test('500件を超える書き込みは500件ずつに分割される', () async {
+      await pipeline.enqueueAll(
+          List.generate(1200, (i) => merge('item_$i', {'sortOrder': i})));
+
+      expect(committer.commits.map((ops) => ops.length), [500, 500, 200]);
+      expect(reports.map((r) => r.opCount), [500, 500, 200]);
+    });
+
+    test('空の書き込みではコミットされない', () async {
+      await pipeline.enqueueAll([]);
+      await pipeline.flush();
+
+      expect(committer.commits, isEmpty);
+    });
+  });
+
+  group('同一ドキュメントへの書き込みの集約', () {
+    test('連続したマージは1件にまとめられ、後の値が優先される', () async {
+      await pipeline.enqueueAll([
+        merge('a', {'name': '旧', 'price': 1}),
+        merge('a', {'price': 2}),
+        merge('a', {'isChecked': true}),
+      ]);
+
+      final op = committer.commits.single.single;
+      expect(op.data, {'name': '旧', 'price': 2, 'isChecked': true});
+      expect(reports.single.collapsedCount, 2);
+    });
+
+    test('削除はそれ以前のマージを置き換える', () async {
+      await pipeline.enqueueAll([
+        merge('a', {'price': 1}),
+        const BatchWriteOp.delete('users/u/items/a'),
+      ]);
+
+      expect(committer.commits.single.single.isDelete, true);
+    });
+
+    test('削除後のマージは削除→マージの順で送られる', () async {
+      await pipeline.enqueueAll([
+        const BatchWriteOp.delete('users/u/items/a'),
+        merge('a', {'price': 1}),
+        merge('a', {'price': 2}),
+      ]);
+
+      final ops = committer.commits.single;
+      expect(ops.map((op) => op.isDelete), [true, false]);
+      expect(ops.last.data, {'price': 2});
+    });
+
+    test('同一ドキュメントの書き込みはバッチをまたがない', () async {
+      pipeline = BatchWritePipeline(
+        commit: committer.commit,
+        window: const Duration(milliseconds: 10),
+        maxOpsPerBatch: 2,
+      );
+
+      await pipeline.enqueueAll([
+        merge('a', {}),
+        const BatchWriteOp.delete('users/u/items/b'),
+        merge('b', {}),
+      ]);
+
+      expect(committer.commits.map((ops) => ops.length), [1, 2]);
+    });
+  });
+
+  group('結果の報告', () {
+    test('コミット失敗時は対象の書き込みがエラーで完了する', () async {
+      committer.error = Exception('permission-denied');
+
+      await expectLater(
+        pipeline.enqueue(merge('a', {})),
+        throwsException,
+      );
+      expect(reports.single.isSuccess, false);
+    });
+
+    test('コミットごとにレイテンシが報告される', () async {
+      await pipeline.enqueue(merge('a', {}));
+
+      expect(reports.single.isSuccess, true);
+      expect(reports.single.latency.inMicroseconds, greaterThanOrEqualTo(0));
+    });
+
+    test('flushでウィンドウを待たずにコミットされる', () async {
+      final write = pipeline.enqueue(merge('a', {}));
+      expect(pipeline.pendingOpCount, 1);
+
+      await pipeline.flush();
+
+      expect(committer.commits.length, 1);
+      expect(pipeline.pendingOpCount, 0);
+      await write;
+    });
+  });
+}
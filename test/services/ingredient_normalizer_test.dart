@@ -0,0 +1,76 @@
+import 'package:flutter_test/flutter_test.dart';
+import 'package:maikago/services/ingredient_normalizer.dart';
+
+void main() {
+  group('normalizeIngredientName', () {
+    test('ひらがな・カタカナ・全角英数字の違いを吸収する', () {
+      expect(normalizeIngredientName('キャベツ'), normalizeIngredientName('きゃべつ'));
+      expect(normalizeIngredientName('ＡＢＣ　ソース'), 'abcソース');
+    });
+
+    test('漢字表記や別名は代表表記にまとめる', () {
+      final key = normalizeIngredientName('玉ねぎ');
+      expect(normalizeIngredientName('玉葱'), key);
+      expect(normalizeIngredientName('たまねぎ'), key);
+      expect(normalizeIngredientName('タマネギ'), key);
+      expect(normalizeIngredientName('醤油'), normalizeIngredientName('しょうゆ'));
+    });
+
+    test('分量・単位・括弧書きを除去する', () {
+      final key = normalizeIngredientName('玉ねぎ');
+      expect(normalizeIngredientName('玉ねぎ 1個'), key);
+      expect(normalizeIngredientName('玉ねぎ (1/2個)'), key);
+      expect(normalizeIngredientName('玉ねぎ（中）'), key);
+      expect(normalizeIngredientName('しょうゆ 大さじ2'), normalizeIngredientName('醤油'));
+      expect(normalizeIngredientName('豚肉 200g'), normalizeIngredientName('豚肉'));
+    });
+
+    test('分量のみの場合は空文字', () {
+      expect(normalizeIngredientName('適量'), '');
+      expect(normalizeIngredientName('  '), '');
+    });
+
+    test('単位に含まれる文字でも材料名の一部は残す', () {
+      expect(normalizeIngredientName('カップ麺'), 'カップ麺');
+    });
+  });
+
+  group('IngredientIndex', () {
+    test('正規化キーが一致する候補は同じ食材と判定する', () {
+      final index = IngredientIndex(['にんじん', 'タマネギ (1個)', '牛乳']);
+
+      final lookup = index.lookup('玉葱');
+
+      expect(lookup.sameIndex, 1);
+      expect(lookup.ambiguousIndexes, isEmpty);
+    });
+
+    test('似ている候補は判定できないものとして返す', () {
+      final index = IngredientIndex(['豚バラ肉', 'キャベツ', '豚こま肉']);
+
+      final lookup = index.lookup('豚バラ');
+
+      expect(lookup.sameIndex, isNull);
+      expect(lookup.ambiguousIndexes.first, 0);
+      expect(lookup.ambiguousIndexes, isNot(contains(1)));
+    });
+
+    test('共通する文字がない候補は違う食材と判定する', () {
+      final index = IngredientIndex(['キャベツ', '牛乳']);
+
+      final lookup = index.lookup('玉ねぎ');
+
+      expect(lookup.sameIndex, isNull);
+      expect(lookup.ambiguousIndexes, isEmpty);
+    });
+
+    test('空の材料名はどの候補とも一致しない', () {
+      final index = IngredientIndex(['適量', 'キャベツ']);
+
+      final lookup = index.lookup('少々');
+
+      expect(lookup.key, '');
+      expect(lookup.sameIndex, isNull);
+    });
+  });
+}
@@ -0,0 +1,140 @@
+import 'dart:typed_data';
+
+import 'package:flutter_test/flutter_test.dart';
+import 'package:image/image.dart' as img;
+import 'package:maikago/services/ocr_image_preprocessor.dart';
+
+/// 左半分が黒・右半分が白の画像
+Uint8List createTestPng(int width, int height) {
+  final image = img.Image(width: width, height: height);
+  for (int y = 0; y < height; y++) {
+    for (int x = 0; x < width; x++) {
+      final value = x < width / 2 ? 0 : 255;
+      image.setPixelRgb(x, y, value, value, value);
+    }
+  }
+  return img.encodePng(image);
+}
+
+/// 左半分が黒・右半分が白の画像を、EXIFの向き [orientation] 付きのJPEGにする
+Uint8List createOrientedJpg(int width, int height, int orientation) {
+  final image = img.decodePng(createTestPng(width, height))!;
+  image.exif.imageIfd.orientation = orientation;
+  return img.encodeJpg(image);
+}
+
+void main() {
+  group('preprocessOcrImage', () {
+    test('長辺がmaxSize以下になるようアスペクト比を保って縮小する', () {
+      final result = preprocessOcrImage(
+          (createTestPng(400, 200), const OcrPreprocessOptions(maxSize: 100)))!;
+
+      expect(result.width, 100);
+      expect(result.height, 50);
+      expect(result.originalWidth, 400);
+      expect(result.originalHeight, 200);
+      expect(img.decodeJpg(result.bytes), isNotNull);
+    });
+
+    test('EXIFの向きが90度回転（6）の画像は縦横を入れ替えて縮小し、1回だけ回転する', () {
+      final result = preprocessOcrImage((
+        createOrientedJpg(400, 200, 6),
+        const OcrPreprocessOptions(maxSize: 100),
+      ))!;
+
+      expect(result.originalWidth, 200);
+      expect(result.originalHeight, 400);
+      expect(result.width, 50);
+      expect(result.height, 100);
+
+      // 時計回りに90度回転するため、保存時の左半分（黒）が上半分になる
+      final decoded = img.decodeJpg(result.bytes)!;
+      expect(decoded.width, 50);
+      expect(decoded.height, 100);
+      expect(decoded.exif.imageIfd.hasOrientation, false);
+      expect(decoded.getPixel(25, 10).r, lessThan(50));
+      expect(decoded.getPixel(25, 90).r, greaterThan(200));
+    });
+
+    test('maxSizeより小さい画像は拡大しない', () {
+      final result = preprocessOcrImage(
+          (createTestPng(80, 60), const OcrPreprocessOptions(maxSize: 100)))!;
+
+      expect(result.width, 80);
+      expect(result.height, 60);
+    });
+
+    test('切り抜き範囲の長辺がmaxSize以下になる倍率で縮小してから切り抜く', () {
+      final result = preprocessOcrImage((
+        createTestPng(400, 400),
+        const OcrPreprocessOptions(
+          maxSize: 100,
+          cropRegion: OcrCropRegion(left: 0.5, top: 0, width: 0.5, height: 0.25),
+        ),
+      ))!;
+
+      expect(result.width, 100);
+      expect(result.height, 50);
+      // 右半分（白）のみが残る
+      final decoded = img.decodeJpg(result.bytes)!;
+      expect(decoded.getPixel(50, 25).r, greaterThan(200));
+    });
+
+    test('工程ごとの処理時間を記録する', () {
+      final result = preprocessOcrImage((
+        createTestPng(400, 200),
+        const OcrPreprocessOptions(
+          maxSize: 100,
+          cropRegion: OcrCropRegion(left: 0, top: 0, width: 1, height: 1),
+        ),
+      ))!;
+
+      expect(result.stageTimings.keys, [
+        'decode',
+        'resize',
+        'orient',
+        'crop',
+        'grayscale',
+        'contrast',
+        'fingerprint',
+        'encode',
+      ]);
+    });
+
+    test('元データのSHA-256と前処理後の画像の知覚ハッシュを計算する', () {
+      final bytes = createTestPng(400, 200);
+      final result = preprocessOcrImage(
+          (bytes, const OcrPreprocessOptions(maxSize: 100)))!;
+      final resized = preprocessOcrImage(
+          (createTestPng(800, 400), const OcrPreprocessOptions(maxSize: 100)))!;
+
+      expect(result.contentHash, hasLength(64));
+      expect(result.perceptualHash, hasLength(ocrPerceptualHashBits ~/ 8));
+      // 解像度だけが違う同じ画像は前処理後の知覚ハッシュが一致する
+      expect(resized.contentHash, isNot(result.contentHash));
+      expect(resized.perceptualHash, result.perceptualHash);
+    });
+
+    test('デコードできない画像はnullを返す', () {
+      final result = preprocessOcrImage(
+          (Uint8List.fromList([1, 2, 3]), const OcrPreprocessOptions()));
+
+      expect(result, isNull);
+    });
+  });
+
+  group('OcrImagePreprocessor', () {
+    test('同時に複数の画像を前処理できる', () async {
+      final preprocessor = OcrImagePreprocessor(maxConcurrent: 1);
+      const options = OcrPreprocessOptions(maxSize: 50);
+
+      final results = await Future.wait([
+        for (int i = 0; i < 3; i++)
+          preprocessor.process(createTestPng(100 + i * 10, 100),
+              options: options),
+      ]);
+
+      expect(results.map((r) => r!.width), [50, 50, 50]);
+    });
+  });
+}
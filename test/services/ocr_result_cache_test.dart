@@ -0,0 +1,175 @@
+import 'dart:typed_data';
+
+import 'package:flutter_test/flutter_test.dart';
+import 'package:image/image.dart' as img;
+import 'package:maikago/services/ocr_image_preprocessor.dart';
+import 'package:maikago/services/ocr_result_cache.dart';
+import 'package:maikago/services/vision_ocr_service.dart';
+import 'package:shared_preferences/shared_preferences.dart';
+
+/// 横方向のグラデーション画像（[offset] で明るさをずらす）
+Uint8List createGradientPng({int offset = 0, bool reversed = false}) {
+  final image = img.Image(width: 90, height: 80);
+  for (int y = 0; y < image.height; y++) {
+    for (int x = 0; x < image.width; x++) {
+      final base = reversed ? 255 - x * 2 : x * 2;
+      final value = (base + offset).clamp(0, 255);
+      image.setPixelRgb(x, y, value, value, value);
+    }
+  }
+  return img.encodePng(image);
+}
+
+/// 白地に黒の文字を描いた値札の画像（[price] 以外は同じ構図）
+Uint8List createTagPng(String price) {
+  final image = img.Image(width: 320, height: 200);
+  img.fill(image, color: img.ColorRgb8(255, 255, 255));
+  img.drawString(image, 'YAWARAKA PIE',
+      font: img.arial24, x: 20, y: 30, color: img.ColorRgb8(0, 0, 0));
+  img.drawString(image, price,
+      font: img.arial48, x: 120, y: 100, color: img.ColorRgb8(0, 0, 0));
+  return img.encodePng(image);
+}
+
+OcrImageFingerprint fingerprintOfImage(Uint8List bytes) =>
+    OcrImageFingerprint.fromPreprocessResult(
+        preprocessOcrImage((bytes, const OcrPreprocessOptions()))!);
+
+/// 先頭 [bits] ビットのみが立った知覚ハッシュ
+Uint8List hashWithBits(int bits) {
+  final hash = Uint8List(ocrPerceptualHashBits ~/ 8);
+  for (int bit = 0; bit < bits; bit++) {
+    hash[bit >> 3] |= 0x80 >> (bit & 7);
+  }
+  return hash;
+}
+
+OcrImageFingerprint fingerprintOf(String hash, {Uint8List? perceptualHash}) =>
+    OcrImageFingerprint(contentHash: hash, perceptualHash: perceptualHash);
+
+void main() {
+  late DateTime now;
+  late OcrResultCache cache;
+
+  OcrResultCache createCache({int maxEntries = 3}) => OcrResultCache(
+        maxEntries: maxEntries,
+        ttl: const Duration(days: 1),
+        saveDelay: const Duration(milliseconds: 10),
+        clock: () => now,
+      );
+
+  setUp(() {
+    SharedPreferences.setMockInitialValues({});
+    now = DateTime(2024, 1, 1);
+    cache = createCache();
+  });
+
+  group('LRU', () {
+    test('上限を超えると最も長く参照されていない結果から削除される', () async {
+      await cache.put(fingerprintOf('a'), OcrItemResult(name: 'A', price: 1));
+      await cache.put(fingerprintOf('b'), OcrItemResult(name: 'B', price: 2));
+      await cache.put(fingerprintOf('c'), OcrItemResult(name: 'C', price: 3));
+
+      // 参照した a は最新に移動する
+      expect((await cache.lookup(fingerprintOf('a')))?.name, 'A');
+      await cache.put(fingerprintOf('d'), OcrItemResult(name: 'D', price: 4));
+
+      expect(cache.length, 3);
+      expect(await cache.lookup(fingerprintOf('b')), isNull);
+      expect((await cache.lookup(fingerprintOf('a')))?.price, 1);
+    });
+
+    test('保存から有効期限を過ぎた結果は返さない', () async {
+      await cache.put(fingerprintOf('a'), OcrItemResult(name: 'A', price: 1));
+
+      now = now.add(const Duration(days: 2));
+
+      expect(await cache.lookup(fingerprintOf('a')), isNull);
+      expect(cache.length, 0);
+    });
+  });
+
+  group('似た値札の候補', () {
+    test('知覚ハッシュが近いだけの画像は結果として返さず、候補としてのみ返す', () async {
+      await cache.put(fingerprintOf('a', perceptualHash: hashWithBits(0)),
+          OcrItemResult(name: 'A', price: 1));
+
+      final near = fingerprintOf('b', perceptualHash: hashWithBits(8));
+      final far = fingerprintOf('c', perceptualHash: hashWithBits(9));
+
+      expect(await cache.lookup(near), isNull);
+      expect((await cache.findSimilar(near))?.name, 'A');
+      expect(await cache.findSimilar(far), isNull);
+      expect(cache.stats()['hits'], 0);
+    });
+
+    test('見た目が似ていて価格だけ違う値札は別の価格を返さない', () async {
+      final tag198 = fingerprintOfImage(createTagPng('198'));
+      final tag298 = fingerprintOfImage(createTagPng('298'));
+      await cache.put(tag198, OcrItemResult(name: 'やわらかパイ', price: 198));
+
+      expect(tag298.contentHash, isNot(tag198.contentHash));
+      expect(await cache.lookup(tag298), isNull);
+      // 候補になったとしても、サーバー側でOCRテキストに価格が含まれるか照合される
+      final hint = await cache.findSimilar(tag298);
+      expect(hint == null || hint.price == 198, isTrue);
+      expect((await cache.lookup(tag198))?.price, 198);
+    });
+
+    test('明るさが少し違う同じ構図の画像は前処理後の知覚ハッシュが一致する', () {
+      final base = fingerprintOfImage(createGradientPng());
+      final brighter = fingerprintOfImage(createGradientPng(offset: 8));
+      final different = fingerprintOfImage(createGradientPng(reversed: true));
+
+      expect(brighter.contentHash, isNot(base.contentHash));
+      expect(base.perceptualHash, hasLength(ocrPerceptualHashBits ~/ 8));
+      expect(base.perceptualHash, brighter.perceptualHash);
+      expect(different.perceptualHash, isNot(base.perceptualHash));
+    });
+  });
+
+  group('永続化と統計', () {
+    test('flush後は別インスタンスから結果を参照できる', () async {
+      await cache.put(fingerprintOf('a'), OcrItemResult(name: 'A', price: 1));
+      await cache.flush();
+
+      final restored = await createCache().lookup(fingerprintOf('a'));
+
+      expect(restored?.name, 'A');
+      expect(restored?.price, 1);
+    });
+
+    test('知覚ハッシュも保存され、別インスタンスで候補を探せる', () async {
+      await cache.put(fingerprintOf('a', perceptualHash: hashWithBits(16)),
+          OcrItemResult(name: 'A', price: 1));
+      await cache.flush();
+
+      final hint = await createCache()
+          .findSimilar(fingerprintOf('b', perceptualHash: hashWithBits(17)));
+
+      expect(hint?.name, 'A');
+    });
+
+    test('clearで保存済みの結果と統計が削除される', () async {
+      await cache.put(fingerprintOf('a'), OcrItemResult(name: 'A', price: 1));
+      await cache.lookup(fingerprintOf('a'));
+
+      await cache.clear();
+
+      expect(cache.stats()['hits'], 0);
+      expect(await createCache().lookup(fingerprintOf('a')), isNull);
+    });
+
+    test('ヒット数とミス数が集計される', () async {
+      await cache.put(fingerprintOf('a'), OcrItemResult(name: 'A', price: 1));
+      await cache.lookup(fingerprintOf('a'));
+      await cache.lookup(fingerprintOf('x'));
+
+      final stats = cache.stats();
+      expect(stats['hits'], 1);
+      expect(stats['misses'], 1);
+      expect(stats['hitRate'], 0.5);
+      expect(stats['maxSize'], 3);
+    });
+  });
+}
@@ -0,0 +1,137 @@
+import 'package:flutter_test/flutter_test.dart';
+import 'package:maikago/services/recipe_parser_service.dart';
+import 'package:shared_preferences/shared_preferences.dart';
+
+/// サーバー判定のフェイク（「X」と「X肉」のような前方一致を同一とみなす）
+class FakeSimilarityChecker {
+  final List<List<(String, String)>> calls = [];
+  Object? error;
+
+  /// 判定できなかったことにする材料名（null を返す）
+  final Set<String> unanswered = {};
+
+  Future<List<bool?>> call(List<(String, String)> pairs) async {
+    calls.add(pairs);
+    if (error != null) throw error!;
+    return [
+      for (final (name1, name2) in pairs)
+        unanswered.contains(name1)
+            ? null
+            : name1.startsWith(name2) || name2.startsWith(name1),
+    ];
+  }
+}
+
+void main() {
+  late FakeSimilarityChecker checker;
+  late IngredientSimilarityMemo memo;
+  late RecipeParserService service;
+
+  RecipeParserService createService() => RecipeParserService(
+        similarityChecker: checker.call,
+        similarityMemo: memo,
+      );
+
+  setUp(() {
+    SharedPreferences.setMockInitialValues({});
+    checker = FakeSimilarityChecker();
+    memo = IngredientSimilarityMemo(saveDelay: const Duration(milliseconds: 10));
+    service = createService();
+  });
+
+  group('findMatchingIngredients', () {
+    test('表記ゆれのみの材料はサーバーに問い合わせずに一致させる', () async {
+      final matches = await service.findMatchingIngredients(
+        ['たまねぎ 1個', 'しょうゆ', 'トマト'],
+        ['キャベツ', '玉葱', '醤油 (濃口)'],
+      );
+
+      expect(matches, [1, 2, null]);
+      expect(checker.calls, isEmpty);
+    });
+
+    test('判定できない組み合わせのみをまとめて1回で問い合わせる', () async {
+      List<int?>? localMatches;
+
+      final matches = await service.findMatchingIngredients(
+        ['豚バラ', '鶏もも', '玉ねぎ'],
+        ['豚バラ肉', '鶏もも肉', 'たまねぎ', 'キャベツ'],
+        onLocalMatches: (m) => localMatches = m,
+      );
+
+      expect(localMatches, [null, null, 2]);
+      expect(matches, [0, 1, 2]);
+      expect(checker.calls.length, 1);
+      expect(checker.calls.single.length, 2);
+    });
+
+    test('判定結果は永続化され、次回は問い合わせない', () async {
+      await service.findMatchingIngredients(['豚バラ'], ['豚バラ肉']);
+      await memo.flush();
+
+      memo = IngredientSimilarityMemo();
+      checker = FakeSimilarityChecker();
+      final matches =
+          await createService().findMatchingIngredients(['豚バラ'], ['豚バラ肉']);
+
+      expect(matches, [0]);
+      expect(checker.calls, isEmpty);
+    });
+
+    test('サーバー判定に失敗した場合は一致なしとし、結果を記録しない', () async {
+      checker.error = Exception('unavailable');
+
+      final matches =
+          await service.findMatchingIngredients(['豚バラ'], ['豚バラ肉']);
+
+      expect(matches, [null]);
+      expect(memo.length, 0);
+    });
+
+    test('判定できなかった組み合わせは一致なしとし、記録せずに次回再判定する', () async {
+      checker.unanswered.add('豚バラ');
+
+      final matches = await service.findMatchingIngredients(
+          ['豚バラ', '鶏もも'], ['豚バラ肉', '鶏もも肉']);
+
+      expect(matches, [null, 1]);
+      expect(memo.length, 1);
+
+      checker.unanswered.clear();
+      final retried =
+          await service.findMatchingIngredients(['豚バラ'], ['豚バラ肉']);
+
+      expect(retried, [0]);
+      expect(checker.calls.last, [('豚バラ', '豚バラ肉')]);
+    });
+
+    test('上限を超える組み合わせは分割して問い合わせる', () async {
+      // 数字は分量として除去されるため、漢字1文字ずつ異なる材料名を作る
+      const count = RecipeParserService.maxSimilarityPairsPerRequest + 5;
+      final names = [
+        for (int i = 0; i < count; i++)
+          String.fromCharCode(0x4E00 + i) * 2,
+      ];
+
+      await service.findMatchingIngredients(
+        names,
+        [for (final name in names) '$name肉'],
+      );
+
+      expect(checker.calls.map((pairs) => pairs.length),
+          [RecipeParserService.maxSimilarityPairsPerRequest, 5]);
+    });
+  });
+
+  group('isSameIngredient', () {
+    test('正規化キーが一致すれば同じ食材', () async {
+      expect(await service.isSameIngredient('人参', 'にんじん 1本'), true);
+      expect(checker.calls, isEmpty);
+    });
+
+    test('似ていない材料はサーバーに問い合わせずに別の食材とする', () async {
+      expect(await service.isSameIngredient('牛乳', 'キャベツ'), false);
+      expect(checker.calls, isEmpty);
+    });
+  });
+}